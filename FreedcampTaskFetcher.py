@@ -0,0 +1,64 @@
+"""
+Fetch tasks from the Freedcamp project, newest update first.
+
+iter_updated_since() is the incremental sync used by the duplicate index
+(and anything else that mirrors tasks locally). It walks the pages in
+updated_ts order and stops at the first task not newer than the watermark,
+so a sync only downloads what changed. It trusts that order only after the
+first full page is seen to be newest first; if the API ignores the ordering,
+every page is walked and filtered instead (tools.pagination.newer_than).
+"""
+import os, asyncio, logging
+from dotenv import load_dotenv
+from typing import AsyncIterator, List, Dict
+
+from tools.freedcamp_client import get_freedcamp_client
+from tools.pagination import newer_than, prefetch_pages
+
+load_dotenv()
+log = logging.getLogger(__name__)
+
+
+def updated_ts(task: Dict) -> int:
+    return int(task.get("updated_ts") or task.get("created_ts") or 0)
+
+
+class FreedcampTaskFetcher:
+    APP_ID = 2  # Tasks application
+
+    def __init__(self, project_id: str = None):
+        self.project_id = project_id or os.getenv("FREEDCAMP_PROJECT_ID")
+        if not self.project_id:
+            raise RuntimeError("Missing FREEDCAMP_PROJECT_ID")
+        self.client = get_freedcamp_client()
+        self.prefetch = int(os.getenv("FREEDCAMP_PREFETCH_PAGES", "3"))
+
+    # ------------------------------------------------------------------ public
+    async def list_tasks(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+        """One page of tasks, most recently updated first."""
+        payload = await self.client.get("/tasks", {
+            "project_id": self.project_id,
+            "limit": limit,
+            "offset": offset,
+            "order[updated_ts]": "desc",
+        })
+        tasks = payload.get("data", {}).get("tasks", [])
+        log.debug("Fetched %s tasks at offset %s", len(tasks), offset)
+        return tasks
+
+    async def iter_tasks(self, page_size: int = 100) -> AsyncIterator[Dict]:
+        async for t in prefetch_pages(self.list_tasks, page_size, self.prefetch):
+            yield t
+
+    async def iter_updated_since(self, since_ts: int, page_size: int = 100) -> AsyncIterator[Dict]:
+        """Tasks updated after `since_ts` (0 = everything)."""
+        async for t in newer_than(self.iter_tasks(page_size), since_ts, updated_ts, page_size):
+            yield t
+
+
+# quick CLI smoke-test ---------------------------------------------------------
+if __name__ == "__main__":
+    async def _smoke():
+        async for t in FreedcampTaskFetcher().iter_tasks():
+            print(f"{t['id']:>8}  {updated_ts(t):>10}  {t.get('title')}")
+    asyncio.run(_smoke())
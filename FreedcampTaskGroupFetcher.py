@@ -7,61 +7,54 @@ Fetch Task-group (Task-list) IDs from Freedcamp.
   FREEDCAMP_PROJECT_ID
 """
 
-import os, time, hmac, hashlib, requests
-from typing import List, Dict
+import os, asyncio
+from typing import AsyncIterator, List, Dict
 from dotenv import load_dotenv
 
+from tools.freedcamp_client import get_freedcamp_client
+from tools.pagination import prefetch_pages
+
 load_dotenv()  # ensure .env is loaded
 
 API_KEY       = os.getenv("FREEDCAMP_API_KEY")
 API_SECRET    = os.getenv("FREEDCAMP_API_SECRET")
 PROJECT_ID    = os.getenv("FREEDCAMP_PROJECT_ID")
+PREFETCH      = int(os.getenv("FREEDCAMP_PREFETCH_PAGES", "3"))
 
 if not all([API_KEY, API_SECRET, PROJECT_ID]):
     raise RuntimeError("Missing Freedcamp creds or project ID in .env")
 
-BASE_URL = "https://freedcamp.com/api/v1"
-
-
-def _auth() -> Dict[str, str]:
-    """Return api_key, timestamp, hash (HMAC-SHA1)."""
-    ts = str(int(time.time()))
-    sig = hmac.new(
-        API_SECRET.encode(),
-        f"{API_KEY}{ts}".encode(),
-        hashlib.sha1,
-    ).hexdigest()
-    return {"api_key": API_KEY, "timestamp": ts, "hash": sig}
-
 
 class FreedcampTaskGroups:
     APP_ID = 2  # Tasks application
 
     @staticmethod
-    def list_raw(limit: int = 200, offset: int = 0) -> List[Dict]:
+    async def list_raw(limit: int = 200, offset: int = 0) -> List[Dict]:
         """
         Return raw task-list objects:
         [{'id': '272', 'title': 'Back-end', ...}, …]
         """
-        url = f"{BASE_URL}/lists/{FreedcampTaskGroups.APP_ID}"
-        params = {
-            **_auth(),
-            "project_id": PROJECT_ID,
-            "limit": limit,
-            "offset": offset,
-        }
-        r = requests.get(url, params=params, timeout=15)
-        r.raise_for_status()
+        payload = await get_freedcamp_client().get(
+            f"/lists/{FreedcampTaskGroups.APP_ID}",
+            {"project_id": PROJECT_ID, "limit": limit, "offset": offset},
+        )
+        return payload.get("data", {}).get("lists", [])
 
-        return r.json().get("data", {}).get("lists", [])
+    @staticmethod
+    async def iter_lists(page_size: int = 200) -> AsyncIterator[Dict]:
+        """Yield every task list across all pages, prefetching ahead concurrently."""
+        async for lst in prefetch_pages(FreedcampTaskGroups.list_raw, page_size, PREFETCH):
+            yield lst
 
     @staticmethod
-    def id_map() -> Dict[str, str]:
+    async def id_map() -> Dict[str, str]:
         """Return {title_lower: id} for quick lookup."""
-        return {lst["title"].lower(): lst["id"] for lst in FreedcampTaskGroups.list_raw()}
+        return {lst["title"].lower(): lst["id"] async for lst in FreedcampTaskGroups.iter_lists()}
 
 
 # quick CLI smoke-test ---------------------------------------------------------
 if __name__ == "__main__":
-    for lst in FreedcampTaskGroups.list_raw():
-        print(f"{lst['id']:>8}  {lst['title']}")
+    async def _smoke():
+        async for lst in FreedcampTaskGroups.iter_lists():
+            print(f"{lst['id']:>8}  {lst['title']}")
+    asyncio.run(_smoke())
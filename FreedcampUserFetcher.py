@@ -1,45 +1,39 @@
-import os, time, hmac, hashlib, requests, logging
+import os, asyncio, logging
 from dotenv import load_dotenv
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict
+
+from tools.freedcamp_client import get_freedcamp_client
+from tools.pagination import prefetch_pages
 
 load_dotenv()
 log = logging.getLogger(__name__)
 
 class FreedcampUserFetcher:
-    BASE_URL = "https://freedcamp.com/api/v1"
-
     def __init__(self):
         self.api_key    = os.getenv("FREEDCAMP_API_KEY")
         self.api_secret = os.getenv("FREEDCAMP_API_SECRET")
         if not (self.api_key and self.api_secret):
             raise RuntimeError("Missing FREEDCAMP_API_KEY / FREEDCAMP_API_SECRET")
-
-    # ------------------------------------------------------------------ helpers
-    def _auth(self) -> Dict[str, str]:
-        ts = str(int(time.time()))
-        sig = hmac.new(
-            self.api_secret.encode(),
-            f"{self.api_key}{ts}".encode(),
-            digestmod="sha1",
-        ).hexdigest()
-        return {"api_key": self.api_key, "timestamp": ts, "hash": sig}
+        self.client = get_freedcamp_client()
+        self.prefetch = int(os.getenv("FREEDCAMP_PREFETCH_PAGES", "3"))
 
     # ------------------------------------------------------------------ public
-    def list_users(self, limit: int = 200, offset: int = 0) -> List[Dict]:
+    async def list_users(self, limit: int = 200, offset: int = 0) -> List[Dict]:
         """Return raw Freedcamp user objects the key can see."""
-        params = {**self._auth(), "limit": limit, "offset": offset}
-        r = requests.get(f"{self.BASE_URL}/users", params=params, timeout=15)
-        r.raise_for_status()
-
-        payload = r.json()             # whole response
+        payload = await self.client.get("/users", {"limit": limit, "offset": offset})
         users = payload.get("data", {}).get("users", [])
         log.debug("Fetched %s users", len(users))
         return users
 
-    def id_map(self) -> Dict[str, int]:
+    async def iter_users(self, page_size: int = 200) -> AsyncIterator[Dict]:
+        """Yield every user across all pages, prefetching the next pages concurrently."""
+        async for u in prefetch_pages(self.list_users, page_size, self.prefetch):
+            yield u
+
+    async def id_map(self) -> Dict[str, int]:
         """Handy dict → {email_lower/full_name_lower : user_id}."""
         mapping: Dict[str, int] = {}
-        for u in self.list_users():
+        async for u in self.iter_users():
             mapping[u["full_name"].lower()] = int(u["user_id"])
             if u.get("email"):
                 mapping[u["email"].lower()] = int(u["user_id"])
@@ -49,5 +43,7 @@ class FreedcampUserFetcher:
 # ------------------- smoke test ----------------------------------------------
 if __name__ == "__main__":
     fc = FreedcampUserFetcher()
-    for u in fc.list_users()[:5]:
-        print(f"{u['user_id']:>8}  {u['full_name']}  <{u.get('email')}>")
+    async def _smoke():
+        async for u in fc.iter_users():
+            print(f"{u['user_id']:>8}  {u['full_name']}  <{u.get('email')}>")
+    asyncio.run(_smoke())
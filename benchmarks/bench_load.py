@@ -0,0 +1,346 @@
+"""
+Offline load test for POST /slack/events.
+
+Everything runs on 127.0.0.1 and no request leaves the machine:
+
+  fake Slack       chat.postMessage / chat.update / users.list (aiohttp.web),
+                   which records when each DM channel gets its final reply
+  fake Freedcamp   POST /tasks, GET /tasks and GET /users (aiohttp.web), which counts
+                   tasks created more than once
+  fake model       a deterministic Agents SDK Model with configurable latency,
+                   installed on the draft agents
+  app              slack_events:app served by uvicorn in this process
+
+Each synthetic DM is signed with the bench signing secret and goes to its own
+DM channel. A `--retry-ratio` share is sent a second time as a Slack
+redelivery (same event_id, X-Slack-Retry-Num: 1). Reported numbers:
+
+  ack latency        POST -> HTTP 200 (what Slack's 3s deadline sees)
+  end-to-end         POST -> final chat.update carrying the result
+  requests/sec       completed DMs / wall time
+  duplicate tasks    Freedcamp tasks created more than once for one DM
+
+Usage:
+  python benchmarks/bench_load.py [--requests 200] [--concurrency 20]
+      [--model-latency 0.3] [--freedcamp-latency 0.05] [--slack-latency 0.01]
+      [--retry-ratio 0.1] [--fast-path-ratio 0.0] [--json]
+      [--min-rps N] [--max-p99 SECONDS]
+
+With --min-rps / --max-p99 the exit status is 1 when the run misses either
+gate, so CI can fail on a regression. Requires the app's dependencies.
+"""
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import argparse
+import tempfile
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+import aiohttp
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SIGNING_SECRET = "bench-signing-secret"
+FINAL_REPLY_RE = re.compile(r"Created \d+ of \d+|An error occurred|:warning:")
+REQUEST_NO_RE = re.compile(r"#(\d+)")
+
+
+def percentile(samples: List[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+# ------------------------------------------------------------------ fake upstreams
+class FakeSlack:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.final_at: Dict[str, float] = {}
+        self.calls: Counter = Counter()
+        self._ts = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/api/{method}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        if request.method == "GET":
+            body = dict(request.query)
+        elif request.content_type == "application/json":
+            body = await request.json()
+        else:
+            body = dict(await request.post())
+        await asyncio.sleep(self.latency)
+        if method == "users.list":
+            return web.json_response({"ok": True, "members": [], "response_metadata": {"next_cursor": ""}})
+        channel = body.get("channel", "")
+        text = body.get("text") or ""
+        if FINAL_REPLY_RE.search(text) and channel not in self.final_at:
+            self.final_at[channel] = time.perf_counter()
+        self._ts += 1
+        return web.json_response({"ok": True, "channel": channel, "ts": body.get("ts") or f"{self._ts}.000100"})
+
+
+class FakeFreedcamp:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.created: Counter = Counter()
+        self._next_id = 1000
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/v1/tasks", self.create_task)
+        app.router.add_get("/api/v1/users", self.users)
+        app.router.add_get("/api/v1/tasks", self.tasks)  # duplicate index / task store sync
+        return app
+
+    async def create_task(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        payload = json.loads(form["data"])
+        await asyncio.sleep(self.latency)
+        self.created[payload["title"]] += 1
+        self._next_id += 1
+        return web.json_response({"data": {"id": str(self._next_id), "url": f"/view/task/{self._next_id}"}})
+
+    async def users(self, request: web.Request) -> web.Response:
+        return web.json_response({"data": {"users": []}})
+
+    async def tasks(self, request: web.Request) -> web.Response:
+        return web.json_response({"data": {"tasks": []}})
+
+    @property
+    def duplicates(self) -> int:
+        return sum(n - 1 for n in self.created.values() if n > 1)
+
+
+async def _serve(app: web.Application) -> Tuple[web.AppRunner, int]:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner, runner.addresses[0][1]
+
+
+# ------------------------------------------------------------------ fake model
+def build_fake_model(latency: float):
+    """Deterministic Agents SDK Model: one P2 task per message, titled after its '#<n>' marker."""
+    from agents.items import ModelResponse
+    from agents.models.interface import Model
+    from agents.usage import Usage
+    from openai.types.responses import (
+        Response, ResponseCompletedEvent, ResponseOutputMessage, ResponseOutputText, ResponseTextDeltaEvent,
+    )
+
+    def output_text(user_input) -> str:
+        text = user_input if isinstance(user_input, str) else json.dumps(user_input)
+        match = REQUEST_NO_RE.search(text)
+        title = f"Bench task #{match.group(1) if match else uuid.uuid4().hex[:8]}"
+        return json.dumps({
+            "status": "success",
+            "message": "",
+            "tasks": [{"title": title, "description": text[:200], "assignee": "@bench",
+                       "due_date": None, "priority": "P2", "source_channel": ""}],
+        })
+
+    def message(text: str):
+        return ResponseOutputMessage.model_construct(
+            id="msg_bench", type="message", role="assistant", status="completed",
+            content=[ResponseOutputText.model_construct(type="output_text", text=text, annotations=[])],
+        )
+
+    class FakeModel(Model):
+        async def get_response(self, system_instructions, input, *args, **kwargs) -> ModelResponse:
+            await asyncio.sleep(latency)
+            return ModelResponse(output=[message(output_text(input))], usage=Usage(), response_id=None)
+
+        async def stream_response(self, system_instructions, input, *args, **kwargs):
+            text = output_text(input)
+            chunks = [text[i:i + 40] for i in range(0, len(text), 40)]
+            for n, chunk in enumerate(chunks):
+                await asyncio.sleep(latency / len(chunks))
+                yield ResponseTextDeltaEvent.model_construct(
+                    type="response.output_text.delta", delta=chunk, item_id="msg_bench",
+                    output_index=0, content_index=0, sequence_number=n,
+                )
+            response = Response.model_construct(
+                id="resp_bench", object="response", created_at=time.time(), model="bench",
+                output=[message(text)], tool_choice="auto", tools=[], parallel_tool_calls=False, usage=None,
+            )
+            yield ResponseCompletedEvent.model_construct(
+                type="response.completed", response=response, sequence_number=len(chunks),
+            )
+
+    return FakeModel()
+
+
+# ------------------------------------------------------------------ load generator
+def signed_event(n: int, fast_path: bool) -> Tuple[bytes, Dict[str, str], str]:
+    channel = f"DBENCH{n:06d}"
+    user = f"UBENCH{n:06d}"  # one sender per DM: the scheduler's per-user cap must not be what gets measured
+    text = f"@bench fix login bug #{n} P1 by friday" if fast_path else f"could someone look into the login bug #{n}, @bench"
+    body = json.dumps({
+        "type": "event_callback",
+        "event_id": f"Ev{n:08d}",
+        "event": {"type": "message", "channel_type": "im", "channel": channel, "user": user,
+                  "text": text, "ts": f"{time.time():.6f}", "client_msg_id": str(uuid.uuid4())},
+    }).encode()
+    ts = str(int(time.time()))
+    sig = "v0=" + hmac.new(SIGNING_SECRET.encode(), f"v0:{ts}:".encode() + body, hashlib.sha256).hexdigest()
+    headers = {"Content-Type": "application/json", "X-Slack-Request-Timestamp": ts, "X-Slack-Signature": sig}
+    return body, headers, channel
+
+
+async def fire(args, url: str, slack: FakeSlack) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    sent_at: Dict[str, float] = {}
+    ack: List[float] = []
+    errors = Counter()
+
+    async def one(session: aiohttp.ClientSession, n: int) -> None:
+        body, headers, channel = signed_event(n, n < args.requests * args.fast_path_ratio)
+        async with semaphore:
+            started = time.perf_counter()
+            sent_at[channel] = started
+            try:
+                async with session.post(url, data=body, headers=headers) as resp:
+                    await resp.read()
+                    if resp.status != 200:
+                        errors[f"http_{resp.status}"] += 1
+                ack.append(time.perf_counter() - started)
+                if n < args.requests * args.retry_ratio:  # Slack redelivery of the same event
+                    async with session.post(url, data=body, headers={**headers, "X-Slack-Retry-Num": "1"}) as resp:
+                        await resp.read()
+            except aiohttp.ClientError as e:
+                errors[type(e).__name__] += 1
+
+    wall_start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(one(session, n) for n in range(args.requests)))
+        deadline = time.perf_counter() + args.drain_timeout
+        while len(slack.final_at) < len(sent_at) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+    wall = (max(slack.final_at.values()) if slack.final_at else time.perf_counter()) - wall_start
+
+    e2e = [slack.final_at[c] - sent_at[c] for c in sent_at if c in slack.final_at]
+    return {"ack": ack, "e2e": e2e, "wall": wall, "errors": dict(errors), "completed": len(e2e)}
+
+
+def _latency(samples: List[float]) -> Dict[str, float]:
+    summary = {f"p{p}": round(percentile(samples, p), 4) for p in (50, 90, 95, 99)}
+    summary["max"] = round(max(samples), 4) if samples else 0.0
+    return summary
+
+
+async def run(args) -> Dict[str, Any]:
+    slack, freedcamp = FakeSlack(args.slack_latency), FakeFreedcamp(args.freedcamp_latency)
+    slack_runner, slack_port = await _serve(slack.app())
+    fc_runner, fc_port = await _serve(freedcamp.app())
+    workdir = tempfile.mkdtemp(prefix="xizor-load-")
+    os.environ.update({
+        "SLACK_SIGNING_SECRET": SIGNING_SECRET,
+        "SLACK_BOT_TOKEN": "xoxb-bench",
+        "SLACK_API_URL": f"http://127.0.0.1:{slack_port}/api/",
+        "SLACK_CHANNEL_MIN_INTERVAL": "0",
+        "FREEDCAMP_BASE_URL": f"http://127.0.0.1:{fc_port}/api/v1",
+        "FREEDCAMP_API_KEY": "bench", "FREEDCAMP_API_SECRET": "bench",
+        "FREEDCAMP_PROJECT_ID": "1", "FREEDCAMP_TASK_GROUP_ID": "1",
+        "OPENAI_API_KEY": "sk-bench",
+        "DRAFT_CACHE_PATH": os.path.join(workdir, "draft_cache.sqlite3"),
+        "OUTBOX_PATH": os.path.join(workdir, "outbox.sqlite3"),
+        "DIRECTORY_SNAPSHOT_PATH": os.path.join(workdir, "directory.json"),
+        "STATE_PATH": os.path.join(workdir, "state.sqlite3"),
+        "DUPLICATE_INDEX_PATH": os.path.join(workdir, "duplicate_index.sqlite3"),
+        "TASK_STORE_PATH": os.path.join(workdir, "task_store.sqlite3"),
+        "DUPLICATE_THRESHOLD": "2",  # generated titles differ only by a number; measure creates, not the check
+        "COALESCE_WINDOW_SECONDS": "0",  # one DM per channel, nothing to join; keep e2e free of the window
+        # Measure raw capacity: a shed request never gets a final reply and would read as lost
+        "ADMISSION_MAX_DEPTH": "0", "ADMISSION_MAX_OUTSTANDING": "0", "ADMISSION_P95_SLO_SECONDS": "0",
+    })
+
+    import uvicorn
+    from agents import set_tracing_disabled
+    import slack_events
+    from pm_agents.task_draft_agent import TaskDraftAgent, TaskDraftLiteAgent
+
+    set_tracing_disabled(True)
+    TaskDraftAgent.model = TaskDraftLiteAgent.model = build_fake_model(args.model_latency)
+
+    server = uvicorn.Server(uvicorn.Config(slack_events.app, host="127.0.0.1", port=args.port, log_level="warning"))
+    serve_task = asyncio.ensure_future(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        raw = await fire(args, f"http://127.0.0.1:{args.port}/slack/events", slack)
+    finally:
+        server.should_exit = True
+        await serve_task
+        await slack_runner.cleanup()
+        await fc_runner.cleanup()
+
+    return {
+        "requests": args.requests,
+        "completed": raw["completed"],
+        "requests_per_sec": round(raw["completed"] / raw["wall"], 2) if raw["wall"] > 0 else 0.0,
+        "ack_latency_s": _latency(raw["ack"]),
+        "end_to_end_latency_s": _latency(raw["e2e"]),
+        "tasks_created": sum(freedcamp.created.values()),
+        "duplicate_tasks": freedcamp.duplicates,
+        "slack_calls": dict(slack.calls),
+        "errors": raw["errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--model-latency", type=float, default=0.3, help="seconds per fake model call")
+    parser.add_argument("--freedcamp-latency", type=float, default=0.05)
+    parser.add_argument("--slack-latency", type=float, default=0.01)
+    parser.add_argument("--retry-ratio", type=float, default=0.1, help="share of events redelivered by 'Slack'")
+    parser.add_argument("--fast-path-ratio", type=float, default=0.0, help="share of DMs the rules tier can draft")
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--json", action="store_true", help="print a JSON summary only")
+    parser.add_argument("--min-rps", type=float, help="exit 1 below this throughput")
+    parser.add_argument("--max-p99", type=float, help="exit 1 above this end-to-end p99 (seconds)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"completed        {result['completed']}/{result['requests']}  ({result['requests_per_sec']} req/s)")
+        for name in ("ack_latency_s", "end_to_end_latency_s"):
+            s = result[name]
+            print(f"{name:<16} p50 {s['p50']:.3f}  p90 {s['p90']:.3f}  p95 {s['p95']:.3f}  "
+                  f"p99 {s['p99']:.3f}  max {s['max']:.3f}")
+        print(f"tasks created    {result['tasks_created']}  (duplicates: {result['duplicate_tasks']})")
+        if result["errors"]:
+            print(f"errors           {result['errors']}")
+
+    failed = result["duplicate_tasks"] > 0 or result["completed"] < result["requests"]
+    if args.min_rps is not None and result["requests_per_sec"] < args.min_rps:
+        failed = True
+    if args.max_p99 is not None and result["end_to_end_latency_s"]["p99"] > args.max_p99:
+        failed = True
+    if failed and (args.min_rps is not None or args.max_p99 is not None):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
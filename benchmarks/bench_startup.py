@@ -0,0 +1,149 @@
+"""
+Cold-start benchmark: import time of the app module and time-to-first-request.
+
+Each sample runs in a fresh interpreter so nothing is cached between runs:
+
+  import      python -c "import slack_events"          (wall time of the import)
+  first-req   start uvicorn, POST a signed url_verification challenge to
+              /slack/events until it answers 200 (process spawn -> first 200)
+
+Usage:
+  python benchmarks/bench_startup.py [--runs 5] [--port 8765] [--json] [--importtime]
+
+Requires the app's dependencies (fastapi, uvicorn, slack_sdk, openai-agents).
+No network access is needed: a dummy signing secret is used and the only
+request goes to the local server. Every data and log file goes to a temp
+dir, and the directory, duplicate-index and task-store syncs are not
+started. Slack and Freedcamp URLs point at a closed local port in case
+anything else tries to call out.
+"""
+import os
+import sys
+import hmac
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import statistics
+import subprocess
+import urllib.request
+import urllib.error
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIGNING_SECRET = "bench-signing-secret"
+WORKDIR = tempfile.mkdtemp(prefix="xizor-startup-")
+CLOSED_PORT = "http://127.0.0.1:9"
+
+# uvicorn with the background syncs stubbed out: they would call Freedcamp and Slack,
+# and the work they do after startup is not part of the cold-start cost
+SERVE = """
+import sys, uvicorn, slack_events
+from services.duplicate_index import get_duplicate_service
+from services.task_store import get_task_store_service
+for service in (slack_events.directory, get_duplicate_service(), get_task_store_service()):
+    service.start = lambda: None
+uvicorn.run(slack_events.app, host="127.0.0.1", port=int(sys.argv[1]), log_level="warning")
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "SLACK_SIGNING_SECRET": SIGNING_SECRET,
+        "SLACK_BOT_TOKEN": "xoxb-bench",
+        "SLACK_API_URL": f"{CLOSED_PORT}/api/",
+        "FREEDCAMP_BASE_URL": f"{CLOSED_PORT}/api/v1",
+        "DRAFT_CACHE_PATH": os.path.join(WORKDIR, "draft_cache.sqlite3"),
+        "OUTBOX_PATH": os.path.join(WORKDIR, "outbox.sqlite3"),
+        "DIRECTORY_SNAPSHOT_PATH": os.path.join(WORKDIR, "directory.json"),
+        "STATE_BACKEND": "sqlite",
+        "STATE_PATH": os.path.join(WORKDIR, "state.sqlite3"),
+        "DUPLICATE_INDEX_PATH": os.path.join(WORKDIR, "duplicate_index.sqlite3"),
+        "TASK_STORE_PATH": os.path.join(WORKDIR, "task_store.sqlite3"),
+        "LOG_FILE": os.path.join(WORKDIR, "xizor.jsonl"),
+    })
+    return env
+
+
+def measure_import() -> float:
+    code = "import time; t = time.perf_counter(); import slack_events; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=_env(),
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _signed_challenge(url: str) -> urllib.request.Request:
+    body = json.dumps({"type": "url_verification", "challenge": "bench"}).encode()
+    ts = str(int(time.time()))
+    sig = "v0=" + hmac.new(SIGNING_SECRET.encode(), f"v0:{ts}:".encode() + body, hashlib.sha256).hexdigest()
+    return urllib.request.Request(
+        url, data=body, method="POST",
+        headers={"Content-Type": "application/json", "X-Slack-Request-Timestamp": ts, "X-Slack-Signature": sig},
+    )
+
+
+def measure_first_request(port: int, timeout: float = 60.0) -> float:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", SERVE, str(port)],
+        cwd=ROOT, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            req = _signed_challenge(f"http://127.0.0.1:{port}/slack/events")
+            try:
+                with urllib.request.urlopen(req, timeout=2) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise RuntimeError("server did not answer within the timeout")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "median_s": round(statistics.median(samples), 4),
+        "min_s": round(min(samples), 4),
+        "max_s": round(max(samples), 4),
+        "runs": len(samples),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", action="store_true", help="print a JSON summary only")
+    parser.add_argument("--importtime", action="store_true", help="also show the slowest imports (-X importtime)")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    first = [measure_first_request(args.port) for _ in range(args.runs)]
+    result = {"import": _summary(imports), "time_to_first_request": _summary(first)}
+
+    if args.json:
+        print(json.dumps(result))
+        return
+    for name, s in result.items():
+        print(f"{name:<24} median {s['median_s']:.3f}s  min {s['min_s']:.3f}s  max {s['max_s']:.3f}s  ({s['runs']} runs)")
+
+    if args.importtime:
+        out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import slack_events"],
+                             cwd=ROOT, env=_env(), capture_output=True, text=True)
+        rows = []
+        for line in out.stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[1].strip().isdigit():
+                rows.append((int(parts[1]), parts[2].rstrip()))
+        print("\nslowest imports (cumulative us):")
+        for cumulative, module in sorted(rows, reverse=True)[:15]:
+            print(f"  {cumulative:>9}  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+Bulk import of backlogs and meeting notes into Freedcamp.
+
+  python bulk_import.py backlog.csv [--concurrency 4] [--checkpoint PATH]
+  python bulk_import.py notes.md --user U123 --allow-duplicates
+  python bulk_import.py data/imports/backlog.csv.failed.jsonl   # retry the failures
+
+Every input unit goes through the same pipeline as a Slack DM,
+OrchestratorAgent.run: the draft router (rules, then lite, then full model),
+the duplicate check, and the Freedcamp outbox. Units are:
+
+  .jsonl / .ndjson  one object per line: {"text": ...}, or task fields
+                    (title, description, assignee, priority, due_date)
+  .csv              one row per unit, with the same column names
+  .md / .txt        each list item is a unit; other text is cut into
+                    paragraph chunks of up to --chunk-chars (transcripts),
+                    and the model drafts every action item in a chunk
+
+Input is read as a stream, and at most 2 x --concurrency units are in
+memory. The checkpoint (data/imports/<file>.checkpoint.json by default)
+records every finished unit. A rerun skips those units, and a unit that was
+mid-flight when the run stopped is answered from the outbox instead of
+being created twice, because its outbox key is the unit's position in the
+file. Units that drafted with an error are appended to <file>.failed.jsonl
+next to the checkpoint, which is itself valid input. Units that raised are
+not checkpointed, so the next run retries them.
+"""
+import os
+import csv
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+ITEM_PREFIXES = ("- ", "* ", "+ ")
+
+
+@dataclass
+class ImportContext:
+    channel: str  # "" = no Slack notifications from the outbox
+    user: str
+    event_id: str
+    trace_id: str = ""
+
+
+# ------------------------------------------------------------------ readers
+def record_text(record: Dict[str, Any]) -> str:
+    """DM-style text for a structured row; the rules tier drafts complete rows without the model."""
+    if record.get("text"):
+        return str(record["text"]).strip()
+    parts = [str(record.get("title") or "").strip()]
+    if record.get("description"):
+        parts.append(f"- {str(record['description']).strip()}")
+    if record.get("assignee"):
+        assignee = str(record["assignee"]).strip()
+        parts.append(assignee if assignee.startswith("@") or "@" in assignee else f"@{assignee}")
+    if record.get("priority"):
+        parts.append(str(record["priority"]).strip())
+    if record.get("due_date"):
+        parts.append(f"due {str(record['due_date']).strip()}")
+    return " ".join(p for p in parts if p)
+
+
+def _markdown_item(line: str) -> Optional[str]:
+    stripped = line.lstrip()
+    if stripped.startswith(ITEM_PREFIXES):
+        return stripped[2:].strip()
+    head, dot, rest = stripped.partition(". ")
+    if dot and head.isdigit():
+        return rest.strip()
+    return None
+
+
+def iter_markdown(lines: Iterator[str], chunk_chars: int = 3000) -> Iterator[str]:
+    """List items one by one; everything else as paragraph chunks, prefixed with their heading."""
+    heading = ""
+    chunk: list = []
+    size = 0
+
+    def flush() -> Iterator[str]:
+        nonlocal chunk, size
+        if chunk:
+            text = "\n".join(chunk).strip()
+            if text:
+                yield f"{heading}\n{text}" if heading else text
+        chunk, size = [], 0
+
+    for raw in lines:
+        line = raw.rstrip("\n")
+        if line.startswith("#"):
+            yield from flush()
+            heading = line.lstrip("#").strip()
+            continue
+        item = _markdown_item(line)
+        if item is not None:
+            yield from flush()
+            if item:
+                yield item
+            continue
+        if not line.strip() and size >= chunk_chars // 2:
+            yield from flush()  # paragraph boundary in a long chunk
+            continue
+        if size + len(line) > chunk_chars:
+            yield from flush()
+        chunk.append(line)
+        size += len(line) + 1
+    yield from flush()
+
+
+def iter_units(path: str, chunk_chars: int = 3000) -> Iterator[str]:
+    """Stream the non-empty units of an input file."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in (".jsonl", ".ndjson", ".csv", ".md", ".markdown", ".txt"):
+        raise ValueError(f"Unsupported input type '{ext}' (expected .jsonl, .csv, .md or .txt)")
+    with open(path, encoding="utf-8", newline="" if ext == ".csv" else None) as f:
+        if ext in (".jsonl", ".ndjson"):
+            rows = (json.loads(line) for line in f if line.strip())
+            units = (record_text(r) if isinstance(r, dict) else str(r) for r in rows)
+        elif ext == ".csv":
+            units = (record_text({k.strip().lower(): v for k, v in row.items() if k}) for row in csv.DictReader(f))
+        else:
+            units = iter_markdown(f, chunk_chars)
+        for unit in units:
+            if unit:
+                yield unit
+
+
+# ------------------------------------------------------------------ checkpoint
+class Checkpoint:
+    """Finished unit numbers: a contiguous low watermark plus the finished units above it."""
+
+    def __init__(self, path: str, fingerprint: str):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.watermark = 0  # every unit below this is done
+        self.done: Set[int] = set()
+        self.stats: Dict[str, int] = {}
+        self._saved_at = 0.0
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str, restart: bool = False) -> "Checkpoint":
+        cp = cls(path, fingerprint)
+        if restart or not os.path.exists(path):
+            return cp
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("fingerprint") != fingerprint:
+            raise SystemExit(f"{path} belongs to a different version of the input; pass --restart to start over")
+        cp.watermark = int(data.get("watermark", 0))
+        cp.done = set(data.get("done", []))
+        cp.stats = dict(data.get("stats", {}))
+        return cp
+
+    def is_done(self, n: int) -> bool:
+        return n < self.watermark or n in self.done
+
+    def mark(self, n: int) -> None:
+        self.done.add(n)
+        while self.watermark in self.done:
+            self.done.remove(self.watermark)
+            self.watermark += 1
+
+    def save(self, force: bool = False, every: float = 1.0) -> None:
+        now = time.monotonic()
+        if not force and now - self._saved_at < every:
+            return
+        self._saved_at = now
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": self.fingerprint, "watermark": self.watermark,
+                       "done": sorted(self.done), "stats": self.stats}, f)
+        os.replace(tmp, self.path)  # atomic: an interrupted save leaves the previous checkpoint
+
+
+def failures_path_for(checkpoint_path: str) -> str:
+    """data/imports/backlog.csv.checkpoint.json -> data/imports/backlog.csv.failed.jsonl"""
+    if checkpoint_path.endswith(".checkpoint.json"):
+        return checkpoint_path[:-len(".checkpoint.json")] + ".failed.jsonl"
+    return os.path.splitext(checkpoint_path)[0] + ".failed.jsonl"
+
+
+def fingerprint(path: str) -> str:
+    st = os.stat(path)
+    return hashlib.sha1(f"{os.path.abspath(path)}:{st.st_size}:{int(st.st_mtime)}".encode()).hexdigest()[:16]
+
+
+# ------------------------------------------------------------------ run
+class Progress:
+    def __init__(self, every: float, out=sys.stderr):
+        self.every = every
+        self.out = out
+        self.started = time.monotonic()
+        self._last = self.started
+        self.counts: Dict[str, int] = {"units": 0, "skipped": 0, "created": 0, "queued": 0,
+                                       "duplicates": 0, "failed": 0, "errors": 0}
+
+    def add(self, **kv: int) -> None:
+        for k, v in kv.items():
+            self.counts[k] += v
+        now = time.monotonic()
+        if now - self._last >= self.every:
+            self._last = now
+            self.report()
+
+    def report(self, final: bool = False) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        c = self.counts
+        line = (f"[{elapsed:7.1f}s] {c['units']} units ({c['units'] / elapsed:.2f}/s), "
+                f"{c['created']} tasks created ({c['created'] / elapsed:.2f}/s), {c['queued']} queued, "
+                f"{c['duplicates']} duplicates, {c['failed']} failed drafts, {c['errors']} errors, "
+                f"{c['skipped']} skipped")
+        print(("done " if final else "") + line, file=self.out, flush=True)
+
+
+def _outcome(result) -> Tuple[Dict[str, int], bool]:
+    created = sum(1 for r in result.results if r.freedcamp_info.success)
+    queued = sum(1 for r in result.results if r.queued)
+    duplicates = sum(1 for r in result.results if r.duplicate_of is not None)
+    failed = result.status == "error"
+    return {"created": created, "queued": queued, "duplicates": duplicates, "failed": int(failed)}, failed
+
+
+async def run(args) -> Dict[str, int]:
+    # Heavy imports here so the readers and checkpoint stay importable without the app's dependencies
+    from dotenv import load_dotenv
+    load_dotenv()
+    from services.logging_setup import configure_logging
+    configure_logging(console=False)
+    from pm_agents.orchestrator_agent import get_orchestrator, get_outbox_dispatcher
+    from services.directory import get_directory
+    from services.duplicate_index import get_duplicate_service
+    from tools.freedcamp_client import get_freedcamp_client
+    from tools.slack_sender import get_slack_sender
+
+    checkpoint_path = args.checkpoint or os.path.join("data", "imports", os.path.basename(args.input) + ".checkpoint.json")
+    os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+    fp = fingerprint(args.input)
+    checkpoint = Checkpoint.load(checkpoint_path, fp, restart=args.restart)
+    failures_path = failures_path_for(checkpoint_path)
+    progress = Progress(args.report_every)
+
+    orchestrator = get_orchestrator()
+    directory = get_directory()
+    directory.start()
+    if not directory.index.entries:
+        await directory.refresh()
+    if not args.allow_duplicates:
+        try:
+            await get_duplicate_service().sync_once()
+        except Exception as e:
+            print(f"duplicate index not synced ({e}); checking against the local copy only", file=sys.stderr)
+    dispatcher = get_outbox_dispatcher()
+    dispatcher.start()
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=args.concurrency * 2)
+    failures = open(failures_path, "a", encoding="utf-8")
+
+    async def worker() -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                queue.task_done()
+                return
+            n, text = item
+            context = ImportContext(channel=args.channel, user=args.user, event_id=f"import:{fp}:{n}")
+            try:
+                result = await orchestrator.run(text + (" --new" if args.allow_duplicates else ""), context)
+                counts, failed = _outcome(result)
+                if failed:
+                    failures.write(json.dumps({"unit": n, "text": text, "error": result.message}) + "\n")
+                    failures.flush()
+                checkpoint.mark(n)
+                for k, v in counts.items():
+                    checkpoint.stats[k] = checkpoint.stats.get(k, 0) + v
+                checkpoint.save()
+                progress.add(units=1, **counts)
+            except Exception as e:  # not checkpointed: the next run retries this unit
+                progress.add(units=1, errors=1)
+                print(f"unit {n} raised {type(e).__name__}: {e}", file=sys.stderr)
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(args.concurrency)]
+    enqueued = 0
+    try:
+        for n, text in enumerate(iter_units(args.input, args.chunk_chars)):
+            if checkpoint.is_done(n):
+                progress.counts["skipped"] += 1
+                continue
+            if args.limit and enqueued >= args.limit:
+                break
+            enqueued += 1
+            await queue.put((n, text))  # blocks while the workers are busy: the file is never read ahead
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for w in workers:
+            w.cancel()
+        checkpoint.save(force=True)
+        failures.close()
+        progress.report(final=True)
+        await dispatcher.stop()
+        await directory.stop()
+        await get_slack_sender().aclose()
+        await get_freedcamp_client().aclose()
+    return progress.counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help=".jsonl, .csv, .md or .txt file")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("IMPORT_CONCURRENCY", "4")))
+    parser.add_argument("--checkpoint", help="checkpoint file (default data/imports/<input>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--user", default=os.getenv("IMPORT_SLACK_USER", "bulk-import"),
+                        help="Slack user id the drafts are attributed to")
+    parser.add_argument("--channel", default="", help="Slack channel for 'queued task created' notifications")
+    parser.add_argument("--allow-duplicates", action="store_true", help="skip the duplicate-task check")
+    parser.add_argument("--chunk-chars", type=int, default=3000, help="max characters per transcript chunk")
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many units (0 = all)")
+    parser.add_argument("--report-every", type=float, default=5.0, help="seconds between progress lines")
+    parser.add_argument("--json", action="store_true", help="print the final counts as JSON")
+    args = parser.parse_args()
+    args.concurrency = max(1, args.concurrency)
+
+    try:
+        counts = asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("interrupted; rerun the same command to resume from the checkpoint", file=sys.stderr)
+        sys.exit(130)
+    if args.json:
+        print(json.dumps(counts))
+    sys.exit(1 if counts["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,20 @@
-from .task_draft_agent import TaskDraftAgent
-from .sheet_writer_agent import SheetWriterAgent
-from .orchestrator_agent import OrchestratorAgent 
\ No newline at end of file
+# Agents are imported on first access so that importing one of them (or a helper
+# module such as pm_agents.fast_path) does not pull in every integration - the
+# Slack request path never needs SheetWriterAgent and its gspread dependency.
+import importlib
+
+_EXPORTS = {
+    "TaskDraftAgent": ".task_draft_agent",
+    "SheetWriterAgent": ".sheet_writer_agent",
+    "OrchestratorAgent": ".orchestrator_agent",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
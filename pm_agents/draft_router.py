@@ -0,0 +1,140 @@
+# pm_agents/draft_router.py
+"""
+Tiered routing for task drafting: rules -> lite model -> full model.
+
+Formulaic one-liners are drafted by pm_agents.fast_path with no LLM call.
+Everything else goes to TaskDraftLiteAgent with the partial fast-path result
+as hints. The lite tier escalates to the full TaskDraftAgent only when it
+raises or returns something unusable (not a TaskDraftOutput, a success with
+no tasks, an error with no message). A well-formed lite error, such as "no
+assignee given", is the answer: the full model would only say it again.
+Which tier produced each draft is counted, and every attempt's latency is
+recorded per tier.
+"""
+import os
+import json
+import time
+import logging
+from datetime import date
+from typing import Any, Dict, Optional
+
+from agents import Runner
+from models import Task
+from pm_agents import fast_path
+from pm_agents.task_draft_agent import TaskDraftAgent, TaskDraftLiteAgent, TaskDraftOutput
+from pm_agents.stream_progress import ProgressCallback, ProgressThrottle, partial_fields
+from services.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("rules", "lite", "full")
+PROGRESS_INTERVAL = float(os.getenv("SLACK_PROGRESS_INTERVAL", "1.0"))
+
+
+async def run_agent(agent, user_input: str, context, on_progress: Optional[ProgressCallback] = None):
+    """Runner.run, or the streamed runner feeding decoded fields to `on_progress` as they arrive."""
+    if on_progress is None:
+        return (await Runner.run(agent, user_input, context=context)).final_output
+
+    throttle = ProgressThrottle(on_progress, PROGRESS_INTERVAL)
+    result = Runner.run_streamed(agent, user_input, context=context)
+    buffer = ""
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and getattr(event.data, "type", "") == "response.output_text.delta":
+            buffer += event.data.delta
+            await throttle(partial_fields(buffer))
+    return result.final_output
+
+
+class DraftRouter:
+    def __init__(self):
+        self.decisions: Dict[str, int] = {t: 0 for t in TIERS}
+        self.escalations = 0
+        self._latency: Dict[str, Dict[str, float]] = {t: {"count": 0, "total_s": 0.0, "max_s": 0.0} for t in TIERS}
+
+    async def draft(self, user_input: str, context, on_progress: Optional[ProgressCallback] = None) -> TaskDraftOutput:
+        started = time.perf_counter()
+        rules = fast_path.extract(user_input, date.today())
+        if rules.is_complete:
+            draft = TaskDraftOutput(
+                status="success",
+                message=f"Drafted task '{rules.title}' for {rules.assignee}",
+                tasks=[Task(
+                    title=rules.title,
+                    description=rules.description,
+                    assignee=rules.assignee,
+                    due_date=rules.due_date,
+                    priority=rules.priority,
+                    source_channel=getattr(context, "channel", ""),
+                )],
+            )
+            self._time("rules", started)
+            self.decisions["rules"] += 1
+            logger.info(f"Draft routed to rules tier (confidence {rules.confidence:.2f})")
+            return draft
+        self._time("rules", started)
+
+        hints = rules.hints()
+        lite_input = user_input
+        if hints:
+            lite_input += f"\n\n[Pre-extracted fields, verify before use: {json.dumps(hints, ensure_ascii=False)}]"
+
+        started = time.perf_counter()
+        try:
+            draft: TaskDraftOutput = await run_agent(TaskDraftLiteAgent, lite_input, context, on_progress)
+        except Exception as e:
+            logger.warning(f"Lite tier failed ({e}); escalating to full model")
+            draft = None
+        self._time("lite", started)
+        if _usable(draft):
+            self.decisions["lite"] += 1
+            logger.info(f"Draft routed to lite tier ({draft.status})")
+            return draft
+        self.escalations += 1
+
+        started = time.perf_counter()
+        try:
+            draft = await run_agent(TaskDraftAgent, user_input, context, on_progress)
+        finally:
+            self._time("full", started)
+        self.decisions["full"] += 1
+        logger.info("Draft routed to full tier")
+        return draft
+
+    def stats(self) -> Dict[str, Any]:
+        latency = {
+            tier: {
+                "count": int(v["count"]),
+                "avg_s": round(v["total_s"] / v["count"], 4) if v["count"] else 0.0,
+                "max_s": round(v["max_s"], 4),
+            }
+            for tier, v in self._latency.items()
+        }
+        return {"decisions": dict(self.decisions), "escalations": self.escalations, "latency": latency}
+
+    def _time(self, tier: str, started: float) -> None:
+        """Latency of every attempt at `tier`, whether or not it produced the final draft."""
+        elapsed = time.perf_counter() - started
+        stats = self._latency[tier]
+        stats["count"] += 1
+        stats["total_s"] += elapsed
+        stats["max_s"] = max(stats["max_s"], elapsed)
+        STAGE_SECONDS.observe(elapsed, f"draft.{tier}")
+
+
+def _usable(draft) -> bool:
+    if not isinstance(draft, TaskDraftOutput):
+        return False
+    if draft.status == "success":
+        return bool(draft.tasks)
+    return bool(draft.message.strip())
+
+
+_router = None
+
+
+def get_draft_router() -> DraftRouter:
+    global _router
+    if _router is None:
+        _router = DraftRouter()
+    return _router
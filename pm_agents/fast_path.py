@@ -0,0 +1,165 @@
+# pm_agents/fast_path.py
+"""
+Rule-based pre-extractor for formulaic task DMs.
+
+"@ana fix login bug P1 by friday" has everything a Task needs, so there is
+no reason to pay for an LLM call. extract() pulls out the @handle, the
+priority (P0/P1/P2 or urgency words) and the due date (normalized to ISO),
+and uses what is left as the title. When it is not confident, the partial
+result is passed to the model as hints.
+"""
+import re
+from dataclasses import dataclass, asdict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+CONFIDENT = 0.9
+MAX_FAST_PATH_CHARS = 200
+
+_HANDLE_RE = re.compile(r"<@([A-Z0-9]+)(?:\|[^>]*)?>|(?<![\w.])@([\w][\w.\-]*[\w]|[\w])")
+_PRIORITY_RE = re.compile(r"\b(?:priority\s*:?\s*)?p([012])\b", re.IGNORECASE)
+
+URGENCY_WORDS: List[Tuple[str, str]] = [
+    (r"urgent(?:ly)?|asap|critical|blocker|immediately|hitno", "P0"),
+    (r"high[\s-]priority|important|soon|va[zž]no", "P1"),
+    (r"low[\s-]priority|whenever|nice[\s-]to[\s-]have|no rush", "P2"),
+]
+_URGENCY_RES = [(re.compile(rf"\b(?:{words})\b", re.IGNORECASE), prio) for words, prio in URGENCY_WORDS]
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = ["january", "february", "march", "april", "may", "june", "july",
+          "august", "september", "october", "november", "december"]
+_WEEKDAY_ALT = "|".join(w[:3] + f"(?:{w[3:]})?" for w in WEEKDAYS)
+_MONTH_ALT = "|".join(m[:3] + f"(?:{m[3:]})?" for m in MONTHS)
+
+_LEAD = r"(?:\b(?:due|by|on|until|before)\s+)?"
+_DATE_PATTERNS = [
+    ("iso", re.compile(_LEAD + r"\b(\d{4})-(\d{2})-(\d{2})\b", re.IGNORECASE)),
+    # 31.10. / 31.10.2026 / 31/10 / 31/10/2026 - a bare "1.2" is a version, not a date
+    ("dmy", re.compile(_LEAD + r"\b(\d{1,2})(?:\.(\d{1,2})\.(\d{4})?|/(\d{1,2})(?:/(\d{4}))?)(?!\d)", re.IGNORECASE)),
+    ("month_day", re.compile(_LEAD + rf"\b({_MONTH_ALT})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?\b", re.IGNORECASE)),
+    ("day_month", re.compile(_LEAD + rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+({_MONTH_ALT})\b", re.IGNORECASE)),
+    ("today", re.compile(_LEAD + r"\b(today|tonight|danas|eod|end of day)\b", re.IGNORECASE)),
+    ("tomorrow", re.compile(_LEAD + r"\b(tomorrow|tmrw|sutra)\b", re.IGNORECASE)),
+    ("in_days", re.compile(_LEAD + r"\bin\s+(\d{1,2})\s+days?\b", re.IGNORECASE)),
+    ("end_of_week", re.compile(_LEAD + r"\b(end of (?:the )?week|eow)\b", re.IGNORECASE)),
+    ("next_week", re.compile(_LEAD + r"\b(next week)\b", re.IGNORECASE)),
+    ("weekday", re.compile(_LEAD + rf"\b(next\s+)?({_WEEKDAY_ALT})\b", re.IGNORECASE)),
+]
+_FILLER_RE = re.compile(r"^(?:please|pls|can you|could you|task:?|todo:?)\s+|[\s,;:\-–]+$", re.IGNORECASE)
+
+
+@dataclass
+class FastPathDraft:
+    title: str = ""
+    description: str = ""
+    assignee: Optional[str] = None
+    priority: Optional[str] = None
+    due_date: Optional[str] = None
+    confidence: float = 0.0
+
+    @property
+    def is_complete(self) -> bool:
+        """Every required Task field is filled and the rules are confident."""
+        return bool(self.title and self.assignee and self.priority) and self.confidence >= CONFIDENT
+
+    def hints(self) -> Dict[str, Any]:
+        return {k: v for k, v in asdict(self).items() if v and k not in ("description", "confidence")}
+
+
+def _month(token: str) -> int:
+    return next(i for i, m in enumerate(MONTHS, 1) if token.lower().startswith(m[:3]))
+
+
+def _weekday(token: str) -> int:
+    return next(i for i, w in enumerate(WEEKDAYS) if token.lower().startswith(w[:3]))
+
+
+def _upcoming(today: date, month: int, day: int) -> date:
+    """The next occurrence of month/day, this year or next."""
+    d = date(today.year, month, day)
+    return d if d >= today else date(today.year + 1, month, day)
+
+
+def parse_due_date(text: str, today: date) -> Tuple[Optional[str], Optional[Tuple[int, int]]]:
+    """First recognised date expression as ISO, plus its (start, end) span in `text`."""
+    for kind, pattern in _DATE_PATTERNS:
+        m = pattern.search(text)
+        if not m:
+            continue
+        g = m.groups()
+        try:
+            if kind == "iso":
+                d = date(int(g[0]), int(g[1]), int(g[2]))
+            elif kind == "dmy":
+                day, month, year = int(g[0]), int(g[1] or g[3]), g[2] or g[4]
+                d = date(int(year), month, day) if year else _upcoming(today, month, day)
+            elif kind == "month_day":
+                d = _upcoming(today, _month(g[0]), int(g[1]))
+            elif kind == "day_month":
+                d = _upcoming(today, _month(g[1]), int(g[0]))
+            elif kind == "today":
+                d = today
+            elif kind == "tomorrow":
+                d = today + timedelta(days=1)
+            elif kind == "in_days":
+                d = today + timedelta(days=int(g[0]))
+            elif kind == "end_of_week":
+                d = today + timedelta(days=(4 - today.weekday()) % 7)
+            elif kind == "next_week":
+                d = today + timedelta(days=7 - today.weekday())
+            else:  # weekday: the coming one; "next friday" skips a week only if it is this week's
+                ahead = (_weekday(g[1]) - today.weekday()) % 7 or 7
+                if g[0] and ahead < 7 - today.weekday():
+                    ahead += 7
+                d = today + timedelta(days=ahead)
+        except ValueError:
+            continue  # e.g. 31.02.
+        return d.isoformat(), m.span()
+    return None, None
+
+
+def extract(text: str, today: Optional[date] = None) -> FastPathDraft:
+    today = today or date.today()
+    raw = (text or "").strip()
+    draft = FastPathDraft(description=raw)
+    if not raw:
+        return draft
+    remaining = raw
+
+    handles = [f"<@{m.group(1)}>" if m.group(1) else f"@{m.group(2)}" for m in _HANDLE_RE.finditer(raw)]
+    if len(set(handles)) == 1:
+        draft.assignee = handles[0]
+    remaining = _HANDLE_RE.sub(" ", remaining)
+
+    explicit = _PRIORITY_RE.search(remaining)
+    if explicit:
+        draft.priority = f"P{explicit.group(1)}"
+        remaining = _PRIORITY_RE.sub(" ", remaining)
+    else:
+        for pattern, prio in _URGENCY_RES:
+            if pattern.search(remaining):
+                draft.priority = prio
+                remaining = pattern.sub(" ", remaining)
+                break
+
+    draft.due_date, span = parse_due_date(remaining, today)
+    if span:
+        remaining = remaining[:span[0]] + " " + remaining[span[1]:]
+
+    title = re.sub(r"\s+", " ", remaining).strip()
+    title = _FILLER_RE.sub("", title).strip()
+    draft.title = title[:1].upper() + title[1:]
+
+    # Confidence: only short one-liners with exactly one handle, a priority signal and a real title
+    confidence = 1.0
+    if "\n" in raw or len(raw) > MAX_FAST_PATH_CHARS:
+        confidence -= 0.5
+    if len(set(handles)) != 1:
+        confidence -= 0.5
+    if not draft.priority:
+        confidence -= 0.3
+    if len(draft.title.split()) < 2:
+        confidence -= 0.3
+    draft.confidence = max(0.0, confidence)
+    return draft
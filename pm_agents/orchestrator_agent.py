@@ -1,96 +1,292 @@
-from agents import Agent, Runner
-from pm_agents.task_draft_agent import TaskDraftAgent, TaskDraftOutput, Task
+from agents import Agent
+from pm_agents.task_draft_agent import TaskDraftOutput, Task, TASK_DRAFT_PROMPT_VERSION
+from pm_agents.draft_router import get_draft_router
+from pm_agents.stream_progress import ProgressCallback
 from tools.freedcamp_api import create_freedcamp_task # Correct non-src path
 from models import FreedcampInfo
 from pydantic import BaseModel
-from typing import Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
+import os
+import re
+import uuid
+import asyncio
 import logging
-from pm_agents.user_map import SLACK_TO_FC # Correct non-src path
+from datetime import date
+from services.directory import get_directory
+from services.draft_cache import get_draft_cache, cache_key
+from services.duplicate_index import get_duplicate_service
+from services.metrics import span
+from services.outbox import IN_FLIGHT, PENDING, OutboxDispatcher, OutboxEntry, get_outbox
+from tools.slack_sender import get_slack_sender
 
 logger = logging.getLogger(__name__)
 
+BULK_CONCURRENCY = int(os.getenv("FREEDCAMP_BULK_CONCURRENCY", "4"))
+FORCE_NEW_RE = re.compile(r"(?<!\S)--new(?!\S)")  # "--new" in a DM skips the duplicate check
+
+class ExistingTask(BaseModel):
+    task_id: str
+    title: str
+    url: Optional[str] = None
+    score: float
+
+class TaskResult(BaseModel):
+    task: Task
+    assignee_fc_id: int = 0
+    freedcamp_info: FreedcampInfo
+    queued: bool = False  # not created yet; the outbox dispatcher keeps retrying
+    duplicate_of: Optional[ExistingTask] = None  # not created; an open task already covers it
+
 class OrchestratorResponse(BaseModel):
-    status: Literal["success", "error"]
+    status: Literal["success", "partial", "error"]
     message: str
-    task: Optional[Task] = None
-    freedcamp_info: Optional[FreedcampInfo] = None
+    results: List[TaskResult] = []
 
 class OrchestratorAgent(Agent):
     def __init__(self):
         super().__init__(
             name="OrchestratorAgent",
-            instructions="Drafts a task from user input, creates it in Freedcamp, and returns the full task object with detailed information.",
+            instructions="Drafts tasks from user input, creates them in Freedcamp, and returns the per-task outcome.",
             tools=[], # Changed: create_freedcamp_task removed as per Prompt2.md
             output_type=OrchestratorResponse
         )
 
-    async def run(self, user_input: str, context) -> OrchestratorResponse:
+    async def run(self, user_input: str, context, on_progress: Optional[ProgressCallback] = None) -> OrchestratorResponse:
+        """Draft and create tasks; `on_progress` receives partial draft fields while the model streams."""
         logger.info("OrchestratorAgent.run invoked")
-        td_run_result = await Runner.run(TaskDraftAgent, user_input, context=context)
-        draft: TaskDraftOutput = td_run_result.final_output
+        # A redelivered message whose tasks are already in the outbox is answered from there, never redrafted
+        event_id = getattr(context, "event_id", "")
+        if event_id:
+            entries = await asyncio.to_thread(get_outbox().for_source, event_id)
+            if entries:
+                logger.info(f"Message {event_id} already recorded in the outbox, skipping the draft")
+                return self._replay(entries)
+        source_key = event_id or uuid.uuid4().hex
+        check_duplicates = not FORCE_NEW_RE.search(user_input)
+        if not check_duplicates:
+            user_input = FORCE_NEW_RE.sub("", user_input).strip()
 
-        logger.info(f"TaskDraftAgent output: status='{draft.status}', message='{draft.message}', task_present={draft.task is not None}")
+        draft = await self._draft(user_input, context, on_progress)
+
+        logger.info(f"TaskDraftAgent output: status='{draft.status}', message='{draft.message}', tasks={len(draft.tasks)}")
 
         if draft.status == "error":
             logger.info("TaskDraftAgent returned error, forwarding as OrchestratorResponse.")
-            return OrchestratorResponse(status="error", message=draft.message, task=None)
+            return OrchestratorResponse(status="error", message=draft.message)
 
-        task_details: Task = draft.task
-        if not task_details:
+        if not draft.tasks:
             logger.error("TaskDraftAgent status was success, but no task details provided.")
-            return OrchestratorResponse(status="error", message="Task drafting succeeded but task details were missing.", task=None)
+            return OrchestratorResponse(status="error", message="Task drafting succeeded but task details were missing.")
+
+        if on_progress is not None:
+            first = draft.tasks[0]
+            await on_progress({
+                "title": first.title, "assignee": first.assignee, "priority": first.priority,
+                "tasks_seen": len(draft.tasks), "stage": "creating",
+            })
+
+        # One LLM call produced every task; fan the Freedcamp POSTs out with bounded concurrency
+        semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+        channel = getattr(context, "channel", None)
+        results = await asyncio.gather(*(
+            self._create_task(t, i, source_key, channel, semaphore, check_duplicates)
+            for i, t in enumerate(draft.tasks)
+        ))
+        return self._response(results, draft.message)
+
+    async def _draft(self, user_input: str, context, on_progress: Optional[ProgressCallback] = None) -> TaskDraftOutput:
+        """Drafted tasks, served from the draft cache when the same message was drafted before."""
+        cache = get_draft_cache()
+        key = cache_key(
+            user_input,
+            getattr(context, "channel", ""),
+            getattr(context, "user", ""),
+            TASK_DRAFT_PROMPT_VERSION,
+            date.today().isoformat(),  # relative due dates ("tomorrow") depend on the day
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info("TaskDraftAgent result served from draft cache")
+            return TaskDraftOutput.model_validate_json(cached)
+
+        # rules -> lite model -> full model
+        draft = await get_draft_router().draft(user_input, context, on_progress)
+        if draft.status == "success":
+            cache.put(key, draft.model_dump_json())
+        return draft
 
-        assignee_fc_id = SLACK_TO_FC.get(task_details.assignee.lower(), 0) if task_details.assignee else 0
+    async def _create_task(self, task_details: Task, index: int, source_key: str, channel: Optional[str],
+                           semaphore: asyncio.Semaphore, check_duplicates: bool = True) -> TaskResult:
+        """Record one drafted task in the outbox, then try to create it in Freedcamp; failures are captured, never raised."""
+        # In-memory directory lookup (Slack id/handle/email/name -> Freedcamp id); never hits the network
+        with span("directory.resolve"):
+            assignee_fc_id = get_directory().resolve(task_details.assignee)
         logger.info(f"Mapped Slack assignee '{task_details.assignee}' to Freedcamp ID: {assignee_fc_id}")
 
+        duplicate = self._find_duplicate(task_details) if check_duplicates else None
+        if duplicate is not None:
+            logger.info(f"'{task_details.title}' looks like existing task {duplicate.task_id} (score {duplicate.score})")
+            return TaskResult(task=task_details, assignee_fc_id=assignee_fc_id, duplicate_of=duplicate,
+                              freedcamp_info=FreedcampInfo(success=False, error="Similar task already exists"))
+
         try:
-            logger.info(f"Creating task in Freedcamp: {task_details.title}")
-            fc_result = create_freedcamp_task( # Direct call
-                title=task_details.title,
-                description=task_details.description,
-                assignee_id=assignee_fc_id,
-                priority=task_details.priority,
-                due_date=task_details.due_date
+            # Durable before the POST: a timeout, 5xx or restart leaves it to the background dispatcher
+            entry = await asyncio.to_thread(
+                get_outbox().add,
+                idempotency_key=f"{source_key}:{index}",
+                source_key=source_key,
+                payload={
+                    "task": task_details.model_dump(),
+                    "fc": {
+                        "title": task_details.title,
+                        "description": task_details.description,
+                        "assignee_id": assignee_fc_id,
+                        "priority": task_details.priority,
+                        "due_date": task_details.due_date,
+                    },
+                },
+                notify_channel=channel,
             )
-           
-            logger.info(f"Freedcamp API direct call response: {fc_result}")
-            
-            url_from_dict = fc_result.get("task_url")
-            logger.info(f"[DEBUG Orchestrator] Task URL from fc_result dict: {url_from_dict}")
-
-            if fc_result.get("success"):
-                freedcamp_info = FreedcampInfo(**fc_result)
-            else:
-                freedcamp_info = FreedcampInfo(
-                    success=False,
-                    error=fc_result.get("error", "Unknown error from Freedcamp API call"),
-                    task_id=None, task_url=None, response=fc_result.get("response")
-                )
-
-            if freedcamp_info.success and freedcamp_info.task_id:
-                success_message = (
-                    f"Task created successfully in Freedcamp (ID: {freedcamp_info.task_id}):\n\n"
-                    f"*Title:* {task_details.title}\n"
-                    f"*Description:* {task_details.description}\n"
-                    f"*Assignee:* {task_details.assignee} (Freedcamp ID: {assignee_fc_id})\n"
-                    f"*Priority:* {task_details.priority}\n"
-                    f"*Due Date:* {task_details.due_date or 'Not specified'}\n\n"
-                    f"*Freedcamp Link:* {freedcamp_info.task_url}"
-                )
-                return OrchestratorResponse(
-                    status="success", message=success_message,
-                    task=task_details, freedcamp_info=freedcamp_info
-                )
-            else:
-                error_message = freedcamp_info.error or fc_result.get("error", "Unknown error creating task in Freedcamp")
-                logger.error(f"Freedcamp task creation failed: {error_message}. API Response: {fc_result}")
-                return OrchestratorResponse(
-                    status="error", message=f"Task drafted but failed to create in Freedcamp: {error_message}",
-                    task=task_details, freedcamp_info=freedcamp_info
-                )
+            async with semaphore:
+                logger.info(f"Creating task in Freedcamp: {task_details.title}")
+                fc_result = await get_outbox_dispatcher().deliver_now(entry)
+
+            if fc_result is None:
+                return TaskResult(task=task_details, assignee_fc_id=assignee_fc_id, queued=True,
+                                  freedcamp_info=FreedcampInfo(success=False, error="Delivery already in progress"))
+            logger.info(f"Freedcamp create for '{task_details.title}': success={fc_result.get('success')} "
+                        f"task_id={fc_result.get('task_id')} queued={fc_result.get('queued', False)}")
+            return _task_result(task_details, assignee_fc_id, fc_result, queued=fc_result.get("queued", False))
         except Exception as e:
             logger.error(f"Exception during Freedcamp task creation process: {str(e)}", exc_info=True)
-            return OrchestratorResponse(
-                status="error", message=f"Internal error processing Freedcamp task creation: {str(e)}",
-                task=task_details
-            ) 
\ No newline at end of file
+            freedcamp_info = FreedcampInfo(success=False, error=f"Internal error processing Freedcamp task creation: {str(e)}")
+            return TaskResult(task=task_details, assignee_fc_id=assignee_fc_id, freedcamp_info=freedcamp_info)
+
+    def _find_duplicate(self, task_details: Task) -> Optional[ExistingTask]:
+        """Best open Freedcamp task similar to the draft; the index is local, so this never hits the network."""
+        try:
+            with span("duplicates.query"):
+                matches = get_duplicate_service().index.query(task_details.title, task_details.description, limit=1)
+        except Exception as e:
+            logger.warning(f"Duplicate check skipped: {e}")
+            return None
+        if not matches:
+            return None
+        m = matches[0]
+        return ExistingTask(task_id=m.task_id, title=m.title, url=m.url, score=m.score)
+
+    def _replay(self, entries: List[OutboxEntry]) -> OrchestratorResponse:
+        """Outcome of a message whose tasks are already in the outbox (e.g. a Slack retry after a restart)."""
+        results = [
+            _task_result(
+                Task(**entry.payload["task"]),
+                entry.payload["fc"]["assignee_id"],
+                entry.result or {"success": False, "error": entry.last_error or "Waiting for delivery"},
+                queued=entry.status in (PENDING, IN_FLIGHT),
+            )
+            for entry in entries
+        ]
+        return self._response(results, "Already received this message.")
+
+    def _response(self, results: List[TaskResult], note: str = "") -> OrchestratorResponse:
+        created = sum(1 for r in results if r.freedcamp_info.success)
+        queued = sum(1 for r in results if r.queued)
+        duplicates = sum(1 for r in results if r.duplicate_of is not None)
+        if created == len(results):
+            status = "success"
+        elif created or queued or duplicates:
+            status = "partial"
+        else:
+            status = "error"
+        message = f"Created {created} of {len(results)} task(s) in Freedcamp."
+        if queued:
+            message += f" {queued} queued for automatic retry; I'll message you once they are created."
+        if duplicates:
+            message += (f" {duplicates} skipped because a similar open task exists;"
+                        " send the request again with `--new` to create it anyway.")
+        if note:
+            message += f" {note}"
+        return OrchestratorResponse(status=status, message=message, results=results)
+
+
+def _task_result(task: Task, assignee_fc_id: int, fc_result: Dict[str, Any], queued: bool = False) -> TaskResult:
+    if fc_result.get("success") and fc_result.get("task_id"):
+        freedcamp_info = FreedcampInfo(**fc_result)
+    else:
+        error_message = fc_result.get("error", "Unknown error creating task in Freedcamp")
+        logger.error(f"Freedcamp task creation failed: {error_message} (status {fc_result.get('status_code', 'n/a')})")
+        freedcamp_info = FreedcampInfo(success=False, error=error_message)
+    return TaskResult(task=task, assignee_fc_id=assignee_fc_id, freedcamp_info=freedcamp_info, queued=queued)
+
+
+def _index_created(task: Task, fc_result: Dict[str, Any]) -> None:
+    """Make a task created here visible to the duplicate check before the next sync picks it up."""
+    try:
+        get_duplicate_service().index.upsert(
+            str(fc_result["task_id"]), task.title, task.description, url=fc_result.get("task_url"),
+        )
+    except Exception as e:
+        logger.warning(f"Could not add task {fc_result.get('task_id')} to the duplicate index: {e}")
+
+
+async def _deliver(payload: Dict[str, Any]) -> Dict[str, Any]:
+    result = await create_freedcamp_task(**payload["fc"])
+    if result.get("success") and result.get("task_id"):
+        await asyncio.to_thread(_index_created, Task(**payload["task"]), result)
+    return result
+
+
+async def _find_delivered(entry: OutboxEntry) -> Optional[Dict[str, Any]]:
+    """The Freedcamp task an earlier, unanswered POST of `entry` created, or None if there is none."""
+    from FreedcampTaskFetcher import FreedcampTaskFetcher
+    fc = entry.payload["fc"]
+    # A task created by that POST was updated last, so it is among the first tasks listed.
+    # The minutes of slack absorb clock skew between this host and Freedcamp.
+    for t in await FreedcampTaskFetcher().list_tasks(limit=50):
+        if (t.get("title") == fc["title"] and str(t.get("assigned_to_id")) == str(fc["assignee_id"])
+                and int(t.get("created_ts") or 0) >= entry.created_at - 300):
+            url = t.get("url")
+            if url and url.startswith("/"):
+                url = f"https://freedcamp.com{url}"
+            result = {"success": True, "task_id": t["id"], "task_url": url, "response": t}
+            await asyncio.to_thread(_index_created, Task(**entry.payload["task"]), result)
+            return result
+    return None
+
+
+async def _notify_delivered(entry: OutboxEntry, result: Dict[str, Any]) -> None:
+    """Tell the requester that a task queued by an earlier failure has now been created."""
+    if entry.notify_channel:
+        await get_slack_sender().post(
+            entry.notify_channel,
+            f":white_check_mark: Freedcamp is reachable again - *{entry.payload['fc']['title']}* "
+            f"was created: <{result.get('task_url')}|Open in Freedcamp>",
+        )
+
+
+_orchestrator: Optional[OrchestratorAgent] = None
+_dispatcher: Optional[OutboxDispatcher] = None
+
+
+def get_outbox_dispatcher() -> OutboxDispatcher:
+    """Shared dispatcher for the Freedcamp outbox (OUTBOX_BASE_DELAY / OUTBOX_MAX_DELAY / OUTBOX_MAX_ATTEMPTS)."""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = OutboxDispatcher(
+            get_outbox(),
+            deliver=_deliver,
+            notify=_notify_delivered,
+            find_existing=_find_delivered,
+            base_delay=float(os.getenv("OUTBOX_BASE_DELAY", "2")),
+            max_delay=float(os.getenv("OUTBOX_MAX_DELAY", "300")),
+            max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8")),
+        )
+    return _dispatcher
+
+
+def get_orchestrator() -> OrchestratorAgent:
+    """Shared orchestrator; the agent graph and its schemas are built once per process."""
+    global _orchestrator
+    if _orchestrator is None:
+        _orchestrator = OrchestratorAgent()
+    return _orchestrator
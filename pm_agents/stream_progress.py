@@ -0,0 +1,58 @@
+# pm_agents/stream_progress.py
+"""
+Helpers for surfacing a streamed TaskDraftOutput while it is still being decoded.
+"""
+import re
+import time
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Only fully closed string values; a half-streamed title is not shown
+_FIELD_RES = {
+    name: re.compile(rf'"{name}"\s*:\s*"((?:[^"\\]|\\.)*)"')
+    for name in ("title", "assignee", "priority", "due_date")
+}
+_TASK_START_RE = re.compile(r'"title"\s*:')
+
+
+def partial_fields(buffer: str) -> Dict[str, Any]:
+    """Fields of the first task decoded so far from partial JSON, plus how many tasks have started."""
+    fields: Dict[str, Any] = {}
+    for name, pattern in _FIELD_RES.items():
+        m = pattern.search(buffer)
+        if m:
+            try:
+                fields[name] = json.loads(f'"{m.group(1)}"')
+            except ValueError:
+                fields[name] = m.group(1)
+    count = len(_TASK_START_RE.findall(buffer))
+    if count:
+        fields["tasks_seen"] = count
+    return fields
+
+
+class ProgressThrottle:
+    """Forward changed progress to `callback` at most once per `min_interval` seconds."""
+
+    def __init__(self, callback: ProgressCallback, min_interval: float = 1.0):
+        self.callback = callback
+        self.min_interval = min_interval
+        self._last_sent: Optional[Dict[str, Any]] = None
+        self._last_at = 0.0
+
+    async def __call__(self, fields: Dict[str, Any], force: bool = False) -> None:
+        if not fields or fields == self._last_sent:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_at < self.min_interval:
+            return
+        self._last_sent, self._last_at = dict(fields), now
+        try:
+            await self.callback(fields)
+        except Exception as e:  # progress is best effort; never fail the run for it
+            logger.warning(f"Progress callback failed: {e}")
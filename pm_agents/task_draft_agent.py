@@ -1,23 +1,26 @@
-from agents import Agent, Runner
+import os
+import hashlib
+from agents import Agent, AgentOutputSchema
 from models import Task
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from typing import List, Literal
 
 class TaskDraftOutput(BaseModel):
     status: Literal["success", "error"] = Field(description="Status of the task creation")
     message: str = Field(description="Human-readable message about what happened")
-    task: Optional[Task] = Field(default=None, description="The created task (only present on success)")
+    tasks: List[Task] = Field(default_factory=list, description="Every task extracted from the message (empty on error)")
 
 TASK_DRAFT_PROMPT = """
 You are an expert project manager that creates structured tasks from Slack messages.
 You can handle input in any language and extract the relevant task information.
 
 When a user sends a message, your job is to:
-1. Extract the key task information
-2. Create a Task object with that information
-3. Return a TaskDraftOutput with the task
+1. Find every action item in it - a meeting summary usually contains several
+2. Create one Task object per action item
+3. Return a single TaskDraftOutput with all of the tasks
 
-If the message doesn't contain enough information, respond with an error explaining what's missing.
+If the message doesn't contain enough information for any task, respond with an error explaining what's missing.
+Skip individual action items that lack an assignee and mention them in the message instead.
 
 You have access to the Slack context with:
 - context.channel: The Slack channel ID where the message was sent
@@ -26,7 +29,7 @@ You have access to the Slack context with:
 Your response MUST be a TaskDraftOutput object with:
 - status: "success" or "error"
 - message: A clear description of what happened
-- task: Task object (only included for success cases)
+- tasks: list of Task objects (empty for error cases)
 
 Required fields for Task:
 - title: A clear, concise task title (extract main topic)
@@ -48,34 +51,59 @@ For complex inputs:
 Example success response:
 {
     "status": "success",
-    "message": "Created task 'Implement API Integration' assigned to @petar",
-    "task": {
-        "title": "Implement API Integration",
-        "description": "Connect to external API to fetch articles and integrate into mobile app. Discuss design requirements with stakeholders.",
-        "assignee": "@petar",
-        "priority": "P1",
-        "due_date": "2024-05-16",
-        "source_channel": "C0123456789"
-    }
+    "message": "Drafted 2 tasks from the meeting summary",
+    "tasks": [
+        {
+            "title": "Implement API Integration",
+            "description": "Connect to external API to fetch articles and integrate into mobile app. Discuss design requirements with stakeholders.",
+            "assignee": "@petar",
+            "priority": "P1",
+            "due_date": "2024-05-16",
+            "source_channel": "C0123456789"
+        },
+        {
+            "title": "Update onboarding copy",
+            "description": "Rewrite the onboarding screens with the wording agreed in the meeting.",
+            "assignee": "@ana",
+            "priority": "P2",
+            "due_date": null,
+            "source_channel": "C0123456789"
+        }
+    ]
 }
 
 Example error response:
 {
     "status": "error",
     "message": "Failed to create task: missing required information - please provide an assignee",
-    "task": null
+    "tasks": []
 }
 
 Remember:
 1. You can handle ANY language input
 2. Extract information even from complex, unstructured text
-3. Always create clear, actionable tasks
+3. Always create clear, actionable tasks - one per action item, never merged
 4. Use @ for assignee handles
 5. Convert dates to YYYY-MM-DD format
 """
 
+# Part of the draft cache key: editing the prompt invalidates cached drafts
+TASK_DRAFT_PROMPT_VERSION = hashlib.sha256(TASK_DRAFT_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+# Built once at import; passing a plain type would make the Runner rebuild the schema on every run
+TASK_DRAFT_OUTPUT_SCHEMA = AgentOutputSchema(TaskDraftOutput)
+
 TaskDraftAgent = Agent(
     name="TaskDraftAgent",
     instructions=TASK_DRAFT_PROMPT,
-    output_type=TaskDraftOutput
+    output_type=TASK_DRAFT_OUTPUT_SCHEMA,
+    model=os.getenv("TASK_DRAFT_MODEL") or None,
+)
+
+# Cheaper tier tried first when the rule-based fast path could not fill every field
+TaskDraftLiteAgent = Agent(
+    name="TaskDraftLiteAgent",
+    instructions=TASK_DRAFT_PROMPT,
+    output_type=TASK_DRAFT_OUTPUT_SCHEMA,
+    model=os.getenv("TASK_DRAFT_LITE_MODEL", "gpt-4.1-mini"),
 ) 
\ No newline at end of file
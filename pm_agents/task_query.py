@@ -0,0 +1,56 @@
+# pm_agents/task_query.py
+"""
+Recognizes "what is on my plate" DMs, which are answered from the local task store.
+
+The match is deliberately strict: the whole message has to be a question
+about the sender's own tasks, optionally narrowed by a due window ("my
+tasks", "what's assigned to me", "my open tasks due this week", "my
+overdue tasks"). Anything else, such as "my tasks: fix the login bug
+@sam", is not matched and goes to drafting as usual.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+
+_SUBJECT = (r"(?:(?:what(?:'s| is| are)|show(?: me)?|list|get|give me)\s+)?"
+            r"(?:(?:all\s+)?my\s+(?:(?:open|current|pending|remaining)\s+)?(?:tasks|todos|to-dos|work)"
+            r"|what(?:'s| is)\s+(?:assigned to|on)\s+me|(?:tasks|what's)\s+assigned to me)")
+_WINDOW = r"(?:\s+(?:(?:that are\s+)?due\s+|for\s+)?(?P<window>today|tomorrow|this week|next week|overdue))?"
+_QUERY_RE = re.compile(rf"^\s*(?:{_SUBJECT}){_WINDOW}\s*[?.!]*\s*$", re.IGNORECASE)
+_MY_OVERDUE_RE = re.compile(r"^\s*(?:show\s+)?my\s+overdue\s+(?:tasks|todos)\s*[?.!]*\s*$", re.IGNORECASE)
+
+
+@dataclass
+class TaskQuery:
+    label: str  # "open", "due today", ...
+    due_from: Optional[str] = None
+    due_to: Optional[str] = None
+
+
+def parse_query(text: str, today: date) -> Optional[TaskQuery]:
+    """TaskQuery for a "my tasks ..." DM, None for anything else."""
+    text = (text or "").strip()
+    if len(text) > 80:
+        return None
+    if _MY_OVERDUE_RE.match(text):
+        window = "overdue"
+    else:
+        m = _QUERY_RE.match(text)
+        if not m:
+            return None
+        window = (m.group("window") or "").lower()
+    if window == "today":
+        return TaskQuery("due today", today.isoformat(), today.isoformat())
+    if window == "tomorrow":
+        d = today + timedelta(days=1)
+        return TaskQuery("due tomorrow", d.isoformat(), d.isoformat())
+    if window == "this week":
+        end = today + timedelta(days=6 - today.weekday())
+        return TaskQuery("due this week", today.isoformat(), end.isoformat())
+    if window == "next week":
+        start = today + timedelta(days=7 - today.weekday())
+        return TaskQuery("due next week", start.isoformat(), (start + timedelta(days=6)).isoformat())
+    if window == "overdue":
+        return TaskQuery("overdue", None, (today - timedelta(days=1)).isoformat())
+    return TaskQuery("open")
@@ -0,0 +1,63 @@
+"""
+Production entry point: several uvicorn worker processes behind one socket.
+
+  python serve.py [--workers N] [--host 0.0.0.0] [--port 8080]
+
+main.py stays the single-process dev server (reload=True). In this mode:
+
+- WEB_CONCURRENCY workers (default: CPU count) share the listening socket,
+  and uvicorn restarts a worker that dies.
+- uvloop/httptools are used when installed (loop/http "auto"), and the
+  per-request access log is off.
+- On SIGTERM, open connections get up to SHUTDOWN_GRACE_SECONDS to finish.
+  Then each worker's shutdown hook drains its job queue for up to
+  SHUTDOWN_DRAIN_SECONDS, so DMs already acked to Slack are still answered.
+- Dedup keys, the directory refresh lock and the Slack send slots go through
+  services/state.py. STATE_BACKEND=memory is refused when there is more
+  than one worker.
+- Each worker writes its own logs/xizor-<pid>.jsonl (services/logging_setup.py).
+"""
+import os
+import argparse
+import logging
+
+import uvicorn
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8080")))
+    parser.add_argument("--log-level", default=os.getenv("UVICORN_LOG_LEVEL", "info"))
+    args = parser.parse_args()
+
+    if args.workers > 1 and os.getenv("STATE_BACKEND", "sqlite").lower() == "memory":
+        parser.error("STATE_BACKEND=memory is per process; use sqlite or redis with more than one worker")
+    if args.workers > 1:
+        # Rotating file handlers are per process; one file each keeps rotation race-free
+        os.environ.setdefault("LOG_FILE", "logs/xizor-{pid}.jsonl")
+
+    uvicorn.run(
+        "slack_events:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="auto",
+        http="auto",
+        access_log=False,
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        backlog=int(os.getenv("UVICORN_BACKLOG", "2048")),
+        timeout_keep_alive=int(os.getenv("UVICORN_KEEPALIVE_SECONDS", "75")),  # above typical LB idle timeouts
+        timeout_graceful_shutdown=int(os.getenv("SHUTDOWN_GRACE_SECONDS", "10")),
+        log_level=args.log_level,
+    )
+
+
+if __name__ == "__main__":
+    main()
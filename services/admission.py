@@ -0,0 +1,120 @@
+# services/admission.py
+"""
+Admission control in front of orchestration.
+
+Every DM burst is checked here before it goes on the job queue. Work over
+budget is turned away with a short "busy, try again" reply instead of
+waiting in an unbounded backlog. The checks run in order, cheapest first:
+
+  queue_depth   jobs waiting >= max_depth
+  outstanding   waiting + running >= max_outstanding
+  latency       p95 of end-to-end request time (receipt to final reply) over
+                the last `window` seconds is above `slo`. Bulk work is shed
+                then. Interactive work is shed only when it would also have
+                to wait for a worker.
+
+Samples age out of the window, so a recovery shows up in the p95 without
+any traffic needing to get through first. The busy reply costs one
+chat.postMessage and is sent at most once per `notice_interval` per user.
+"""
+import os
+import math
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from services.dedup import TTLCache
+from services.scheduler import BULK
+
+ADMIT = "admit"
+SHED = "shed"
+
+BUSY_MESSAGE = (":hourglass_flowing_sand: I'm overloaded right now and didn't queue that. "
+                "Please send it again in a minute.")
+
+
+@dataclass
+class Admission:
+    action: str
+    reason: str = ""
+    notify: bool = False  # send the busy reply (rate limited per user)
+
+
+class AdmissionController:
+    def __init__(self, max_depth: int = 100, max_outstanding: int = 200, slo: float = 30.0, window: float = 60.0,
+                 min_samples: int = 20, max_samples: int = 1000, notice_interval: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_depth = max_depth
+        self.max_outstanding = max_outstanding
+        self.slo = slo
+        self.window = window
+        self.min_samples = min_samples
+        self.clock = clock
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=max_samples)  # (finished_at, seconds)
+        self._noticed = TTLCache(maxsize=10_000, ttl=notice_interval)
+        self.counts: Counter = Counter()
+
+    # ------------------------------------------------------------------ public
+    def check(self, queue_stats: Dict[str, Any], lane: str, user: str = "") -> Admission:
+        """Decide for one request given the job queue's stats()."""
+        depth = queue_stats.get("depth", 0)
+        outstanding = depth + queue_stats.get("in_flight", 0)
+        reason = ""
+        if self.max_depth and depth >= self.max_depth:
+            reason = "queue_depth"
+        elif self.max_outstanding and outstanding >= self.max_outstanding:
+            reason = "outstanding"
+        elif self.slo and (lane == BULK or outstanding >= queue_stats.get("workers", 1)):
+            p95 = self.p95()
+            if p95 is not None and p95 > self.slo:
+                reason = "latency"
+        if not reason:
+            self.counts[ADMIT] += 1
+            return Admission(ADMIT)
+        self.counts[f"{SHED}:{reason}"] += 1
+        return Admission(SHED, reason, notify=self.should_notify(user))
+
+    def should_notify(self, user: str) -> bool:
+        """True at most once per notice interval per user."""
+        return self._noticed.add_if_absent(user or "-", self.clock())
+
+    def record(self, seconds: float) -> None:
+        """End-to-end time of one finished request."""
+        self._samples.append((self.clock(), seconds))
+
+    def p95(self) -> Optional[float]:
+        """p95 over the window, or None with too few samples to judge."""
+        cutoff = self.clock() - self.window
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        if len(self._samples) < max(1, self.min_samples):
+            return None
+        ordered = sorted(s for _, s in self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        return {
+            "slo_s": self.slo,
+            "p95_s": round(p95, 3) if p95 is not None else None,
+            "samples": len(self._samples),
+            **dict(self.counts),
+        }
+
+
+_admission: Optional[AdmissionController] = None
+
+
+def get_admission() -> AdmissionController:
+    """ADMISSION_MAX_DEPTH / ADMISSION_MAX_OUTSTANDING / ADMISSION_P95_SLO_SECONDS / ADMISSION_WINDOW_SECONDS (0 disables a check)."""
+    global _admission
+    if _admission is None:
+        _admission = AdmissionController(
+            max_depth=int(os.getenv("ADMISSION_MAX_DEPTH", "100")),
+            max_outstanding=int(os.getenv("ADMISSION_MAX_OUTSTANDING", "200")),
+            slo=float(os.getenv("ADMISSION_P95_SLO_SECONDS", "30")),
+            window=float(os.getenv("ADMISSION_WINDOW_SECONDS", "60")),
+            min_samples=int(os.getenv("ADMISSION_MIN_SAMPLES", "20")),
+        )
+    return _admission
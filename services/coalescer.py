@@ -0,0 +1,103 @@
+# services/coalescer.py
+"""
+Debounce window that joins a burst of DMs into one request.
+
+People often type a task as several quick one-line messages. Each message
+for a (channel, user) key restarts a short timer. When no new message has
+arrived for `window` seconds, the buffered messages are flushed together.
+`max_wait` caps the delay measured from the first message, so a long
+stream of messages still starts drafting on time. At most `max_items`
+messages are joined. A window of 0 disables coalescing.
+
+Bursts are buffered per process. With several serve.py workers, lines of
+one burst that reach different workers are still drafted separately.
+"""
+import os
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Burst:
+    first_at: float
+    items: List[Any] = field(default_factory=list)
+    handle: Optional[asyncio.TimerHandle] = None
+
+
+class Coalescer:
+    def __init__(self, flush: Callable[[str, List[Any]], None], window: float = 1.5, max_wait: float = 5.0,
+                 max_items: int = 20):
+        self.flush = flush
+        self.window = window
+        self.max_wait = max(max_wait, window)
+        self.max_items = max(1, max_items)
+        self._bursts: Dict[str, _Burst] = {}
+        self.messages = 0
+        self.flushes = 0
+        self.merged = 0  # messages joined onto an earlier one instead of drafted alone
+
+    # ------------------------------------------------------------------ public
+    def add(self, key: str, item: Any) -> None:
+        """Buffer `item` under `key`; `flush(key, items)` runs on the event loop once the burst is over."""
+        self.messages += 1
+        if self.window <= 0:
+            self._emit(key, [item])
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        burst = self._bursts.get(key)
+        if burst is None:
+            burst = self._bursts[key] = _Burst(first_at=now)
+        burst.items.append(item)
+        if burst.handle is not None:
+            burst.handle.cancel()
+        delay = min(self.window, burst.first_at + self.max_wait - now)
+        if delay <= 0 or len(burst.items) >= self.max_items:
+            self._flush(key)
+        else:
+            burst.handle = loop.call_later(delay, self._flush, key)
+
+    def flush_all(self) -> None:
+        """Flush every pending burst now (shutdown)."""
+        for key in list(self._bursts):
+            self._flush(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_s": self.window,
+            "pending_bursts": len(self._bursts),
+            "messages": self.messages,
+            "flushes": self.flushes,
+            "merged": self.merged,
+        }
+
+    # ------------------------------------------------------------------ internals
+    def _flush(self, key: str) -> None:
+        burst = self._bursts.pop(key, None)
+        if burst is None:
+            return
+        if burst.handle is not None:
+            burst.handle.cancel()
+        self._emit(key, burst.items)
+
+    def _emit(self, key: str, items: List[Any]) -> None:
+        self.flushes += 1
+        self.merged += len(items) - 1
+        try:
+            self.flush(key, items)
+        except Exception:
+            logger.exception(f"Flushing {len(items)} message(s) for {key} failed")
+
+
+def coalescer_from_env(flush: Callable[[str, List[Any]], None]) -> Coalescer:
+    """COALESCE_WINDOW_SECONDS / COALESCE_MAX_WAIT_SECONDS / COALESCE_MAX_MESSAGES."""
+    return Coalescer(
+        flush,
+        window=float(os.getenv("COALESCE_WINDOW_SECONDS", "1.5")),
+        max_wait=float(os.getenv("COALESCE_MAX_WAIT_SECONDS", "5")),
+        max_items=int(os.getenv("COALESCE_MAX_MESSAGES", "20")),
+    )
@@ -0,0 +1,137 @@
+# services/dedup.py
+"""
+Duplicate suppression for Slack event deliveries.
+
+Slack redelivers an event (same event_id, X-Slack-Retry-Num set) whenever it
+does not see a timely 200, and a client can resend the same message with
+the same client_msg_id. Both keys are remembered for a while so a repeat is
+dropped before any agent or Freedcamp work starts.
+
+With several worker processes a redelivery can land on a different worker,
+so keys this process has not seen are also checked against the shared state
+backend (services/state.py).
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class TTLCache:
+    """Bounded insertion-ordered cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def add_if_absent(self, key: str, now: Optional[float] = None) -> bool:
+        """Remember `key`; return False if it was already present and unexpired."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            if key in self._data:
+                return False
+            self._data[key] = now + self.ttl
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def _expire(self, now: float) -> None:
+        # Entries are ordered by insertion and share one TTL, so expired ones sit at the front.
+        while self._data:
+            key, expires_at = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            del self._data[key]
+            self.evictions += 1
+
+
+class EventDeduplicator:
+    def __init__(self, maxsize: int = 10_000, ttl: float = 600.0, backend=None):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._backend = backend  # services.state.StateBackend shared across workers, or None
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.retries_seen = 0
+
+    def is_duplicate(
+        self,
+        event_id: Optional[str],
+        client_msg_id: Optional[str] = None,
+        retry_num: Optional[str] = None,
+    ) -> bool:
+        """Record the event keys; True if any of them has been seen recently."""
+        keys = self._keys(event_id, client_msg_id, retry_num)
+        # Register every key even when the first one already matched, so a later
+        # delivery carrying only one of them is still caught.
+        return self._verdict([self._cache.add_if_absent(k) and self._claim(k) for k in keys])
+
+    async def is_duplicate_async(
+        self,
+        event_id: Optional[str],
+        client_msg_id: Optional[str] = None,
+        retry_num: Optional[str] = None,
+    ) -> bool:
+        """is_duplicate() for the event loop: the shared-backend claim runs off the loop."""
+        fresh = []
+        for k in self._keys(event_id, client_msg_id, retry_num):
+            fresh.append(self._cache.add_if_absent(k) and await self._claim_async(k))
+        return self._verdict(fresh)
+
+    def _keys(self, event_id: Optional[str], client_msg_id: Optional[str], retry_num: Optional[str]) -> List[str]:
+        if retry_num:
+            self.retries_seen += 1
+        keys = []
+        if event_id:
+            keys.append(f"event:{event_id}")
+        if client_msg_id:
+            keys.append(f"msg:{client_msg_id}")
+        return keys
+
+    def _verdict(self, fresh: List[bool]) -> bool:
+        if all(fresh):  # also covers an event with no keys at all
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def _claim(self, key: str) -> bool:
+        """First sighting across all workers? (always True without a shared backend)"""
+        return self._backend is None or self._backend.set_if_absent(f"dedup:{key}", "1", ttl=self.ttl)
+
+    async def _claim_async(self, key: str) -> bool:
+        return self._backend is None or await self._backend.set_if_absent_async(f"dedup:{key}", "1", ttl=self.ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "retries_seen": self.retries_seen,
+            "size": len(self._cache),
+            "evictions": self._cache.evictions,
+        }
+
+
+_deduplicator: Optional[EventDeduplicator] = None
+
+
+def get_deduplicator() -> EventDeduplicator:
+    """Process-wide deduplicator, sized from DEDUP_MAXSIZE / DEDUP_TTL_SECONDS, backed by the shared state store."""
+    global _deduplicator
+    if _deduplicator is None:
+        from services.state import get_state_backend
+        _deduplicator = EventDeduplicator(
+            maxsize=int(os.getenv("DEDUP_MAXSIZE", "10000")),
+            ttl=float(os.getenv("DEDUP_TTL_SECONDS", "600")),
+            backend=get_state_backend(),
+        )
+    return _deduplicator
@@ -0,0 +1,300 @@
+# services/directory.py
+"""
+Slack ↔ Freedcamp identity directory used for assignee resolution.
+
+Slack users (users.list) are joined with Freedcamp users on email, then on
+normalized full name. The joined index answers lookups by Slack id, @handle,
+email or name (exact, normalized, then trigram fuzzy) entirely from memory.
+Manual overrides in pm_agents.user_map.SLACK_TO_FC win over the index.
+A JSON snapshot on disk gives warm starts, and a background task refreshes
+the index every DIRECTORY_TTL_SECONDS without blocking request handling.
+"""
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MENTION_RE = re.compile(r"^<@([A-Z0-9]+)(?:\|[^>]*)?>$")
+
+
+def normalize(value: str) -> str:
+    """Lowercase, strip accents, '@' and everything that is not a letter or digit."""
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return re.sub(r"[^a-z0-9]", "", value.lower())
+
+
+def trigrams(value: str) -> Set[str]:
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class DirectoryEntry:
+    fc_id: int
+    full_name: str = ""
+    email: str = ""
+    slack_id: str = ""
+    slack_handle: str = ""
+    slack_display_name: str = ""
+
+
+class DirectoryIndex:
+    FUZZY_THRESHOLD = 0.5
+
+    def __init__(self, entries: Iterable[DirectoryEntry] = (), built_at: Optional[float] = None):
+        self.entries: List[DirectoryEntry] = list(entries)
+        self.built_at = built_at if built_at is not None else time.time()
+        self._exact: Dict[str, int] = {}
+        self._normalized: Dict[str, int] = {}
+        self._names: List[Tuple[int, int]] = []          # (entry idx, trigram count) per indexed name
+        self._grams: Dict[str, List[int]] = defaultdict(list)  # trigram -> positions in _names
+        for idx, e in enumerate(self.entries):
+            self._add(idx, e)
+
+    # ------------------------------------------------------------------ building
+    @classmethod
+    def build(cls, slack_users: Iterable[Dict[str, Any]], fc_users: Iterable[Dict[str, Any]]) -> "DirectoryIndex":
+        """Join raw Slack and Freedcamp user objects on email, then on normalized name."""
+        fc_by_email: Dict[str, DirectoryEntry] = {}
+        fc_by_name: Dict[str, DirectoryEntry] = {}
+        entries: List[DirectoryEntry] = []
+        for u in fc_users:
+            e = DirectoryEntry(
+                fc_id=int(u["user_id"]),
+                full_name=u.get("full_name") or "",
+                email=(u.get("email") or "").lower(),
+            )
+            entries.append(e)
+            if e.email:
+                fc_by_email[e.email] = e
+            if e.full_name:
+                fc_by_name.setdefault(normalize(e.full_name), e)
+
+        for su in slack_users:
+            if su.get("deleted") or su.get("is_bot"):
+                continue
+            profile = su.get("profile") or {}
+            email = (profile.get("email") or "").lower()
+            real_name = profile.get("real_name") or su.get("real_name") or ""
+            match = fc_by_email.get(email) if email else None
+            if match is None and real_name:
+                match = fc_by_name.get(normalize(real_name))
+            if match is None:
+                continue
+            match.slack_id = su.get("id") or ""
+            match.slack_handle = su.get("name") or ""
+            match.slack_display_name = profile.get("display_name") or ""
+        return cls(entries)
+
+    def _add(self, idx: int, e: DirectoryEntry) -> None:
+        for key in (e.slack_id, e.email):
+            if key:
+                self._exact.setdefault(key.lower(), idx)
+        for name in (e.slack_handle, e.slack_display_name, e.full_name, e.email.split("@")[0]):
+            norm = normalize(name)
+            if not norm or norm in self._normalized:
+                continue
+            self._normalized[norm] = idx
+            grams = trigrams(norm)
+            pos = len(self._names)
+            self._names.append((idx, len(grams)))
+            for g in grams:
+                self._grams[g].append(pos)
+
+    # ------------------------------------------------------------------ lookup
+    def lookup(self, assignee: str) -> Optional[DirectoryEntry]:
+        """Resolve a Slack mention, @handle, email or name; no I/O."""
+        if not assignee:
+            return None
+        raw = assignee.strip()
+        mention = _MENTION_RE.match(raw)
+        if mention:
+            raw = mention.group(1)
+        idx = self._exact.get(raw.lstrip("@").lower())
+        if idx is None:
+            idx = self._normalized.get(normalize(raw))
+        if idx is None:
+            idx = self._fuzzy(normalize(raw))
+        return self.entries[idx] if idx is not None else None
+
+    def by_slack_id(self, slack_id: str) -> Optional[DirectoryEntry]:
+        """Exact Slack user id match only; never fuzzy, for "who is asking" lookups."""
+        idx = self._exact.get((slack_id or "").lower())
+        if idx is None or self.entries[idx].slack_id.lower() != (slack_id or "").lower():
+            return None
+        return self.entries[idx]
+
+    def _fuzzy(self, norm: str) -> Optional[int]:
+        if len(norm) < 3:
+            return None
+        query = trigrams(norm)
+        overlap: Dict[int, int] = defaultdict(int)
+        for g in query:
+            for pos in self._grams.get(g, ()):
+                overlap[pos] += 1
+        best, best_score = None, 0.0
+        for pos, shared in overlap.items():
+            idx, size = self._names[pos]
+            score = shared / (len(query) + size - shared)  # trigram Jaccard
+            if score > best_score:
+                best, best_score = idx, score
+        return best if best_score >= self.FUZZY_THRESHOLD else None
+
+    # ------------------------------------------------------------------ snapshot
+    def to_dict(self) -> Dict[str, Any]:
+        return {"built_at": self.built_at, "entries": [asdict(e) for e in self.entries]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DirectoryIndex":
+        return cls((DirectoryEntry(**e) for e in data.get("entries", [])), built_at=data.get("built_at"))
+
+
+class DirectoryService:
+    REFRESH_LOCK = "directory:refresh"
+    LOCKED_RETRY_SECONDS = 5.0
+
+    def __init__(self, snapshot_path: Optional[str] = None, ttl: Optional[float] = None, slack_client=None,
+                 state=None):
+        # slack_client: an AsyncWebClient; defaults to the shared sender's client
+        # state: services.state.StateBackend; one worker refreshes, the others reload its snapshot
+        self.snapshot_path = snapshot_path or os.getenv("DIRECTORY_SNAPSHOT_PATH", "data/directory_snapshot.json")
+        self.ttl = ttl if ttl is not None else float(os.getenv("DIRECTORY_TTL_SECONDS", "3600"))
+        self.index = DirectoryIndex(built_at=0.0)
+        self._slack_client = slack_client
+        from pm_agents.user_map import SLACK_TO_FC
+        self._overrides = {normalize(handle): fc_id for handle, fc_id in SLACK_TO_FC.items()}
+        if state is None:
+            from services.state import get_state_backend
+            state = get_state_backend()
+        self._state = state
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------ lifecycle
+    def start(self) -> None:
+        """Load the snapshot (warm start) and schedule background refreshes."""
+        self.load_snapshot()
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop(), name="directory-refresh")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # ------------------------------------------------------------------ public
+    def resolve(self, assignee: str) -> int:
+        """Freedcamp user id for an assignee string, 0 (unassigned) if unknown."""
+        if not assignee:
+            return 0
+        override = self._overrides.get(normalize(assignee))
+        if override is not None:
+            return override  # explicit mapping beats any index match, fuzzy ones included
+        entry = self.index.lookup(assignee)
+        return entry.fc_id if entry is not None else 0
+
+    def resolve_sender(self, slack_id: str) -> int:
+        """Freedcamp user id of the Slack user sending a DM, 0 if they are not linked."""
+        entry = self.index.by_slack_id(slack_id)
+        return entry.fc_id if entry is not None else 0
+
+    def age_seconds(self) -> float:
+        return time.time() - self.index.built_at
+
+    async def refresh(self) -> None:
+        slack_users, fc_users = await asyncio.gather(self._fetch_slack_users(), self._fetch_fc_users())
+        self.index = DirectoryIndex.build(slack_users, fc_users)
+        await asyncio.to_thread(self._write_snapshot, self.index.to_dict())
+        logger.info(f"Directory refreshed: {len(self.index.entries)} Freedcamp users indexed")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.index.entries),
+            "linked_to_slack": sum(1 for e in self.index.entries if e.slack_id),
+            "age_s": round(self.age_seconds(), 1),
+        }
+
+    # ------------------------------------------------------------------ internals
+    async def _refresh_loop(self) -> None:
+        while True:
+            delay = self.ttl - self.age_seconds()
+            if delay <= 0 and self._snapshot_is_newer() and self.load_snapshot():
+                delay = self.ttl - self.age_seconds()  # another worker may have refreshed it
+            if delay <= 0:
+                if not await self._state.set_if_absent_async(self.REFRESH_LOCK, str(os.getpid()), ttl=300.0):
+                    delay = self.LOCKED_RETRY_SECONDS  # another worker is refreshing; pick up its snapshot
+                else:
+                    try:
+                        await self.refresh()
+                        delay = self.ttl
+                    except Exception:
+                        logger.exception("Directory refresh failed; keeping the previous index")
+                        delay = min(self.ttl, 60.0)
+                    finally:
+                        await self._state.delete_async(self.REFRESH_LOCK)
+            await asyncio.sleep(delay)
+
+    def _snapshot_is_newer(self) -> bool:
+        try:
+            return os.path.getmtime(self.snapshot_path) > self.index.built_at
+        except OSError:
+            return False
+
+    async def _fetch_fc_users(self) -> List[Dict[str, Any]]:
+        from FreedcampUserFetcher import FreedcampUserFetcher
+        return [u async for u in FreedcampUserFetcher().iter_users()]
+
+    async def _fetch_slack_users(self) -> List[Dict[str, Any]]:
+        from tools.slack_sender import get_slack_sender
+        sender = get_slack_sender()
+        if self._slack_client is None:
+            self._slack_client = sender.client
+        users: List[Dict[str, Any]] = []
+        cursor = None
+        while True:
+            # Same "slack" guard as the sender: its users_list timeout, limiter and breaker apply
+            resp = await sender.upstream.call(
+                "users_list", lambda: self._slack_client.users_list(limit=200, cursor=cursor)
+            )
+            users.extend(resp.get("members", []))
+            cursor = (resp.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                return users
+
+    def load_snapshot(self) -> bool:
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as fh:
+                self.index = DirectoryIndex.from_dict(json.load(fh))
+        except FileNotFoundError:
+            return False
+        except (ValueError, TypeError, KeyError):
+            logger.warning(f"Ignoring unreadable directory snapshot {self.snapshot_path}")
+            return False
+        logger.info(f"Directory warm-started from snapshot ({len(self.index.entries)} users)")
+        return True
+
+    def _write_snapshot(self, data: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        tmp = f"{self.snapshot_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, self.snapshot_path)
+
+
+_directory: Optional[DirectoryService] = None
+
+
+def get_directory() -> DirectoryService:
+    global _directory
+    if _directory is None:
+        _directory = DirectoryService()
+    return _directory
@@ -0,0 +1,150 @@
+# services/draft_cache.py
+"""
+Content-addressed cache of TaskDraftAgent results.
+
+The key is a SHA-256 of the normalized message text plus the context the
+draft depends on (channel, sender, prompt version, today's date for relative
+due dates). Hits are served from an in-memory LRU, then from an optional
+SQLite file shared across restarts; both tiers expire entries after a TTL.
+Values are opaque strings (the serialized TaskDraftOutput).
+"""
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r"\s+")
+_ZERO_WIDTH_RE = re.compile(r"[\u200b-\u200d\ufeff]")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace/case/unicode forms so trivially re-sent text hashes the same."""
+    text = unicodedata.normalize("NFKC", text or "")
+    text = _ZERO_WIDTH_RE.sub("", text)
+    return _WS_RE.sub(" ", text).strip().casefold()
+
+
+def cache_key(text: str, *context: str) -> str:
+    h = hashlib.sha256(normalize_text(text).encode("utf-8"))
+    for part in context:
+        h.update(b"\x1f")
+        h.update((part or "").encode("utf-8"))
+    return h.hexdigest()
+
+
+class DraftCache:
+    PRUNE_EVERY = 100
+
+    def __init__(self, maxsize: int = 512, ttl: float = 86400.0, sqlite_path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_disk_rows = maxsize * 20
+        self._lru: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._puts = 0
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        if sqlite_path:
+            self._open(sqlite_path)
+
+    # ------------------------------------------------------------------ public
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            item = self._lru.get(key)
+            if item is not None:
+                if item[0] > now:
+                    self._lru.move_to_end(key)
+                    self.hits_memory += 1
+                    return item[1]
+                del self._lru[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM drafts WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    self._remember(key, row[0], row[1])
+                    self.hits_disk += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO drafts (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._puts += 1
+            if self._puts % self.PRUNE_EVERY == 0:
+                self._prune()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "size_memory": len(self._lru),
+            "disk": self._db is not None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ------------------------------------------------------------------ internals
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        self._lru[key] = (expires_at, value)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def _open(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS drafts (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS drafts_expires ON drafts (expires_at)")
+
+    def _prune(self) -> None:
+        self._db.execute("DELETE FROM drafts WHERE expires_at <= ?", (time.time(),))
+        # Beyond the row cap, drop the entries closest to expiry (i.e. the oldest writes)
+        self._db.execute(
+            "DELETE FROM drafts WHERE key IN ("
+            " SELECT key FROM drafts ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_rows,),
+        )
+
+
+_cache: Optional[DraftCache] = None
+
+
+def get_draft_cache() -> DraftCache:
+    """Process-wide cache from DRAFT_CACHE_SIZE / DRAFT_CACHE_TTL_SECONDS / DRAFT_CACHE_PATH ('' = memory only)."""
+    global _cache
+    if _cache is None:
+        _cache = DraftCache(
+            maxsize=int(os.getenv("DRAFT_CACHE_SIZE", "512")),
+            ttl=float(os.getenv("DRAFT_CACHE_TTL_SECONDS", "86400")),
+            sqlite_path=os.getenv("DRAFT_CACHE_PATH", "data/draft_cache.sqlite3") or None,
+        )
+    return _cache
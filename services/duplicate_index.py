@@ -0,0 +1,319 @@
+# services/duplicate_index.py
+"""
+Near-duplicate lookup over the project's existing Freedcamp tasks.
+
+Each open task is reduced to a 32-value MinHash signature. The shingles are
+character trigrams of the normalized title plus the first words of the
+description. Signatures are bucketed with LSH (8 bands of 4 rows). A query
+hashes its own text, collects candidates from the matching buckets, and
+scores them by the share of equal signature values, which estimates Jaccard
+similarity. That is a few thousand integer operations per query,
+independent of the number of tasks.
+
+Only signatures and bucket keys are kept in memory (roughly 1 KB per task).
+Titles and URLs stay in SQLite and are read only for the hits. Sync is
+incremental: FreedcampTaskFetcher walks tasks by updated_ts and stops at the
+stored watermark, and each page is written in one transaction off the event
+loop. Tasks any worker creates are added immediately, and every query first
+loads the rows other workers wrote since the last one (an indexed
+`version > ?` scan), so five people filing the same issue within one sync
+interval are still caught.
+"""
+import os
+import re
+import time
+import zlib
+import array
+import random
+import sqlite3
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from services.draft_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+DESCRIPTION_WORDS = 20
+COMPLETED = 1  # Freedcamp task status: 0 open, 1 completed, 2 in progress
+
+_PRIME = (1 << 61) - 1
+_MASK = 0xFFFFFFFF
+_rng = random.Random(0x51D)  # fixed seed: signatures stored on disk must stay comparable
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(title: str, description: str = "") -> Set[int]:
+    title = normalize_text(title)
+    padded = f"  {title} "
+    grams = {padded[i:i + 3] for i in range(len(padded) - 2)}
+    grams.update("w:" + w for w in _WORD_RE.findall(normalize_text(description))[:DESCRIPTION_WORDS])
+    return {zlib.crc32(g.encode("utf-8")) for g in grams}
+
+
+def signature(title: str, description: str = "") -> array.array:
+    hashes = shingles(title, description) or {0}
+    return array.array("I", (min(((a * h + b) % _PRIME) & _MASK for h in hashes) for a, b in _PERMS))
+
+
+def _band_keys(sig: array.array) -> List[int]:
+    return [hash((band, tuple(sig[band * ROWS:(band + 1) * ROWS]))) for band in range(BANDS)]
+
+
+def similarity(a: array.array, b: array.array) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+@dataclass
+class DuplicateMatch:
+    task_id: str
+    title: str
+    url: Optional[str]
+    score: float
+
+
+class DuplicateIndex:
+    PAGE_SIZE = 100  # tasks fetched per request, and written per transaction
+
+    def __init__(self, path: str, threshold: float = 0.5):
+        self.threshold = threshold
+        self._sigs: Dict[str, array.array] = {}
+        self._buckets: Dict[int, Any] = {}  # band key -> task id, or a list of ids on collision
+        self._loaded_version = 0
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.matches = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                url TEXT,
+                status INTEGER NOT NULL DEFAULT 0,
+                updated_ts INTEGER NOT NULL DEFAULT 0,
+                signature BLOB NOT NULL,
+                version INTEGER NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS tasks_version ON tasks (version)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.reload()
+
+    # ------------------------------------------------------------------ public
+    def query(self, title: str, description: str = "", limit: int = 3) -> List[DuplicateMatch]:
+        """Open tasks whose estimated similarity is at least `threshold`, best first."""
+        sig = signature(title, description)
+        with self._lock:
+            self._reload()  # rows other workers wrote since the last query or sync
+            self.queries += 1
+            candidates = self._candidates(sig)
+            scored = sorted(
+                ((similarity(sig, self._sigs[c]), c) for c in candidates if c in self._sigs), reverse=True
+            )
+            scored = [(s, c) for s, c in scored if s >= self.threshold][:limit]
+            if not scored:
+                return []
+            self.matches += 1
+            rows = {
+                r[0]: r for r in self._db.execute(
+                    f"SELECT id, title, url FROM tasks WHERE id IN ({','.join('?' * len(scored))})",
+                    [c for _, c in scored],
+                )
+            }
+        return [DuplicateMatch(c, rows[c][1], rows[c][2], round(s, 2)) for s, c in scored if c in rows]
+
+    def upsert(self, task_id: str, title: str, description: str = "", url: Optional[str] = None,
+               status: int = 0, updated_ts: int = 0) -> None:
+        self._write([(str(task_id), title, description, url, status, updated_ts)])
+
+    def reload(self) -> int:
+        """Pick up rows written by other workers since the last load."""
+        with self._lock:
+            return self._reload()
+
+    @property
+    def watermark(self) -> int:
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'synced_updated_ts'").fetchone()
+        return int(row[0]) if row else 0
+
+    async def sync(self, fetcher) -> int:
+        """Index every task updated since the watermark; `fetcher` is a FreedcampTaskFetcher."""
+        since = self.watermark
+        newest = since
+        count = 0
+        batch: List[tuple] = []
+        async for t in fetcher.iter_updated_since(since, self.PAGE_SIZE):
+            ts = int(t.get("updated_ts") or t.get("created_ts") or 0)
+            url = t.get("url")
+            if url and url.startswith("/"):
+                url = f"https://freedcamp.com{url}"
+            batch.append((str(t["id"]), t.get("title") or "", t.get("description") or "", url,
+                          int(t.get("status") or 0), ts))
+            newest = max(newest, ts)
+            count += 1
+            if len(batch) >= self.PAGE_SIZE:
+                await asyncio.to_thread(self._write, batch)
+                batch = []
+        await asyncio.to_thread(self._write, batch, newest if newest > since else None)
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tasks": len(self._sigs),
+            "queries": self.queries,
+            "matches": self.matches,
+            "watermark": self.watermark,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ------------------------------------------------------------------ internals
+    def _reload(self) -> int:
+        rows = self._db.execute(
+            "SELECT id, status, signature, version FROM tasks WHERE version > ? ORDER BY version",
+            (self._loaded_version,),
+        ).fetchall()
+        for task_id, status, blob, version in rows:
+            sig = array.array("I")
+            sig.frombytes(blob)
+            self._apply(task_id, sig, status)
+            self._loaded_version = version
+        return len(rows)
+
+    def _candidates(self, sig: array.array) -> Set[str]:
+        candidates: Set[str] = set()
+        for key in _band_keys(sig):
+            hit = self._buckets.get(key)
+            if hit is not None:
+                candidates.update(hit if isinstance(hit, list) else (hit,))
+        return candidates
+
+    def _write(self, tasks: List[tuple], watermark: Optional[int] = None) -> None:
+        """Store (id, title, description, url, status, updated_ts) rows and the watermark in one transaction.
+
+        Blocking; sync() runs it in a thread, one page at a time.
+        """
+        sigs = [signature(title, description) for _, title, description, _, _, _ in tasks]
+        with self._lock:
+            # BEGIN IMMEDIATE so two workers never hand out the same version number
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                version = self._next_version()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO tasks (id, title, url, status, updated_ts, signature, version)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(task_id, title, url, status, updated_ts, sig.tobytes(), version + i)
+                     for i, ((task_id, title, _, url, status, updated_ts), sig) in enumerate(zip(tasks, sigs))],
+                )
+                if watermark is not None:
+                    self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('synced_updated_ts', ?)",
+                                     (str(watermark),))
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            # Load every row up to ours: versions other workers took in between must not be skipped
+            self._reload()
+
+    def _next_version(self) -> int:
+        row = self._db.execute("SELECT COALESCE(MAX(version), 0) FROM tasks").fetchone()
+        return row[0] + 1
+
+    def _apply(self, task_id: str, sig: array.array, status: int) -> None:
+        old = self._sigs.pop(task_id, None)
+        if old is not None:
+            for key in _band_keys(old):
+                self._unbucket(key, task_id)
+        if status == COMPLETED:
+            return  # done tasks are not offered as duplicates
+        self._sigs[task_id] = sig
+        for key in _band_keys(sig):
+            hit = self._buckets.get(key)
+            if hit is None:
+                self._buckets[key] = task_id
+            elif isinstance(hit, list):
+                hit.append(task_id)
+            elif hit != task_id:
+                self._buckets[key] = [hit, task_id]
+
+    def _unbucket(self, key: int, task_id: str) -> None:
+        hit = self._buckets.get(key)
+        if hit == task_id:
+            del self._buckets[key]
+        elif isinstance(hit, list) and task_id in hit:
+            hit.remove(task_id)
+            if len(hit) == 1:
+                self._buckets[key] = hit[0]
+
+
+class DuplicateService:
+    """Background incremental sync of the index; one worker syncs, the others reload from SQLite."""
+
+    SYNC_LOCK = "duplicates:sync"
+
+    def __init__(self, index: DuplicateIndex, interval: float = 300.0, state=None):
+        self.index = index
+        self.interval = interval
+        self._state = state
+        self._task: Optional[asyncio.Task] = None
+        self.last_sync_at = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop(), name="duplicate-sync")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def sync_once(self) -> int:
+        from FreedcampTaskFetcher import FreedcampTaskFetcher
+        if self._state is None:
+            from services.state import get_state_backend
+            self._state = get_state_backend()
+        if not await self._state.set_if_absent_async(self.SYNC_LOCK, str(os.getpid()), ttl=self.interval):
+            return await asyncio.to_thread(self.index.reload)  # another worker syncs this round; pick up its rows
+        await asyncio.to_thread(self.index.reload)  # tasks the other workers created since their last sync
+        count = await self.index.sync(FreedcampTaskFetcher())
+        self.last_sync_at = time.time()
+        logger.info(f"Duplicate index synced: {count} task(s) updated, {self.index.stats()['tasks']} indexed")
+        return count
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.sync_once()
+            except Exception:
+                logger.exception("Duplicate index sync failed; keeping the current index")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.index.stats(), "last_sync_age_s": round(time.time() - self.last_sync_at, 1) if self.last_sync_at else None}
+
+
+_service: Optional[DuplicateService] = None
+
+
+def get_duplicate_service() -> DuplicateService:
+    """DUPLICATE_INDEX_PATH / DUPLICATE_THRESHOLD / DUPLICATE_SYNC_SECONDS."""
+    global _service
+    if _service is None:
+        index = DuplicateIndex(
+            os.getenv("DUPLICATE_INDEX_PATH", "data/duplicate_index.sqlite3"),
+            threshold=float(os.getenv("DUPLICATE_THRESHOLD", "0.5")),
+        )
+        _service = DuplicateService(index, interval=float(os.getenv("DUPLICATE_SYNC_SECONDS", "300")))
+    return _service
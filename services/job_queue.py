@@ -0,0 +1,167 @@
+# services/job_queue.py
+"""
+In-process asyncio job queue drained by a fixed pool of workers.
+
+The Slack endpoint enqueues work and returns immediately; the workers run
+the orchestration in the background and post results back to Slack. Jobs
+are handed out by services/scheduler.py (fair share per user, interactive
+and bulk lanes) rather than in arrival order.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from services.scheduler import INTERACTIVE, FairScheduler
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[..., Awaitable[Any]]
+    args: tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    user: str = ""
+    lane: str = INTERACTIVE
+    cost: float = 1.0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class JobQueue:
+    def __init__(self, workers: int = 4, maxsize: int = 0, scheduler: Optional[FairScheduler] = None):
+        self.workers = max(1, workers)
+        self.maxsize = maxsize
+        self._scheduler = scheduler or FairScheduler(bulk_max_in_flight=max(1, self.workers // 2))
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._unfinished = 0
+        self._tasks: List[asyncio.Task] = []
+        self._closing = False
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._last_wait = 0.0
+        self._max_wait = 0.0
+        self._total_wait = 0.0
+
+    # ------------------------------------------------------------------ lifecycle
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._closing = False
+        loop = asyncio.get_running_loop()
+        self._tasks = [
+            loop.create_task(self._worker(i), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"JobQueue started with {self.workers} workers")
+
+    async def stop(self, drain_timeout: float = 0.0) -> None:
+        """Stop the workers, first letting queued and in-flight jobs finish for up to `drain_timeout` seconds."""
+        self._closing = True
+        if drain_timeout > 0 and self._tasks:
+            try:
+                await asyncio.wait_for(self.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"JobQueue drain timed out with {len(self._scheduler)} queued, {self._in_flight} in flight")
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ------------------------------------------------------------------ public
+    def submit(self, name: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Job:
+        """Enqueue a coroutine function; raises asyncio.QueueFull if bounded and full, or shutting down."""
+        return self.submit_for("", INTERACTIVE, 1.0, name, func, *args, **kwargs)
+
+    def submit_for(self, user: str, lane: str, cost: float, name: str, func: Callable[..., Awaitable[Any]],
+                   *args, **kwargs) -> Job:
+        """Like submit(), queued under `user` in `lane` with a fair-share `cost` (see services.scheduler)."""
+        if self._closing:
+            raise asyncio.QueueFull("job queue is shutting down")
+        if self.maxsize and len(self._scheduler) >= self.maxsize:
+            raise asyncio.QueueFull("job queue is full")
+        job = Job(name=name, func=func, args=args, kwargs=kwargs, user=user, lane=lane, cost=cost)
+        self._scheduler.push(job)
+        self._unfinished += 1
+        self._idle.clear()
+        self._wakeup.set()
+        return job
+
+    async def join(self) -> None:
+        """Wait until every submitted job has finished."""
+        await self._idle.wait()
+
+    def stats(self) -> Dict[str, Any]:
+        done = self._completed + self._failed
+        return {
+            "workers": self.workers,
+            "depth": len(self._scheduler),
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "failed": self._failed,
+            "wait_last_s": round(self._last_wait, 4),
+            "wait_max_s": round(self._max_wait, 4),
+            "wait_avg_s": round(self._total_wait / done, 4) if done else 0.0,
+            **self._scheduler.stats(),
+        }
+
+    # ------------------------------------------------------------------ internals
+    async def _next(self) -> Job:
+        while True:
+            job = self._scheduler.pop()
+            if job is not None:
+                return job
+            # Nothing may start yet; submit() and finished jobs (freed caps) wake the workers
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    async def _worker(self, idx: int) -> None:
+        while True:
+            job = await self._next()
+            wait = time.monotonic() - job.enqueued_at
+            self._last_wait = wait
+            self._max_wait = max(self._max_wait, wait)
+            self._total_wait += wait
+            self._in_flight += 1
+            try:
+                await job.func(*job.args, **job.kwargs)
+                self._completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._failed += 1
+                logger.exception(f"Job '{job.name}' failed in worker {idx}")
+            finally:
+                self._in_flight -= 1
+                self._scheduler.done(job)
+                self._unfinished -= 1
+                if self._unfinished == 0:
+                    self._idle.set()
+                self._wakeup.set()
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue, sized from JOB_WORKERS / JOB_QUEUE_MAXSIZE; fairness from SCHED_* (docs/env_template.md)."""
+    global _job_queue
+    if _job_queue is None:
+        workers = int(os.getenv("JOB_WORKERS", "4"))
+        _job_queue = JobQueue(
+            workers=workers,
+            maxsize=int(os.getenv("JOB_QUEUE_MAXSIZE", "0")),
+            scheduler=FairScheduler(
+                quantum=float(os.getenv("SCHED_QUANTUM", "1")),
+                user_max_in_flight=int(os.getenv("SCHED_USER_MAX_IN_FLIGHT", "2")),
+                bulk_max_in_flight=int(os.getenv("SCHED_BULK_MAX_IN_FLIGHT", str(max(1, workers // 2)))),
+                interactive_weight=int(os.getenv("SCHED_INTERACTIVE_WEIGHT", "4")),
+            ),
+        )
+    return _job_queue
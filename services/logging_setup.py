@@ -0,0 +1,203 @@
+# services/logging_setup.py
+"""
+Process-wide logging: callers enqueue, a background thread writes.
+
+configure_logging() attaches a single QueueHandler to the root logger. A
+log call on the event loop then only builds the record and puts it on a
+bounded queue. A QueueListener thread formats and writes it to:
+
+  logs/xizor.jsonl   one JSON object per line (ts, level, logger, msg,
+                     trace, exc), rotated by size or by time
+  stderr             the usual one-line text format
+
+DEBUG records are rate limited per logger (LOG_DEBUG_PER_SECOND), so a
+payload dump in a hot path cannot flood the queue. When the queue is full,
+records are dropped and counted rather than blocking the loop. Levels are
+set per logger with LOG_LEVELS="tools.freedcamp_api=DEBUG,httpx=WARNING";
+modules never change levels or handlers at import.
+
+Env: LOG_LEVEL, LOG_LEVELS, LOG_FILE ("{pid}" is replaced, for serve.py
+workers), LOG_MAX_BYTES, LOG_BACKUPS, LOG_ROTATE_WHEN (e.g. "midnight";
+time rotation instead of size), LOG_DEBUG_PER_SECOND, LOG_QUEUE_SIZE.
+"""
+import os
+import copy
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from typing import Any, Dict, List, Optional
+
+from services import metrics
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        trace = getattr(record, "trace_id", "")
+        if trace:
+            entry["trace"] = trace
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugRateLimit(logging.Filter):
+    """Let at most `per_second` DEBUG records per logger through; INFO and above always pass."""
+
+    def __init__(self, per_second: float = 20.0):
+        super().__init__()
+        self.per_second = per_second
+        self._buckets: Dict[str, List[float]] = {}  # logger -> [tokens, last refill]
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.per_second <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(record.name, [self.per_second, now])
+            bucket[0] = min(self.per_second, bucket[0] + (now - bucket[1]) * self.per_second)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True
+            self.suppressed += 1
+            return False
+
+
+class _TraceFilter(logging.Filter):
+    # Runs in the caller's context, where the request's trace id contextvar is still visible
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = metrics.trace_id()
+        return True
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, q: "queue.Queue"):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback now (they may not survive the hop), but keep
+        # the exception apart from the message so the JSON line has a separate "exc" field
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1  # never block the event loop on a slow disk
+
+
+class LogPipeline:
+    def __init__(self, handler: _DroppingQueueHandler, listener: logging.handlers.QueueListener,
+                 sampler: DebugRateLimit, path: Optional[str]):
+        self.handler = handler
+        self.listener = listener
+        self.sampler = sampler
+        self.path = path
+
+    def stop(self) -> None:
+        """Flush what is queued and detach from the root logger."""
+        logging.getLogger().removeHandler(self.handler)
+        self.listener.stop()
+        for h in self.listener.handlers:
+            h.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.handler.queue.qsize(),
+            "dropped": self.handler.dropped,
+            "debug_suppressed": self.sampler.suppressed,
+        }
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """'a.b=DEBUG,httpx=warning' -> {'a.b': 'DEBUG', 'httpx': 'WARNING'}."""
+    levels = {}
+    for part in (spec or "").split(","):
+        name, sep, level = part.partition("=")
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+_pipeline: Optional[LogPipeline] = None
+_lock = threading.Lock()
+
+
+def configure_logging(level: Optional[str] = None, levels: Optional[str] = None, path: Optional[str] = None,
+                      console: bool = True) -> LogPipeline:
+    """Install the queue-backed pipeline once per process; later calls return the same one."""
+    global _pipeline
+    with _lock:
+        if _pipeline is not None:
+            return _pipeline
+        root = logging.getLogger()
+        root.setLevel(level or os.getenv("LOG_LEVEL", "INFO").upper())
+        for name, lvl in parse_levels(levels if levels is not None else os.getenv("LOG_LEVELS", "")).items():
+            logging.getLogger(name).setLevel(lvl)
+
+        handlers: List[logging.Handler] = []
+        if path is None:
+            path = os.getenv("LOG_FILE", "logs/xizor.jsonl")
+        if path:
+            path = path.replace("{pid}", str(os.getpid()))
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            when = os.getenv("LOG_ROTATE_WHEN", "")
+            if when:
+                file_handler = logging.handlers.TimedRotatingFileHandler(
+                    path, when=when, backupCount=int(os.getenv("LOG_BACKUPS", "7")), encoding="utf-8")
+            else:
+                file_handler = logging.handlers.RotatingFileHandler(
+                    path, maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+                    backupCount=int(os.getenv("LOG_BACKUPS", "7")), encoding="utf-8")
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        if console:
+            stream = logging.StreamHandler()
+            stream.setFormatter(logging.Formatter(TEXT_FORMAT))
+            handlers.append(stream)
+
+        handler = _DroppingQueueHandler(queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000"))))
+        sampler = DebugRateLimit(float(os.getenv("LOG_DEBUG_PER_SECOND", "20")))
+        handler.addFilter(sampler)
+        handler.addFilter(_TraceFilter())
+        listener = logging.handlers.QueueListener(handler.queue, *handlers, respect_handler_level=True)
+        listener.start()
+        root.addHandler(handler)
+        _pipeline = LogPipeline(handler, listener, sampler, path or None)
+        atexit.register(shutdown_logging)
+        return _pipeline
+
+
+def shutdown_logging() -> None:
+    global _pipeline
+    with _lock:
+        if _pipeline is not None:
+            _pipeline.stop()
+            _pipeline = None
+
+
+def logging_stats() -> Dict[str, Any]:
+    return _pipeline.stats() if _pipeline is not None else {}
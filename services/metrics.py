@@ -0,0 +1,162 @@
+# services/metrics.py
+"""
+In-process metrics with Prometheus text exposition.
+
+  span("freedcamp.create")  times a block into the xizor_stage_seconds
+                            histogram (label: stage). It counts exceptions in
+                            xizor_stage_errors_total and logs the duration at
+                            DEBUG with the current trace id.
+  new_trace() / trace_id()  one id per Slack request, kept in a contextvar so
+                            every span of a request (including the tasks it
+                            spawns) shares it.
+  render()                  text for GET /metrics. Component stats() dicts
+                            registered with add_stats() are flattened into
+                            the xizor_component gauge at scrape time.
+
+Recording is a perf_counter pair, a bisect and a dict lookup under a lock.
+Nothing else happens until something scrapes /metrics.
+"""
+import time
+import uuid
+import bisect
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "xizor"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_trace_id: contextvars.ContextVar[str] = contextvars.ContextVar("trace_id", default="-")
+
+
+def new_trace(trace: Optional[str] = None) -> str:
+    """Start (or adopt) the trace id for the current request."""
+    trace = trace or uuid.uuid4().hex[:16]
+    _trace_id.set(trace)
+    return trace
+
+
+def trace_id() -> str:
+    return _trace_id.get()
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        lines += [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self._series.items()]
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(f"{PREFIX}_stage_seconds", "Latency of one request stage.", ("stage",))
+STAGE_ERRORS = Counter(f"{PREFIX}_stage_errors_total", "Stages that ended with an exception.", ("stage",))
+_metrics: List[Any] = [STAGE_SECONDS, STAGE_ERRORS]
+_stats: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a block into xizor_stage_seconds{stage=...}; works inside coroutines too."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[trace {trace_id()}] {stage} took {elapsed * 1000:.1f}ms")
+
+
+def register(metric: Any) -> Any:
+    _metrics.append(metric)
+    return metric
+
+
+def add_stats(component: str, stats: Callable[[], Dict[str, Any]]) -> None:
+    """Expose a component's stats() dict as xizor_component{component,key} gauges."""
+    _stats[component] = stats
+
+
+def _flatten(prefix: str, value: Any) -> Iterator[Tuple[str, float]]:
+    if isinstance(value, (int, float)):  # bools included
+        yield prefix, float(value)
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            yield from _flatten(f"{prefix}.{k}" if prefix else str(k), v)
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _metrics:
+        lines += metric.render()
+    name = f"{PREFIX}_component"
+    lines += [f"# HELP {name} Numeric fields of each component's stats().", f"# TYPE {name} gauge"]
+    for component, stats in _stats.items():
+        try:
+            values = list(_flatten("", stats()))
+        except Exception as e:
+            logger.warning(f"stats() of {component} failed during scrape: {e}")
+            continue
+        lines += [f"{name}{_labels(('component', 'key'), (component, key))} {v}" for key, v in values]
+    return "\n".join(lines) + "\n"
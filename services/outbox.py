@@ -0,0 +1,293 @@
+# services/outbox.py
+"""
+Durable local outbox for Freedcamp task creation.
+
+Every drafted task is written to a SQLite (WAL) table before the Freedcamp
+POST. The orchestrator tries the delivery right away. If it fails with a
+timeout, a 5xx or a process restart, the background dispatcher retries it
+with exponential backoff and notifies the user once it succeeds. Entries
+are unique per idempotency key (source message + task index), so a
+redelivered message never drafts or creates the same task twice.
+
+An entry 'in_flight' for longer than the dispatcher's lease (its process
+died mid-POST) goes back to 'pending'. The lease keeps a worker that is
+starting up from reclaiming deliveries that a live worker still has in
+flight.
+
+Freedcamp has no idempotency header, so some failures leave the outcome
+unknown: a read/write timeout or dropped connection after the request was
+sent, an unexpected error, or a crash mid-POST. Such an entry is marked
+ambiguous. Before sending it again the dispatcher calls `find_existing` to
+look for the task in Freedcamp, and only re-sends when it is not there.
+Without `find_existing` an ambiguous entry is never re-sent: it fails, and
+the error tells the user to check Freedcamp.
+"""
+import os
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING, IN_FLIGHT, DONE, FAILED = "pending", "in_flight", "done", "failed"
+
+
+@dataclass
+class OutboxEntry:
+    id: int
+    idempotency_key: str
+    source_key: str
+    payload: Dict[str, Any]
+    status: str
+    attempts: int
+    next_attempt_at: float
+    last_error: Optional[str]
+    result: Optional[Dict[str, Any]]
+    notify_channel: Optional[str]
+    created_at: float = 0.0
+    ambiguous: bool = False  # an earlier attempt may have created the task
+
+
+class Outbox:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")  # an acknowledged entry must survive a crash
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                source_key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                result TEXT,
+                notify_channel TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._add_column("ambiguous INTEGER NOT NULL DEFAULT 0")  # files created before the column existed
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_source ON outbox (source_key)")
+
+    # ------------------------------------------------------------------ writes
+    def add(self, idempotency_key: str, source_key: str, payload: Dict[str, Any],
+            notify_channel: Optional[str] = None) -> OutboxEntry:
+        """Insert a pending entry, or return the existing one for this key."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO outbox (idempotency_key, source_key, payload, status, next_attempt_at,"
+                " notify_channel, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (idempotency_key, source_key, json.dumps(payload), PENDING, now, notify_channel, now, now),
+            )
+            return self._fetch("idempotency_key = ?", (idempotency_key,))[0]
+
+    def claim(self, entry_id: int) -> bool:
+        """pending -> in_flight; False if another worker/process got there first."""
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ? AND status = ?",
+                (IN_FLIGHT, time.time(), entry_id, PENDING),
+            )
+            return cur.rowcount == 1
+
+    def mark_done(self, entry_id: int, result: Dict[str, Any]) -> None:
+        self._set(entry_id, DONE, result=json.dumps(result))
+
+    def mark_retry(self, entry_id: int, error: str, delay: float, ambiguous: bool = False) -> None:
+        self._set(entry_id, PENDING, last_error=error, next_attempt_at=time.time() + delay, ambiguous=int(ambiguous))
+
+    def mark_failed(self, entry_id: int, error: str) -> None:
+        self._set(entry_id, FAILED, last_error=error)
+
+    def recover(self, stale_after: float = 0.0) -> int:
+        """Return entries in_flight for longer than `stale_after` seconds (their process died) to pending, as ambiguous."""
+        now = time.time()
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE outbox SET status = ?, ambiguous = 1, updated_at = ? WHERE status = ? AND updated_at <= ?",
+                (PENDING, now, IN_FLIGHT, now - stale_after),
+            )
+            return cur.rowcount
+
+    # ------------------------------------------------------------------ reads
+    def due(self, limit: int = 20) -> List[OutboxEntry]:
+        with self._lock:
+            return self._fetch(
+                "status = ? AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?", (PENDING, time.time(), limit)
+            )
+
+    def for_source(self, source_key: str) -> List[OutboxEntry]:
+        with self._lock:
+            return self._fetch("source_key = ? ORDER BY id", (source_key,))
+
+    def get(self, entry_id: int) -> Optional[OutboxEntry]:
+        with self._lock:
+            rows = self._fetch("id = ?", (entry_id,))
+        return rows[0] if rows else None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    # ------------------------------------------------------------------ internals
+    def _add_column(self, definition: str) -> None:
+        name = definition.split()[0]
+        if any(row[1] == name for row in self._db.execute("PRAGMA table_info(outbox)")):
+            return
+        try:
+            self._db.execute(f"ALTER TABLE outbox ADD COLUMN {definition}")
+        except sqlite3.OperationalError:
+            if not any(row[1] == name for row in self._db.execute("PRAGMA table_info(outbox)")):
+                raise  # not just another worker adding it first
+
+    def _set(self, entry_id: int, status: str, **fields: Any) -> None:
+        fields["status"] = status
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._db.execute(f"UPDATE outbox SET {assignments} WHERE id = ?", (*fields.values(), entry_id))
+
+    def _fetch(self, where: str, params: tuple) -> List[OutboxEntry]:
+        rows = self._db.execute(
+            "SELECT id, idempotency_key, source_key, payload, status, attempts, next_attempt_at, last_error,"
+            f" result, notify_channel, created_at, ambiguous FROM outbox WHERE {where}",
+            params,
+        ).fetchall()
+        return [
+            OutboxEntry(
+                id=r[0], idempotency_key=r[1], source_key=r[2], payload=json.loads(r[3]), status=r[4],
+                attempts=r[5], next_attempt_at=r[6], last_error=r[7],
+                result=json.loads(r[8]) if r[8] else None, notify_channel=r[9],
+                created_at=r[10], ambiguous=bool(r[11]),
+            )
+            for r in rows
+        ]
+
+
+Deliver = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+Notify = Callable[[OutboxEntry, Dict[str, Any]], Awaitable[None]]
+FindExisting = Callable[[OutboxEntry], Awaitable[Optional[Dict[str, Any]]]]  # a successful delivery result, or None
+
+
+class OutboxDispatcher:
+    """Delivers outbox entries: once inline via deliver_now, then in the background with backoff.
+
+    Outbox writes are fsynced (synchronous=FULL), so every one runs in a thread, off the event loop.
+    """
+
+    def __init__(self, outbox: Outbox, deliver: Deliver, notify: Optional[Notify] = None,
+                 base_delay: float = 2.0, max_delay: float = 300.0, max_attempts: int = 8,
+                 poll_interval: float = 1.0, lease: float = 120.0, find_existing: Optional[FindExisting] = None):
+        self.outbox = outbox
+        self.deliver = deliver
+        self.notify = notify
+        self.find_existing = find_existing
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.lease = lease  # well above any single delivery's timeout
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop(), name="outbox-dispatcher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def deliver_now(self, entry: OutboxEntry) -> Optional[Dict[str, Any]]:
+        """One inline attempt; None if another worker holds the entry."""
+        if entry.status == DONE:
+            return entry.result
+        if not await asyncio.to_thread(self.outbox.claim, entry.id):
+            return None
+        return await self._attempt(entry, entry.attempts + 1)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                recovered = await asyncio.to_thread(self.outbox.recover, self.lease)
+                if recovered:
+                    logger.warning(f"Outbox: {recovered} interrupted deliveries returned to pending")
+                for entry in await asyncio.to_thread(self.outbox.due):
+                    if await asyncio.to_thread(self.outbox.claim, entry.id):
+                        result = await self._attempt(entry, entry.attempts + 1)
+                        if result.get("success") and self.notify is not None:
+                            try:
+                                await self.notify(entry, result)
+                            except Exception:
+                                logger.exception("Outbox notification failed")
+            except Exception:
+                logger.exception("Outbox dispatcher iteration failed")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _attempt(self, entry: OutboxEntry, attempt: int) -> Dict[str, Any]:
+        result = await self._check_earlier(entry) if entry.ambiguous else None
+        if result is None:
+            try:
+                result = await self.deliver(entry.payload)
+            except Exception as e:
+                result = {"success": False, "error": str(e), "retryable": True, "ambiguous": True}
+        if result.get("success"):
+            await asyncio.to_thread(self.outbox.mark_done, entry.id, result)
+            return result
+        error = str(result.get("error", "unknown error"))
+        ambiguous = bool(result.get("ambiguous"))
+        if ambiguous and self.find_existing is None:
+            error = f"{error}. Freedcamp may have created the task anyway; check there before sending it again."
+            result["error"] = error
+            await asyncio.to_thread(self.outbox.mark_failed, entry.id, error)
+            logger.error(f"Outbox entry {entry.id} outcome unknown after attempt {attempt}; not re-sending: {error}")
+        elif result.get("retryable", True) and attempt < self.max_attempts:
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+            await asyncio.to_thread(self.outbox.mark_retry, entry.id, error, delay, ambiguous)
+            result["queued"] = True
+            logger.warning(f"Outbox entry {entry.id} attempt {attempt} failed ({error}); retry in {delay:.0f}s")
+        else:
+            await asyncio.to_thread(self.outbox.mark_failed, entry.id, error)
+            logger.error(f"Outbox entry {entry.id} failed permanently after {attempt} attempt(s): {error}")
+        return result
+
+    async def _check_earlier(self, entry: OutboxEntry) -> Optional[Dict[str, Any]]:
+        """Before re-sending an ambiguous entry: the task an earlier attempt created, or None to send it."""
+        if self.find_existing is None:
+            return {"success": False, "error": f"Earlier attempt ended without an answer ({entry.last_error or 'interrupted'})",
+                    "ambiguous": True}
+        try:
+            found = await self.find_existing(entry)
+        except Exception as e:
+            return {"success": False, "error": f"Could not check for an earlier delivery: {e}",
+                    "retryable": True, "ambiguous": True}
+        if found is not None:
+            logger.info(f"Outbox entry {entry.id} was already created by an earlier attempt: {found.get('task_id')}")
+        return found
+
+
+_outbox: Optional[Outbox] = None
+
+
+def get_outbox() -> Outbox:
+    global _outbox
+    if _outbox is None:
+        _outbox = Outbox(os.getenv("OUTBOX_PATH", "data/outbox.sqlite3"))
+    return _outbox
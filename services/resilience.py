@@ -0,0 +1,302 @@
+# services/resilience.py
+"""
+Shared resilience layer for calls to Freedcamp, Slack and Google Sheets.
+
+Each upstream gets one Upstream guard with three parts:
+
+  timeouts      a hard deadline per endpoint, e.g. freedcamp "/tasks" (the request path)
+  limiter       AIMD concurrency limit. It grows by ~1 per round trip while
+                latency stays under the target, and shrinks multiplicatively
+                on a slow call, a timeout or a failure. Callers above the
+                limit wait their turn instead of piling onto a slow upstream.
+  breaker       circuit breaker. After `failure_threshold` consecutive
+                failures it opens and calls fail fast with CircuitOpenError.
+                After `reset_timeout` one trial call is let through
+                (half-open): success closes it, failure opens it again.
+
+Every breaker transition and limit change is counted, and stats() exports
+the counts. Overrides come from the env, per upstream NAME (FREEDCAMP,
+SLACK, SHEETS):
+
+  RESILIENCE_<NAME>_TIMEOUTS          "endpoint=seconds,..." ("*" = default)
+  RESILIENCE_<NAME>_MAX_CONCURRENCY   upper bound of the adaptive limit
+  RESILIENCE_<NAME>_LATENCY_TARGET    seconds; default 2x the observed baseline
+  RESILIENCE_<NAME>_FAILURE_THRESHOLD consecutive failures that open the circuit
+  RESILIENCE_<NAME>_RESET_SECONDS     open -> half-open delay
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.transitions: Counter = Counter()
+        self.rejected = 0
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()  # the sheet writer calls in from its own thread
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def record_cancelled(self) -> None:
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _transition(self, state: str) -> None:
+        self.transitions[f"{self.state}->{state}"] += 1
+        log = logger.warning if state == OPEN else logger.info
+        log(f"Circuit {self.name}: {self.state} -> {state}")
+        self.state = state
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit driven by observed call latency."""
+
+    DECREASE_COOLDOWN = 1.0  # at most one multiplicative decrease per second
+
+    def __init__(self, name: str, initial: int = 4, min_limit: int = 1, max_limit: int = 32,
+                 latency_target: Optional[float] = None, tolerance: float = 2.0, backoff: float = 0.7):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self._baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def target(self) -> Optional[float]:
+        if self.latency_target is not None:
+            return self.latency_target
+        return self._baseline * self.tolerance if self._baseline is not None else None
+
+    async def acquire(self) -> None:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    self._wake()  # pass the slot we were woken for to the next waiter
+                raise
+        self.in_flight += 1
+
+    def release(self, latency: float, ok: bool) -> None:
+        self.in_flight -= 1
+        target = self.target
+        if ok:
+            # Baseline: the no-load latency, tracked as a slowly rising minimum
+            if self._baseline is None or latency < self._baseline:
+                self._baseline = latency
+            else:
+                self._baseline += (latency - self._baseline) * 0.01
+        if not ok or (target is not None and latency > target):
+            now = time.monotonic()
+            if now - self._last_decrease >= self.DECREASE_COOLDOWN:
+                self._last_decrease = now
+                new_limit = max(float(self.min_limit), self.limit * self.backoff)
+                if int(new_limit) < int(self.limit):
+                    self.decreases += 1
+                    logger.info(f"Limiter {self.name}: limit {int(self.limit)} -> {int(new_limit)} (latency {latency:.2f}s)")
+                self.limit = new_limit
+        elif self.limit < self.max_limit:
+            new_limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            if int(new_limit) > int(self.limit):
+                self.increases += 1
+            self.limit = new_limit
+        self._wake()
+
+    def _wake(self) -> None:
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                try:
+                    waiter.set_result(None)
+                except RuntimeError:  # its loop is gone (a finished asyncio.run)
+                    continue
+                free -= 1
+
+
+def _default_is_failure(exc: BaseException) -> bool:
+    return True
+
+
+class Upstream:
+    """Timeouts + adaptive limit + circuit breaker for one external service."""
+
+    def __init__(self, name: str, timeouts: Optional[Dict[str, float]] = None, default_timeout: float = 15.0,
+                 breaker: Optional[CircuitBreaker] = None, limiter: Optional[AdaptiveLimiter] = None,
+                 is_failure: Callable[[BaseException], bool] = _default_is_failure):
+        self.name = name
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = self.timeouts.pop("*", default_timeout)
+        self.breaker = breaker or CircuitBreaker(name)
+        self.limiter = limiter or AdaptiveLimiter(name)
+        self.is_failure = is_failure
+        self.calls = 0
+        self.timeouts_hit = 0
+
+    def timeout_for(self, endpoint: str) -> float:
+        return self.timeouts.get(endpoint, self.default_timeout)
+
+    async def call(self, endpoint: str, func: Callable[[], Awaitable[Any]],
+                   failed: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Await func() under this upstream's guard; `failed(result)` flags e.g. 5xx responses."""
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+        try:
+            await self.limiter.acquire()
+        except BaseException:
+            self.breaker.record_cancelled()  # never got a slot: free a half-open trial for the next caller
+            raise
+        self.calls += 1
+        started = time.monotonic()
+        ok: Optional[bool] = None  # None: the caller was cancelled, which says nothing about the upstream
+        try:
+            result = await asyncio.wait_for(func(), timeout=self.timeout_for(endpoint))
+            ok = not (failed and failed(result))
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts_hit += 1
+            ok = False
+            raise
+        except Exception as e:
+            ok = not self.is_failure(e)
+            raise
+        finally:
+            self.limiter.release(time.monotonic() - started, ok is not False)
+            if ok is None:
+                self.breaker.record_cancelled()
+            elif ok:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+
+    def call_sync(self, endpoint: str, func: Callable[[], Any]) -> Any:
+        """Blocking variant (breaker only) for thread-bound clients such as gspread."""
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+        self.calls += 1
+        try:
+            result = func()
+        except Exception as e:
+            if self.is_failure(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "transitions": dict(self.breaker.transitions),
+            "rejected": self.breaker.rejected,
+            "calls": self.calls,
+            "timeouts": self.timeouts_hit,
+            "limit": int(self.limiter.limit),
+            "in_flight": self.limiter.in_flight,
+            "limit_increases": self.limiter.increases,
+            "limit_decreases": self.limiter.decreases,
+            "latency_target": self.limiter.target,
+        }
+
+
+# ------------------------------------------------------------------ registry
+def parse_timeouts(spec: str) -> Dict[str, float]:
+    """'/tasks=10, *=15' -> {'/tasks': 10.0, '*': 15.0}"""
+    timeouts = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            endpoint, seconds = part.split("=", 1)
+            timeouts[endpoint.strip()] = float(seconds)
+    return timeouts
+
+
+_upstreams: Dict[str, Upstream] = {}
+_registry_lock = threading.Lock()
+
+
+def get_upstream(name: str, timeouts: Optional[Dict[str, float]] = None, default_timeout: float = 15.0,
+                 max_concurrency: int = 32, is_failure: Callable[[BaseException], bool] = _default_is_failure) -> Upstream:
+    """Process-wide guard for `name`; the arguments are defaults that RESILIENCE_<NAME>_* env vars override."""
+    with _registry_lock:
+        upstream = _upstreams.get(name)
+        if upstream is None:
+            prefix = f"RESILIENCE_{name.upper()}_"
+            target = os.getenv(prefix + "LATENCY_TARGET")
+            upstream = _upstreams[name] = Upstream(
+                name,
+                timeouts={**(timeouts or {}), **parse_timeouts(os.getenv(prefix + "TIMEOUTS", ""))},
+                default_timeout=default_timeout,
+                breaker=CircuitBreaker(
+                    name,
+                    failure_threshold=int(os.getenv(prefix + "FAILURE_THRESHOLD", "5")),
+                    reset_timeout=float(os.getenv(prefix + "RESET_SECONDS", "30")),
+                ),
+                limiter=AdaptiveLimiter(
+                    name,
+                    max_limit=int(os.getenv(prefix + "MAX_CONCURRENCY", str(max_concurrency))),
+                    latency_target=float(target) if target else None,
+                ),
+                is_failure=is_failure,
+            )
+        return upstream
+
+
+def resilience_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: upstream.stats() for name, upstream in _upstreams.items()}
@@ -0,0 +1,181 @@
+# services/scheduler.py
+"""
+Fair-share ordering of orchestration jobs across users.
+
+JobQueue workers take their next job from here instead of a FIFO, so one
+person pasting twenty summaries (or a noisy integration) cannot hold every
+LLM and Freedcamp slot while everyone else's one-line DMs wait.
+
+- Two lanes. "interactive" carries short single-task DMs; "bulk" carries
+  long multi-task pastes. Lanes are served in weighted round-robin
+  (INTERACTIVE_WEIGHT turns to one bulk turn). Bulk jobs never occupy more
+  than `bulk_max_in_flight` workers, so some are always free for
+  interactive work.
+- Inside a lane, deficit round-robin over per-user queues. Each user gets
+  `quantum` credits per round, and a job costs its number of tasks, so a
+  20-task paste is paid for over several rounds.
+- No user has more than `user_max_in_flight` jobs running at once. Jobs
+  without a user (plain JobQueue.submit) share one queue and are not capped.
+
+Not thread-safe: it is only touched from the event loop that runs the
+queue.
+"""
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Tuple
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+_ITEM_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+\S", re.MULTILINE)
+
+
+def classify(text: str, bulk_min_items: int = 3, bulk_min_chars: int = 800) -> Tuple[str, int]:
+    """(lane, cost) for a DM: list-like or long messages are bulk and cost one credit per item."""
+    items = len(_ITEM_RE.findall(text or ""))
+    if items >= bulk_min_items or len(text or "") >= bulk_min_chars:
+        return BULK, max(items, 1 + len(text or "") // bulk_min_chars)
+    return INTERACTIVE, 1
+
+
+@dataclass
+class _WaitStats:
+    jobs: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    last: float = 0.0
+
+
+class _Lane:
+    def __init__(self):
+        self.queues: Dict[str, Deque[Any]] = {}
+        self.active: Deque[str] = deque()  # users with queued jobs, in round-robin order
+        self.deficit: Dict[str, float] = {}
+        self.depth = 0
+        self.in_flight = 0
+
+
+class FairScheduler:
+    def __init__(self, quantum: float = 1.0, user_max_in_flight: int = 2, bulk_max_in_flight: int = 2,
+                 interactive_weight: int = 4, tracked_users: int = 500):
+        self.quantum = max(quantum, 0.01)
+        self.user_max_in_flight = max(1, user_max_in_flight)
+        self.bulk_max_in_flight = max(1, bulk_max_in_flight)
+        self.interactive_weight = max(1, interactive_weight)
+        self.tracked_users = tracked_users
+        self._lanes = {lane: _Lane() for lane in LANES}
+        self._in_flight: Dict[str, int] = {}
+        self._turn = 0
+        self._waits: "OrderedDict[str, _WaitStats]" = OrderedDict()
+        self._lane_waits = {lane: _WaitStats() for lane in LANES}
+
+    # ------------------------------------------------------------------ public
+    def push(self, job: Any) -> None:
+        """Queue a job; it needs `user`, `lane`, `cost` and `enqueued_at` attributes."""
+        if job.lane not in self._lanes:
+            job.lane = INTERACTIVE
+        lane = self._lanes[job.lane]
+        queue = lane.queues.get(job.user)
+        if queue is None:
+            queue = lane.queues[job.user] = deque()
+            lane.active.append(job.user)
+            lane.deficit[job.user] = 0.0
+        queue.append(job)
+        lane.depth += 1
+
+    def pop(self) -> Optional[Any]:
+        """Next job that may start now, or None if everything queued is held back by a cap."""
+        first = BULK if self._turn % (self.interactive_weight + 1) == self.interactive_weight else INTERACTIVE
+        for name in (first, BULK if first == INTERACTIVE else INTERACTIVE):
+            if name == BULK and self._lanes[BULK].in_flight >= self.bulk_max_in_flight:
+                continue
+            job = self._pop_lane(self._lanes[name])
+            if job is not None:
+                self._turn += 1
+                self._started(job, name)
+                return job
+        return None
+
+    def done(self, job: Any) -> None:
+        """A job returned by pop() finished; frees its user and lane slots."""
+        self._lanes[job.lane].in_flight -= 1
+        left = self._in_flight.get(job.user, 0) - 1
+        if left > 0:
+            self._in_flight[job.user] = left
+        else:
+            self._in_flight.pop(job.user, None)
+
+    def __len__(self) -> int:
+        return sum(lane.depth for lane in self._lanes.values())
+
+    def stats(self, top: int = 10) -> Dict[str, Any]:
+        """Per-lane depth and wait, plus the `top` users with the worst max wait."""
+        slowest = sorted(self._waits.items(), key=lambda kv: kv[1].max, reverse=True)[:top]
+        return {
+            "lanes": {
+                name: {
+                    "depth": lane.depth,
+                    "in_flight": lane.in_flight,
+                    "users_waiting": len(lane.active),
+                    **_wait_fields(self._lane_waits[name]),
+                }
+                for name, lane in self._lanes.items()
+            },
+            "users": {user: _wait_fields(w) for user, w in slowest},
+        }
+
+    # ------------------------------------------------------------------ internals
+    def _pop_lane(self, lane: _Lane) -> Optional[Any]:
+        skipped = 0
+        while lane.active and skipped < len(lane.active):
+            user = lane.active[0]
+            if user and self._in_flight.get(user, 0) >= self.user_max_in_flight:
+                lane.active.rotate(-1)
+                skipped += 1
+                continue
+            queue = lane.queues[user]
+            job = queue[0]
+            if lane.deficit[user] < job.cost:
+                # Not enough credit yet: top up and let the next user go first
+                lane.deficit[user] += self.quantum
+                lane.active.rotate(-1)
+                skipped = 0
+                continue
+            queue.popleft()
+            lane.depth -= 1
+            lane.deficit[user] -= job.cost
+            if not queue:
+                lane.active.popleft()
+                del lane.queues[user]
+                del lane.deficit[user]
+            return job
+        return None
+
+    def _started(self, job: Any, lane: str) -> None:
+        self._lanes[lane].in_flight += 1
+        self._in_flight[job.user] = self._in_flight.get(job.user, 0) + 1
+        wait = time.monotonic() - job.enqueued_at
+        tracked = [self._lane_waits[lane]]
+        if job.user:
+            stats = self._waits.pop(job.user, None) or _WaitStats()
+            self._waits[job.user] = stats  # most recently active users last; the oldest are evicted
+            if len(self._waits) > self.tracked_users:
+                self._waits.popitem(last=False)
+            tracked.append(stats)
+        for s in tracked:
+            s.jobs += 1
+            s.total += wait
+            s.max = max(s.max, wait)
+            s.last = wait
+
+
+def _wait_fields(w: _WaitStats) -> Dict[str, Any]:
+    return {
+        "jobs": w.jobs,
+        "wait_avg_s": round(w.total / w.jobs, 4) if w.jobs else 0.0,
+        "wait_max_s": round(w.max, 4),
+        "wait_last_s": round(w.last, 4),
+    }
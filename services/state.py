@@ -0,0 +1,264 @@
+# services/state.py
+"""
+Pluggable key/value store for state that every worker process must share.
+
+Used for Slack dedup keys, the directory refresh lock and the per-channel
+Slack send slots. The draft cache and the outbox already live in SQLite
+files that all workers open.
+
+  sqlite   (default) one WAL-mode file under data/. Every worker on the host
+           opens it, and writes are serialized with BEGIN IMMEDIATE.
+  memory   single process only (tests, `python main.py`)
+  redis    anything with redis-py's get / set(nx=, px=) / delete /
+           register_script, e.g. a real Redis at REDIS_URL or a local
+           stand-in passed as `client`
+
+Code on the event loop uses the *_async variants (set_if_absent_async,
+delete_async, reserve_async). They run the blocking SQLite or Redis round
+trip in a thread; the memory backend answers inline.
+
+Env: STATE_BACKEND (sqlite|memory|redis), STATE_PATH (sqlite file),
+REDIS_URL (redis backend).
+"""
+import os
+import abc
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StateBackend(abc.ABC):
+    """Values are strings, ttl is in seconds (None = no expiry)."""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abc.abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abc.abstractmethod
+    def set_if_absent(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """Atomically store `key` unless an unexpired value exists; True if stored."""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def reserve(self, key: str, interval: float) -> float:
+        """Atomically claim the next `interval`-spaced slot of a shared rate limit; returns seconds to wait for it."""
+
+    # The *_async variants don't block the event loop on the backend's I/O
+    async def set_if_absent_async(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return await asyncio.to_thread(self.set_if_absent, key, value, ttl)
+
+    async def delete_async(self, key: str) -> None:
+        await asyncio.to_thread(self.delete, key)
+
+    async def reserve_async(self, key: str, interval: float) -> float:
+        return await asyncio.to_thread(self.reserve, key, interval)
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBackend(StateBackend):
+    def __init__(self):
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= now:
+            del self._data[key]
+            return None
+        return item[0]
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._live(key, time.time())
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl is not None else None)
+
+    def set_if_absent(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        with self._lock:
+            if self._live(key, now) is not None:
+                return False
+            self._data[key] = (value, now + ttl if ttl is not None else None)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def reserve(self, key: str, interval: float) -> float:
+        now = time.time()
+        with self._lock:
+            slot = max(now, float(self._live(key, now) or 0.0))
+            self._data[key] = (repr(slot + interval), slot + interval + 60.0)
+            return slot - now
+
+    # Dict updates; no thread hop needed
+    async def set_if_absent_async(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return self.set_if_absent(key, value, ttl)
+
+    async def delete_async(self, key: str) -> None:
+        self.delete(key)
+
+    async def reserve_async(self, key: str, interval: float) -> float:
+        return self.reserve(key, interval)
+
+
+class SQLiteBackend(StateBackend):
+    PRUNE_EVERY = 500
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS kv_expires ON kv (expires_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl if ttl is not None else None),
+            )
+            self._wrote()
+
+    def set_if_absent(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        with self._lock, self._immediate():
+            self._db.execute("DELETE FROM kv WHERE key = ? AND expires_at <= ?", (key, now))
+            cur = self._db.execute(
+                "INSERT OR IGNORE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + ttl if ttl is not None else None),
+            )
+            stored = cur.rowcount == 1
+        if stored:
+            with self._lock:
+                self._wrote()
+        return stored
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def reserve(self, key: str, interval: float) -> float:
+        now = time.time()
+        with self._lock, self._immediate():
+            row = self._db.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, now)
+            ).fetchone()
+            slot = max(now, float(row[0]) if row else 0.0)
+            self._db.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, repr(slot + interval), slot + interval + 60.0),
+            )
+        return slot - now
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    @contextmanager
+    def _immediate(self) -> Iterator[None]:
+        # Take the write lock up front so a read-modify-write is atomic across processes
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def _wrote(self) -> None:
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._db.execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+
+
+class RedisBackend(StateBackend):
+    # Read, advance and store the slot in one step on the server, using the server's clock
+    # so workers on different hosts agree. Returns the seconds to wait as a string.
+    RESERVE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local slot = tonumber(redis.call('GET', KEYS[1]) or '0')
+if slot < now then slot = now end
+redis.call('SET', KEYS[1], string.format('%.6f', slot + interval),
+           'PX', math.ceil((slot + interval - now + 60) * 1000))
+return string.format('%.6f', slot - now)
+"""
+
+    def __init__(self, client: Any = None, url: Optional[str] = None, prefix: str = "xizor:"):
+        if client is None:
+            import redis  # optional dependency, only needed for STATE_BACKEND=redis
+            client = redis.Redis.from_url(url or os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                                          decode_responses=True)
+        self._r = client
+        self.prefix = prefix
+        self._reserve = client.register_script(self.RESERVE_SCRIPT)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._r.get(self.prefix + key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self._r.set(self.prefix + key, value, px=int(ttl * 1000) if ttl is not None else None)
+
+    def set_if_absent(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return bool(self._r.set(self.prefix + key, value, nx=True, px=int(ttl * 1000) if ttl is not None else None))
+
+    def delete(self, key: str) -> None:
+        self._r.delete(self.prefix + key)
+
+    def reserve(self, key: str, interval: float) -> float:
+        wait = self._reserve(keys=[self.prefix + key], args=[interval])
+        return float(wait.decode() if isinstance(wait, bytes) else wait)
+
+
+_backend: Optional[StateBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_state_backend() -> StateBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            kind = os.getenv("STATE_BACKEND", "sqlite").lower()
+            if kind == "memory":
+                _backend = MemoryBackend()
+            elif kind == "redis":
+                _backend = RedisBackend()
+            elif kind == "sqlite":
+                _backend = SQLiteBackend(os.getenv("STATE_PATH", "data/state.sqlite3"))
+            else:
+                raise ValueError(f"Unknown STATE_BACKEND '{kind}' (expected sqlite, memory or redis)")
+            logger.info(f"Shared state backend: {kind}")
+        return _backend
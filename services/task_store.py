@@ -0,0 +1,292 @@
+# services/task_store.py
+"""
+Local read copy of the project's Freedcamp tasks for "what is on my plate".
+
+Answering "my tasks due this week" by paging through Freedcamp on every DM
+would be slow and would eat into its rate limit. This store keeps one row
+per task in SQLite, indexed on (assignee, status, due date), and a
+background loop keeps it fresh. Each pass pulls only the tasks whose
+updated_ts is past the stored watermark (FreedcampTaskFetcher stops at the
+first older one). A query is one indexed SELECT. Every answer carries the
+age of the last successful sync, so users can see how fresh it is.
+
+An incremental pass never sees a task that was deleted or moved to another
+project. So every `reconcile_interval` the pass is a full walk instead, and
+rows the walk did not return are pruned.
+
+With several workers, one worker syncs per round (a lock in the shared state
+backend), and the others read the same file.
+"""
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+COMPLETED = 1  # Freedcamp task status: 0 open, 1 completed, 2 in progress
+STATUS_NAMES = {0: "open", 1: "completed", 2: "in progress"}
+
+
+@dataclass
+class StoredTask:
+    task_id: str
+    title: str
+    url: Optional[str]
+    assignee_id: int
+    status: int
+    priority: int
+    due_date: Optional[str]  # YYYY-MM-DD
+    updated_ts: int
+
+
+def _due_date(task: Dict[str, Any]) -> Optional[str]:
+    due = task.get("due_date")
+    if due:
+        return str(due)[:10]
+    ts = task.get("due_ts")
+    if ts and str(ts).isdigit() and int(ts) > 0:
+        return datetime.fromtimestamp(int(ts), tz=timezone.utc).date().isoformat()
+    return None
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class TaskStore:
+    PAGE_SIZE = 100  # tasks fetched per request, and written per transaction
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                url TEXT,
+                assignee_id INTEGER NOT NULL DEFAULT 0,
+                status INTEGER NOT NULL DEFAULT 0,
+                priority INTEGER NOT NULL DEFAULT 0,
+                due_date TEXT,
+                updated_ts INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS tasks_assignee ON tasks (assignee_id, status, due_date)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS tasks_due ON tasks (due_date)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.queries = 0
+
+    # ------------------------------------------------------------------ public
+    def upsert(self, task: Dict[str, Any]) -> None:
+        """Store one raw Freedcamp task object."""
+        self._write([task])
+
+    def open_tasks(self, assignee_id: int, due_from: Optional[str] = None, due_to: Optional[str] = None,
+                   limit: int = 50) -> List[StoredTask]:
+        """Not-completed tasks of one assignee, soonest due first (undated last); bounds are inclusive ISO dates."""
+        sql = "SELECT id, title, url, assignee_id, status, priority, due_date, updated_ts FROM tasks" \
+              " WHERE assignee_id = ? AND status != ?"
+        params: List[Any] = [assignee_id, COMPLETED]
+        if due_from:
+            sql += " AND due_date >= ?"
+            params.append(due_from)
+        if due_to:
+            sql += " AND due_date <= ?"
+            params.append(due_to)
+        sql += " ORDER BY due_date IS NULL, due_date, priority DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            self.queries += 1
+            rows = self._db.execute(sql, params).fetchall()
+        return [StoredTask(*row) for row in rows]
+
+    @property
+    def watermark(self) -> int:
+        return int(self._meta("synced_updated_ts") or 0)
+
+    def last_sync_at(self) -> Optional[float]:
+        value = self._meta("last_sync_at")
+        return float(value) if value else None
+
+    def staleness(self) -> Optional[float]:
+        """Seconds since the last successful sync (by any worker), None if never synced."""
+        synced = self.last_sync_at()
+        return max(0.0, time.time() - synced) if synced else None
+
+    def last_reconcile_at(self) -> Optional[float]:
+        value = self._meta("last_reconcile_at")
+        return float(value) if value else None
+
+    async def sync(self, fetcher) -> int:
+        """Store every task updated since the watermark; `fetcher` is a FreedcampTaskFetcher."""
+        since = self.watermark
+        newest = since
+        count = 0
+        batch: List[Dict[str, Any]] = []
+        async for t in fetcher.iter_updated_since(since, self.PAGE_SIZE):
+            batch.append(t)
+            newest = max(newest, _int(t.get("updated_ts") or t.get("created_ts")))
+            count += 1
+            if len(batch) >= self.PAGE_SIZE:
+                await asyncio.to_thread(self._write, batch)
+                batch = []
+        meta = {"last_sync_at": repr(time.time())}
+        if newest > since:
+            meta["synced_updated_ts"] = str(newest)
+        await asyncio.to_thread(self._write, batch, meta)
+        return count
+
+    async def reconcile(self, fetcher) -> int:
+        """Full walk of the project: store every task, then prune rows it did not return; returns the pruned count."""
+        seen = set()
+        newest = self.watermark
+        batch: List[Dict[str, Any]] = []
+        async for t in fetcher.iter_tasks(self.PAGE_SIZE):
+            batch.append(t)
+            seen.add(str(t["id"]))
+            newest = max(newest, _int(t.get("updated_ts") or t.get("created_ts")))
+            if len(batch) >= self.PAGE_SIZE:
+                await asyncio.to_thread(self._write, batch)
+                batch = []
+        # Only reached when the walk completed; a failed page raises before anything is pruned
+        now = repr(time.time())
+        meta = {"synced_updated_ts": str(newest), "last_sync_at": now, "last_reconcile_at": now}
+        return await asyncio.to_thread(self._write, batch, meta, seen)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total, open_ = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(status != ?), 0) FROM tasks", (COMPLETED,)
+            ).fetchone()
+        staleness = self.staleness()
+        return {
+            "tasks": total,
+            "open": open_,
+            "queries": self.queries,
+            "staleness_s": round(staleness, 1) if staleness is not None else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ------------------------------------------------------------------ internals
+    def _meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _write(self, tasks: List[Dict[str, Any]], meta: Optional[Dict[str, str]] = None,
+               keep: Optional[set] = None) -> int:
+        """One transaction: upsert `tasks`, set `meta`, and, if `keep` is given, prune every other row.
+
+        Blocking; sync() and reconcile() run it in a thread, one page at a time. Returns the pruned count.
+        """
+        rows = [self._row(t) for t in tasks]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO tasks (id, title, url, assignee_id, status, priority, due_date, updated_ts)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows,
+                )
+                gone = []
+                if keep is not None:
+                    gone = [(row[0],) for row in self._db.execute("SELECT id FROM tasks") if row[0] not in keep]
+                    self._db.executemany("DELETE FROM tasks WHERE id = ?", gone)
+                self._db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (meta or {}).items())
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        return len(gone)
+
+    @staticmethod
+    def _row(task: Dict[str, Any]) -> tuple:
+        url = task.get("url")
+        if url and url.startswith("/"):
+            url = f"https://freedcamp.com{url}"
+        return (str(task["id"]), task.get("title") or "", url, _int(task.get("assigned_to_id")),
+                _int(task.get("status")), _int(task.get("priority")), _due_date(task),
+                _int(task.get("updated_ts") or task.get("created_ts")))
+
+
+class TaskStoreService:
+    """Background sync of the store, incremental with a periodic full reconcile; one worker syncs per round."""
+
+    SYNC_LOCK = "task_store:sync"
+
+    def __init__(self, store: TaskStore, interval: float = 120.0, reconcile_interval: float = 3600.0, state=None):
+        self.store = store
+        self.interval = interval
+        self.reconcile_interval = reconcile_interval
+        self._state = state
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop(), name="task-store-sync")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def sync_once(self, fetcher=None) -> Optional[int]:
+        """Tasks updated (or pruned, on a reconcile round), or None when another worker holds the sync lock."""
+        if self._state is None:
+            from services.state import get_state_backend
+            self._state = get_state_backend()
+        if not await self._state.set_if_absent_async(self.SYNC_LOCK, str(os.getpid()), ttl=self.interval):
+            return None
+        if fetcher is None:
+            from FreedcampTaskFetcher import FreedcampTaskFetcher
+            fetcher = FreedcampTaskFetcher()
+        last = self.store.last_reconcile_at()
+        if self.reconcile_interval and (last is None or time.time() - last >= self.reconcile_interval):
+            pruned = await self.store.reconcile(fetcher)
+            logger.info(f"Task store reconciled: {pruned} deleted or moved task(s) pruned")
+            return pruned
+        count = await self.store.sync(fetcher)
+        logger.info(f"Task store synced: {count} task(s) updated")
+        return count
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.sync_once()
+            except Exception:
+                logger.exception("Task store sync failed; answers keep using the current copy")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.store.stats()
+
+
+_service: Optional[TaskStoreService] = None
+
+
+def get_task_store_service() -> TaskStoreService:
+    """TASK_STORE_PATH / TASK_STORE_SYNC_SECONDS / TASK_STORE_RECONCILE_SECONDS (0 disables the full walk)."""
+    global _service
+    if _service is None:
+        _service = TaskStoreService(
+            TaskStore(os.getenv("TASK_STORE_PATH", "data/task_store.sqlite3")),
+            interval=float(os.getenv("TASK_STORE_SYNC_SECONDS", "120")),
+            reconcile_interval=float(os.getenv("TASK_STORE_RECONCILE_SECONDS", "3600")),
+        )
+    return _service
@@ -1,153 +1,248 @@
 import os
+import time
+import asyncio
 import logging
+from datetime import date
 from fastapi import FastAPI, Request, Header, Response
-from slack_sdk import WebClient
-from slack_sdk.signature import SignatureVerifier
 from dotenv import load_dotenv
-import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from pm_agents.orchestrator_agent import OrchestratorResponse, get_orchestrator, get_outbox_dispatcher
+from services.job_queue import get_job_queue
+from services.dedup import get_deduplicator
+from services.admission import BUSY_MESSAGE, SHED, get_admission
+from services.coalescer import coalescer_from_env
+from services.scheduler import classify
+from services.directory import get_directory
+from services.draft_cache import get_draft_cache
+from services.duplicate_index import get_duplicate_service
+from services.task_store import get_task_store_service
+from services.outbox import get_outbox
+from services.resilience import resilience_stats
+from services.ingress import ACCEPT, CHALLENGE, REJECT, Ingress
+from services import metrics
+from services.logging_setup import configure_logging, logging_stats
+from pm_agents.draft_router import get_draft_router
+from pm_agents.task_query import TaskQuery, parse_query
+from tools.freedcamp_client import get_freedcamp_client
+from tools.slack_sender import get_slack_sender
+from tools.slack_blocks import (progress_blocks, progress_text, result_blocks, result_text, error_blocks,
+                                task_list_blocks, task_list_text)
 
-from agents import Runner
-from pm_agents import OrchestratorAgent
-from pm_agents.orchestrator_agent import OrchestratorResponse
-
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
+configure_logging()  # queue-backed JSON lines in logs/; levels from LOG_LEVEL / LOG_LEVELS
 app = FastAPI()
 
 slack_token = os.getenv("SLACK_BOT_TOKEN")
 signing_secret = os.getenv("SLACK_SIGNING_SECRET")
-client = WebClient(token=slack_token)
-verifier = SignatureVerifier(signing_secret)
+sender = get_slack_sender()
+ingress = Ingress(signing_secret)
+job_queue = get_job_queue()
+deduplicator = get_deduplicator()
+directory = get_directory()
+admission = get_admission()
 
 @dataclass
 class SlackContext:
     channel: str
     user: str
+    event_id: str = ""  # stable across Slack redeliveries; keys the outbox entries of this message
+    trace_id: str = ""  # ties the request's spans and log lines together
+    received_at: float = field(default_factory=time.monotonic)
+
+
+async def handle_message(context: SlackContext, text: str) -> None:
+    """Run the orchestration for one DM and post the outcome back to the channel."""
+    metrics.new_trace(context.trace_id)
+    try:
+        with metrics.span("request"):
+            await _handle_message(context, text)
+    finally:
+        admission.record(time.monotonic() - context.received_at)
+
+
+async def _handle_message(context: SlackContext, text: str) -> None:
+    channel = context.channel
+
+    # One message per request: post the ack now, then edit it in place with the outcome
+    ack_text = "Processing your request..."
+    ack_ts = await sender.post(channel, ack_text, blocks=progress_blocks(ack_text))
+
+    async def reply(text: str, blocks) -> None:
+        if ack_ts:
+            await sender.update(channel, ack_ts, text, blocks=blocks)
+        else:
+            await sender.post(channel, text, blocks=blocks)
+
+    async def on_progress(fields) -> None:
+        # Fire and forget: the sender coalesces queued edits of the ack, so the stream never waits on Slack
+        if ack_ts:
+            text_now = progress_text(fields)
+            asyncio.ensure_future(sender.update(channel, ack_ts, text_now, blocks=progress_blocks(text_now)))
+
+    try:
+        with metrics.span("orchestrate"):
+            result: OrchestratorResponse = await get_orchestrator().run(text, context, on_progress=on_progress)
+
+        if result.results:
+            await reply(result_text(result), result_blocks(result))
+        else:
+            error_message = f":warning: {result.message}"
+            await reply(error_message, error_blocks(error_message))
+    except Exception as e:
+        # Handle any errors
+        logger.error(f"Error processing request: {str(e)}", exc_info=True)
+        error_msg = f":x: An error occurred: {str(e)}"
+        await reply(error_msg, error_blocks(error_msg))
+
+
+async def answer_task_query(context: SlackContext, query: TaskQuery) -> None:
+    """Answer a "my tasks ..." DM from the local task store; no agent or Freedcamp call."""
+    metrics.new_trace(context.trace_id)
+    with metrics.span("tasks.query"):
+        fc_id = directory.resolve_sender(context.user)
+        store = get_task_store_service().store
+        tasks = store.open_tasks(fc_id, query.due_from, query.due_to) if fc_id else []
+        staleness = store.staleness()
+    if not fc_id:
+        text = ":warning: I couldn't match your Slack account to a Freedcamp user, so I can't list your tasks."
+        await sender.post(context.channel, text, blocks=error_blocks(text))
+        return
+    await sender.post(context.channel, task_list_text(tasks, query.label, staleness),
+                      blocks=task_list_blocks(tasks, query.label, staleness))
+
+
+def _submit_burst(key: str, items) -> None:
+    """Queue one request for a burst of DMs: the first message's context, the texts joined line by line."""
+    context = items[0][0]
+    text = "\n".join(text for _, text in items)
+    if len(items) > 1:
+        logger.info(f"[trace {context.trace_id}] Joined {len(items)} DMs from {context.user} into one request")
+    # Multi-task pastes go to the bulk lane so they never hold up single-task DMs
+    lane, cost = classify(text)
+    decision = admission.check(job_queue.stats(), lane, context.user)
+    if decision.action == SHED:
+        logger.warning(f"[trace {context.trace_id}] Shedding {lane} request from {context.user}: {decision.reason}")
+        _reply_busy(context, decision.notify)
+        return
+    try:
+        job_queue.submit_for(context.user, lane, cost, "slack_dm", handle_message, context, text)
+    except asyncio.QueueFull:
+        logger.warning(f"Job queue full, dropping event from {context.user}")
+        _reply_busy(context, admission.should_notify(context.user))
+
+
+def _reply_busy(context: SlackContext, notify: bool) -> None:
+    # One cheap post, no agent work; skipped if this user was told recently
+    if notify:
+        asyncio.ensure_future(sender.post(context.channel, BUSY_MESSAGE))
+
+
+coalescer = coalescer_from_env(_submit_burst)
+
+
+@app.on_event("startup")
+async def _start_job_queue():
+    # Pre-warm the shared agent graph and caches so the first DM does not pay for them
+    get_orchestrator()
+    get_draft_router()
+    get_draft_cache()
+    job_queue.start()
+    directory.start()
+    get_outbox_dispatcher().start()
+    get_duplicate_service().start()
+    get_task_store_service().start()
+
+
+@app.on_event("shutdown")
+async def _stop_job_queue():
+    # Let queued and in-flight DMs finish before the worker exits (serve.py drains connections first)
+    coalescer.flush_all()
+    await job_queue.stop(drain_timeout=float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "25")))
+    await get_outbox_dispatcher().stop()
+    await get_duplicate_service().stop()
+    await get_task_store_service().stop()
+    await directory.stop()
+    await sender.aclose()
+    await get_freedcamp_client().aclose()
+
+
+STATS_SOURCES = {
+    "job_queue": job_queue.stats,
+    "dedup": deduplicator.stats,
+    "directory": directory.stats,
+    "slack_sender": sender.stats,
+    "draft_cache": lambda: get_draft_cache().stats(),
+    "draft_routing": lambda: get_draft_router().stats(),
+    "outbox": lambda: get_outbox().stats(),
+    "duplicates": lambda: get_duplicate_service().stats(),
+    "task_store": lambda: get_task_store_service().stats(),
+    "resilience": resilience_stats,
+    "ingress": ingress.stats,
+    "coalescer": coalescer.stats,
+    "admission": admission.stats,
+    "logging": logging_stats,
+}
+for _name, _source in STATS_SOURCES.items():
+    metrics.add_stats(_name, _source)
+
+
+@app.get("/stats")
+async def stats():
+    return {name: source() for name, source in STATS_SOURCES.items()}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition: stage latency histograms plus every /stats counter."""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
 
 @app.post("/slack/events")
 async def slack_events(
     request: Request,
     x_slack_signature: str = Header(None),
-    x_slack_request_timestamp: str = Header(None)
+    x_slack_request_timestamp: str = Header(None),
+    x_slack_retry_num: str = Header(None)
 ):
+    # Verify, parse once and route on the envelope before building anything
     body = await request.body()
-    if not verifier.is_valid_request(body, {
-        "X-Slack-Signature": x_slack_signature,
-        "X-Slack-Request-Timestamp": x_slack_request_timestamp
-    }):
+    with metrics.span("slack.verify"):
+        decision = ingress.handle(body, x_slack_request_timestamp, x_slack_signature)
+    if decision.action == REJECT:
         return Response(content="Invalid request", status_code=403)
 
-    data = await request.json()
-
     # Slack URL verification challenge
-    if data.get("type") == "url_verification":
-        return Response(content=data.get("challenge"), media_type="text/plain")
-
-    # Handle message events
-    if "event" in data:
-        event = data["event"]
-        if (
-            event.get("type") == "message"
-            and event.get("channel_type") == "im"
-            and "bot_id" not in event
-        ):
-            user = event["user"]
-            text = event["text"]
-            channel = event["channel"]
-
-            # Create context with Slack information
-            context = SlackContext(channel=channel, user=user)
-
-            # Send initial acknowledgment
-            client.chat_postMessage(
-                channel=channel, 
-                text="Processing your request... :hourglass_flowing_sand:"
-            )
-
-            try:
-                # Run the OrchestratorAgent to process the task with context
-                #logger.info("Running OrchestratorAgent...")
-                #run_result = await Runner.run(OrchestratorAgent(), text, context=context)
-                #run_result = await OrchestratorAgent().run(text, context)
-                result: OrchestratorResponse = await OrchestratorAgent().run(text, context)
-
-
-                #logger.info(f"OrchestratorAgent result: {run_result.final_output}")
-                
-                # Try to validate the response
-                #try:
-                    #result = OrchestratorResponse.model_validate(run_result.final_output)
-                    #logger.info(f"Validated response: {result}")
-                #except Exception as validation_error:
-                    #logger.error(f"Validation error: {validation_error}")
-                    #logger.error(f"Invalid response structure: {run_result.final_output}")
-                    #raise validation_error
-                
-                # Format the response message based on status
-                if result.status == "success" and result.task:
-                    # Get Freedcamp info if available
-                    freedcamp_info = result.freedcamp_info
-                    if freedcamp_info:
-                        freedcamp_task_id = freedcamp_info.task_id or "N/A"
-                        freedcamp_task_url = freedcamp_info.task_url or ""
-                        emoji = ":clipboard:" if freedcamp_info.success else ":warning:"
-                    else:
-                        freedcamp_task_id = "N/A"
-                        freedcamp_task_url = ""
-                        emoji = ":warning:"
-                    
-                    # Create task details message
-                    task = result.task
-                    
-                    # Create detailed message
-                    detailed_message = (
-                        f"{emoji} *Task Details*\n\n"
-                        f"*Title:* {task.title}\n"
-                        f"*Description:* {task.description}\n"
-                        f"*Assignee:* {task.assignee}\n"
-                        f"*Priority:* {task.priority}\n"
-                        f"*Due Date:* {task.due_date or 'Not specified'}"
-                    )
-                    
-                    # Add Freedcamp information if available
-                    if freedcamp_info and freedcamp_info.success:
-                        detailed_message += (
-                            f"\n\n*Freedcamp Information*\n"
-                            f"*Task ID:* {freedcamp_task_id}\n"
-                            f"*Task URL:* <{freedcamp_task_url}|Open in Freedcamp>"
-                        )
-                    
-                    # Send the detailed task message
-                    client.chat_postMessage(
-                        channel=channel,
-                        text=detailed_message,
-                        parse="mrkdwn"  # Enable markdown formatting
-                    )
-                    
-                    # Send a simple confirmation message for the operation result
-                    if freedcamp_info and freedcamp_info.success:
-                        confirmation = f":white_check_mark: Task '{task.title}' created successfully in Freedcamp!"
-                    else:
-                        confirmation = f":warning: Task created but Freedcamp integration failed: {freedcamp_info.error if freedcamp_info else 'Unknown error'}"
-                    
-                    client.chat_postMessage(
-                        channel=channel,
-                        text=confirmation
-                    )
-                else:
-                    # Send error message
-                    error_message = f":warning: {result.message}"
-                    client.chat_postMessage(channel=channel, text=error_message)
-            except Exception as e:
-                # Handle any errors
-                logger.error(f"Error processing request: {str(e)}", exc_info=True)
-                error_msg = f":x: An error occurred: {str(e)}"
-                client.chat_postMessage(channel=channel, text=error_msg)
+    if decision.action == CHALLENGE:
+        return Response(content=decision.challenge, media_type="text/plain")
+
+    # Handle DM events: enqueue and ack right away so Slack's 3s deadline is never hit
+    if decision.action == ACCEPT:
+        event = decision.event
+        # Drop Slack redeliveries and resent messages before any agent/API work
+        if await deduplicator.is_duplicate_async(decision.event_id, event.get("client_msg_id"), x_slack_retry_num):
+            logger.info(f"Duplicate event {decision.event_id} (retry {x_slack_retry_num}) ignored")
+            return Response(content="", status_code=200)
+
+        context = SlackContext(
+            channel=event["channel"],
+            user=event["user"],
+            event_id=decision.event_id or event.get("client_msg_id") or event.get("ts", ""),
+            trace_id=metrics.new_trace(),
+        )
+        # Read-only questions are answered from the local task store right away: no queue, no model
+        query = parse_query(event.get("text", ""), date.today())
+        if query is not None:
+            logger.info(f"[trace {context.trace_id}] Task query ({query.label}) from {context.user}")
+            asyncio.ensure_future(answer_task_query(context, query))
+            return Response(content="", status_code=200)
+
+        logger.info(f"[trace {context.trace_id}] DM from {context.user} queued")
+        # Quick follow-up lines from the same person join this one before drafting
+        coalescer.add(f"{context.channel}:{context.user}", (context, event["text"]))
 
     return Response(content="", status_code=200)
 
-# To run: uvicorn src.slack_events:app --reload --port 8080 
\ No newline at end of file
+# To run: python main.py (development) or python serve.py (several workers)
\ No newline at end of file
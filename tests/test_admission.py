@@ -0,0 +1,47 @@
+# tests/test_admission.py
+from services.admission import ADMIT, SHED, AdmissionController
+from services.scheduler import BULK, INTERACTIVE
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_depth_and_outstanding_limits():
+    ac = AdmissionController(max_depth=10, max_outstanding=12, clock=Clock())
+    assert ac.check({"depth": 3, "in_flight": 4, "workers": 4}, INTERACTIVE).action == ADMIT
+    assert ac.check({"depth": 10, "in_flight": 0}, INTERACTIVE).reason == "queue_depth"
+    assert ac.check({"depth": 8, "in_flight": 4}, INTERACTIVE).reason == "outstanding"
+    assert ac.stats()["shed:queue_depth"] == 1 and ac.stats()[ADMIT] == 1
+
+
+def test_latency_slo_sheds_bulk_first_and_recovers():
+    clock = Clock()
+    ac = AdmissionController(slo=5.0, window=60.0, min_samples=5, clock=clock)
+    for _ in range(10):
+        ac.record(20.0)
+    idle = {"depth": 0, "in_flight": 1, "workers": 4}
+    busy = {"depth": 3, "in_flight": 4, "workers": 4}
+    assert ac.check(idle, BULK).reason == "latency"
+    assert ac.check(idle, INTERACTIVE).action == ADMIT  # a worker is free, no wait
+    assert ac.check(busy, INTERACTIVE).reason == "latency"
+
+    clock.now += 61  # slow samples age out of the window
+    assert ac.p95() is None
+    assert ac.check(busy, BULK).action == ADMIT
+
+
+def test_busy_notice_is_rate_limited_per_user():
+    clock = Clock()
+    ac = AdmissionController(max_depth=1, notice_interval=30.0, clock=clock)
+    full = {"depth": 5}
+    assert ac.check(full, INTERACTIVE, "U1").notify
+    assert not ac.check(full, INTERACTIVE, "U1").notify
+    assert ac.check(full, INTERACTIVE, "U2").notify
+    clock.now += 31
+    shed = ac.check(full, INTERACTIVE, "U1")
+    assert shed.action == SHED and shed.notify
@@ -0,0 +1,68 @@
+# tests/test_bulk_import.py
+import json
+
+import pytest
+
+from bulk_import import Checkpoint, failures_path_for, iter_markdown, iter_units, record_text
+
+
+def test_record_text_builds_a_dm_from_task_fields():
+    assert record_text({"text": " free text "}) == "free text"
+    row = {"title": "Fix login bug", "description": "Safari only", "assignee": "sam", "priority": "P1",
+           "due_date": "2026-11-02"}
+    assert record_text(row) == "Fix login bug - Safari only @sam P1 due 2026-11-02"
+    assert record_text({"title": "Ping vendor", "assignee": "ana@example.com"}) == "Ping vendor ana@example.com"
+
+
+def test_markdown_items_and_transcript_chunks():
+    lines = [
+        "# Sprint 12\n",
+        "- Fix login bug @sam P1\n",
+        "2. Update docs @ana\n",
+        "## Notes\n",
+        "Sam said the deploy failed twice.\n",
+        "Ana will look into the runner.\n",
+        "\n",
+        "x" * 50 + "\n",
+    ]
+    units = list(iter_markdown(iter(lines), chunk_chars=60))
+    assert units[:2] == ["Fix login bug @sam P1", "Update docs @ana"]
+    assert units[2].startswith("Notes\nSam said")
+    assert all(len(u) <= 60 + len("Notes\n") for u in units[2:])
+    assert "".join(units[2:]).count("x") == 50
+
+
+def test_iter_units_streams_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / "backlog.csv"
+    csv_path.write_text("Title,Assignee,Priority\nFix login,@sam,P1\n,,\nWrite docs,ana,P2\n", encoding="utf-8")
+    assert list(iter_units(str(csv_path))) == ["Fix login @sam P1", "Write docs @ana P2"]
+
+    jsonl = tmp_path / "failed.jsonl"
+    jsonl.write_text(json.dumps({"unit": 3, "text": "retry me"}) + "\n\n", encoding="utf-8")
+    assert list(iter_units(str(jsonl))) == ["retry me"]
+
+    with pytest.raises(ValueError):
+        list(iter_units(str(tmp_path / "x.pdf")))
+
+
+def test_checkpoint_resumes_out_of_order_completion(tmp_path):
+    path = str(tmp_path / "cp.json")
+    cp = Checkpoint.load(path, "fp1")
+    for n in (0, 1, 3, 5):
+        cp.mark(n)
+    cp.save(force=True)
+
+    resumed = Checkpoint.load(path, "fp1")
+    assert resumed.watermark == 2 and resumed.done == {3, 5}
+    assert [n for n in range(7) if not resumed.is_done(n)] == [2, 4, 6]
+    resumed.mark(2)
+    assert resumed.watermark == 4
+
+    with pytest.raises(SystemExit):
+        Checkpoint.load(path, "changed")
+    assert Checkpoint.load(path, "changed", restart=True).watermark == 0
+
+
+def test_failures_file_sits_next_to_the_checkpoint():
+    assert failures_path_for("data/imports/backlog.csv.checkpoint.json") == "data/imports/backlog.csv.failed.jsonl"
+    assert failures_path_for("runs/notes.json") == "runs/notes.failed.jsonl"
@@ -0,0 +1,60 @@
+# tests/test_coalescer.py
+import asyncio
+
+from services.coalescer import Coalescer
+
+
+def test_burst_is_joined_per_key():
+    flushed = []
+
+    async def scenario():
+        c = Coalescer(lambda key, items: flushed.append((key, items)), window=0.05, max_wait=1.0)
+        c.add("D1:U1", "fix the login bug")
+        c.add("D2:U2", "other person")
+        await asyncio.sleep(0.02)
+        c.add("D1:U1", "assign to @sam")
+        await asyncio.sleep(0.02)
+        c.add("D1:U1", "P1, due friday")
+        assert flushed == []
+        await asyncio.sleep(0.1)
+        return c.stats()
+
+    stats = asyncio.run(scenario())
+    assert sorted(flushed) == [
+        ("D1:U1", ["fix the login bug", "assign to @sam", "P1, due friday"]),
+        ("D2:U2", ["other person"]),
+    ]
+    assert stats["messages"] == 4 and stats["flushes"] == 2 and stats["merged"] == 2
+
+
+def test_max_wait_and_max_items_bound_the_delay():
+    flushed = []
+
+    async def scenario():
+        c = Coalescer(lambda key, items: flushed.append(items), window=0.05, max_wait=0.12, max_items=10)
+        for i in range(8):  # keeps arriving inside the window
+            c.add("k", i)
+            await asyncio.sleep(0.03)
+        await asyncio.sleep(0.1)
+
+        capped = Coalescer(lambda key, items: flushed.append(items), window=1.0, max_items=2)
+        capped.add("k", "a")
+        capped.add("k", "b")
+
+    asyncio.run(scenario())
+    assert len(flushed[0]) < 8 and sum(len(f) for f in flushed[:-1]) == 8
+    assert flushed[-1] == ["a", "b"]
+
+
+def test_zero_window_and_flush_all():
+    flushed = []
+
+    async def scenario():
+        Coalescer(lambda key, items: flushed.append(items), window=0).add("k", "now")
+        c = Coalescer(lambda key, items: flushed.append(items), window=10)
+        c.add("k", "pending")
+        c.flush_all()
+        assert c.stats()["pending_bursts"] == 0
+
+    asyncio.run(scenario())
+    assert flushed == [["now"], ["pending"]]
@@ -0,0 +1,25 @@
+# tests/test_dedup.py
+from services.dedup import EventDeduplicator, TTLCache
+
+
+def test_retry_with_same_event_id_is_dropped():
+    dedup = EventDeduplicator()
+    assert dedup.is_duplicate("Ev1", "m-1") is False
+    assert dedup.is_duplicate("Ev1", "m-1", retry_num="1") is True
+    # Same message resent under a new event id is still caught by client_msg_id
+    assert dedup.is_duplicate("Ev2", "m-1") is True
+    assert dedup.stats()["hits"] == 2
+    assert dedup.stats()["misses"] == 1
+    assert dedup.stats()["retries_seen"] == 1
+
+
+def test_ttl_cache_expires_and_bounds_size():
+    cache = TTLCache(maxsize=2, ttl=10)
+    assert cache.add_if_absent("a", now=0)
+    assert not cache.add_if_absent("a", now=5)
+    assert cache.add_if_absent("a", now=11)   # expired, admitted again
+    cache.add_if_absent("b", now=11)
+    cache.add_if_absent("c", now=11)          # over maxsize, oldest evicted
+    assert len(cache) == 2
+    assert cache.add_if_absent("a", now=12)
+    assert cache.evictions >= 2
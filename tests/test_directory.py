@@ -0,0 +1,57 @@
+# tests/test_directory.py
+from services.directory import DirectoryIndex
+
+SLACK_USERS = [
+    {"id": "U01ANA", "name": "ana", "profile": {"email": "Ana.Petrovic@example.com", "real_name": "Ana Petrović", "display_name": "ana"}},
+    {"id": "U02MARKO", "name": "marko.j", "profile": {"real_name": "Marko Jovanovic", "display_name": "Marko"}},
+    {"id": "U03BOT", "name": "ci-bot", "is_bot": True, "profile": {}},
+]
+FC_USERS = [
+    {"user_id": "101", "full_name": "Ana Petrovic", "email": "ana.petrovic@example.com"},
+    {"user_id": "202", "full_name": "Marko Jovanović", "email": "marko@other.example"},
+    {"user_id": "303", "full_name": "Jelena Nikolic", "email": "jelena@example.com"},
+]
+
+
+def test_join_and_lookup_tiers():
+    index = DirectoryIndex.build(SLACK_USERS, FC_USERS)
+    # exact: Slack id, mention and email
+    assert index.lookup("U01ANA").fc_id == 101
+    assert index.lookup("<@U02MARKO>").fc_id == 202   # joined on normalized name
+    assert index.lookup("jelena@example.com").fc_id == 303
+    # normalized: @handle / display name / accents
+    assert index.lookup("@ana").fc_id == 101
+    assert index.lookup("@Marko.J").fc_id == 202
+    # fuzzy: small typo in a full name
+    assert index.lookup("Jelena Nikolich").fc_id == 303
+    assert index.lookup("@somebody-else") is None
+
+
+def test_snapshot_round_trip():
+    index = DirectoryIndex.build(SLACK_USERS, FC_USERS)
+    restored = DirectoryIndex.from_dict(index.to_dict())
+    assert restored.lookup("@ana").fc_id == 101
+    assert restored.built_at == index.built_at
+
+
+def test_sender_lookup_is_exact_slack_id_only():
+    index = DirectoryIndex.build(SLACK_USERS, FC_USERS)
+    assert index.by_slack_id("U01ANA").fc_id == 101
+    assert index.by_slack_id("u02marko").fc_id == 202
+    assert index.by_slack_id("U01ANB") is None           # no fuzzy match for "who is asking"
+    assert index.by_slack_id("jelena@example.com") is None
+
+
+def test_manual_override_wins_over_index(tmp_path):
+    from services.directory import DirectoryService
+    from services.state import MemoryBackend
+
+    service = DirectoryService(snapshot_path=str(tmp_path / "dir.json"), ttl=60, slack_client=object(),
+                               state=MemoryBackend())
+    service.index = DirectoryIndex.build(SLACK_USERS, FC_USERS + [
+        {"user_id": "404", "full_name": "Aleksandar Jovic", "email": "aleksandarj@example.com"},
+    ])
+    assert service.resolve("AleksandarJ") == 1788822    # SLACK_TO_FC, not the fuzzy/normalized 404
+    assert service.resolve("@aleksandarj") == 1788822
+    assert service.resolve("@ana") == 101
+    assert service.resolve("@nobody-at-all") == 0
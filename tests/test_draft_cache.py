@@ -0,0 +1,32 @@
+# tests/test_draft_cache.py
+from services.draft_cache import DraftCache, cache_key
+
+
+def test_key_ignores_whitespace_and_case_but_not_context():
+    a = cache_key("Fix  login bug\nP1 @ana", "C1", "U1", "v1")
+    assert a == cache_key("fix login bug p1 @ANA ", "C1", "U1", "v1")
+    assert a != cache_key("fix login bug p1 @ana", "C2", "U1", "v1")
+    assert a != cache_key("fix login bug p1 @ana", "C1", "U1", "v2")
+
+
+def test_memory_lru_and_sqlite_tier(tmp_path):
+    path = str(tmp_path / "drafts.sqlite3")
+    cache = DraftCache(maxsize=1, sqlite_path=path)
+    cache.put("k1", "draft-1")
+    cache.put("k2", "draft-2")          # k1 falls out of the LRU ...
+    assert cache.get("k1") == "draft-1"  # ... but is still on disk
+    assert cache.hits_disk == 1
+    assert cache.get("k1") == "draft-1"
+    assert cache.hits_memory == 1
+    cache.close()
+
+    warm = DraftCache(sqlite_path=path)
+    assert warm.get("k2") == "draft-2"
+    assert warm.get("missing") is None
+    assert warm.misses == 1
+
+
+def test_entries_expire():
+    cache = DraftCache(ttl=-1)
+    cache.put("k", "v")
+    assert cache.get("k") is None
@@ -0,0 +1,99 @@
+# tests/test_draft_router.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from models import Task
+from pm_agents import draft_router
+from pm_agents.draft_router import DraftRouter
+from pm_agents.task_draft_agent import TaskDraftAgent, TaskDraftLiteAgent, TaskDraftOutput
+
+CONTEXT = SimpleNamespace(channel="D1", user="U1")
+
+
+def _success(title="Review PR"):
+    task = Task(title=title, description="", assignee="@ana", due_date=None, priority="P2", source_channel="D1")
+    return TaskDraftOutput(status="success", message="ok", tasks=[task])
+
+
+_UNCALLED = object()
+
+
+def _stub_agents(monkeypatch, lite, full=_UNCALLED):
+    """run_agent stand-in; `lite`/`full` are a TaskDraftOutput to return or an exception to raise."""
+    calls = []
+
+    async def run_agent(agent, user_input, context, on_progress=None):
+        tier = "lite" if agent is TaskDraftLiteAgent else "full" if agent is TaskDraftAgent else "?"
+        calls.append((tier, user_input))
+        outcome = lite if tier == "lite" else full
+        if outcome is _UNCALLED:
+            pytest.fail(f"{tier} tier should not have been called")
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(draft_router, "run_agent", run_agent)
+    return calls
+
+
+def test_complete_one_liner_skips_the_model(monkeypatch):
+    calls = _stub_agents(monkeypatch, lite=_UNCALLED)
+    router = DraftRouter()
+    draft = asyncio.run(router.draft("@ana fix login bug P1 tomorrow", CONTEXT))
+    assert calls == []
+    assert draft.status == "success"
+    assert (draft.tasks[0].title, draft.tasks[0].assignee, draft.tasks[0].priority) == ("Fix login bug", "@ana", "P1")
+    assert draft.tasks[0].source_channel == "D1"
+    assert router.stats()["decisions"] == {"rules": 1, "lite": 0, "full": 0}
+
+
+def test_low_confidence_goes_to_lite_with_hints(monkeypatch):
+    calls = _stub_agents(monkeypatch, lite=_success())
+    router = DraftRouter()
+    draft = asyncio.run(router.draft("please @ana review PR 31.10.", CONTEXT))
+    assert draft.tasks[0].title == "Review PR"
+    assert [tier for tier, _ in calls] == ["lite"]
+    assert calls[0][1].startswith("please @ana review PR 31.10.\n\n[Pre-extracted fields")
+    assert '"assignee": "@ana"' in calls[0][1]
+    stats = router.stats()
+    assert stats["decisions"] == {"rules": 0, "lite": 1, "full": 0} and stats["escalations"] == 0
+
+
+@pytest.mark.parametrize("lite", [
+    RuntimeError("model timeout"),
+    TaskDraftOutput(status="success", message="nothing found"),  # success without tasks
+    TaskDraftOutput(status="error", message=" "),                  # error without an explanation
+    None,                                                          # no structured output at all
+])
+def test_lite_failure_escalates_to_full(monkeypatch, lite):
+    calls = _stub_agents(monkeypatch, lite=lite, full=_success("From full"))
+    router = DraftRouter()
+    draft = asyncio.run(router.draft("Meeting notes:\n@ana fix login P1\n@petar docs P2", CONTEXT))
+    assert draft.tasks[0].title == "From full"
+    assert [tier for tier, _ in calls] == ["lite", "full"]
+    assert calls[1][1] == "Meeting notes:\n@ana fix login P1\n@petar docs P2"  # the full model gets no hints
+    stats = router.stats()
+    assert stats["decisions"] == {"rules": 0, "lite": 0, "full": 1} and stats["escalations"] == 1
+
+
+def test_well_formed_lite_error_is_returned_without_escalating(monkeypatch):
+    refusal = TaskDraftOutput(status="error", message="Who should do this? Please mention an assignee.")
+    calls = _stub_agents(monkeypatch, lite=refusal)
+    router = DraftRouter()
+    draft = asyncio.run(router.draft("please review the PR", CONTEXT))
+    assert draft is refusal
+    assert [tier for tier, _ in calls] == ["lite"]
+    stats = router.stats()
+    assert stats["decisions"] == {"rules": 0, "lite": 1, "full": 0} and stats["escalations"] == 0
+
+
+def test_latency_is_recorded_for_every_attempted_tier(monkeypatch):
+    _stub_agents(monkeypatch, lite=RuntimeError("down"), full=_success())
+    router = DraftRouter()
+    asyncio.run(router.draft("please @ana review PR", CONTEXT))
+    asyncio.run(router.draft("@ana fix login bug P1 tomorrow", CONTEXT))
+    latency = router.stats()["latency"]
+    assert {tier: v["count"] for tier, v in latency.items()} == {"rules": 2, "lite": 1, "full": 1}
+    assert all(v["max_s"] >= v["avg_s"] >= 0 for v in latency.values())
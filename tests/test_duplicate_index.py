@@ -0,0 +1,104 @@
+# tests/test_duplicate_index.py
+import asyncio
+import threading
+
+from services.duplicate_index import DuplicateIndex, signature
+
+
+class FakeFetcher:
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.since = []
+
+    async def iter_updated_since(self, since_ts, page_size=100):
+        self.since.append(since_ts)
+        for t in sorted(self.tasks, key=lambda t: -t["updated_ts"]):
+            if t["updated_ts"] > since_ts:
+                yield t
+
+
+def test_near_duplicate_found_unrelated_ignored(tmp_path):
+    index = DuplicateIndex(str(tmp_path / "dup.sqlite3"))
+    index.upsert("1", "Fix login page crash on Safari", "Users see a blank page after submitting", url="u1")
+    index.upsert("2", "Prepare Q3 budget review deck")
+
+    matches = index.query("Fix the login page crash in Safari")
+    assert [m.task_id for m in matches] == ["1"]
+    assert matches[0].url == "u1" and matches[0].score >= index.threshold
+    assert index.query("Order new office chairs") == []
+
+
+def test_completed_tasks_leave_the_index(tmp_path):
+    index = DuplicateIndex(str(tmp_path / "dup.sqlite3"))
+    index.upsert("1", "Renew SSL certificate for api.example.com")
+    assert index.query("Renew SSL certificate for api.example.com")
+    index.upsert("1", "Renew SSL certificate for api.example.com", status=1)
+    assert index.query("Renew SSL certificate for api.example.com") == []
+
+
+def test_incremental_sync_and_reload_in_other_worker(tmp_path):
+    path = str(tmp_path / "dup.sqlite3")
+    index = DuplicateIndex(path)
+    other = DuplicateIndex(path)
+    fetcher = FakeFetcher([
+        {"id": 1, "title": "Migrate CI to the new runners", "updated_ts": 100, "url": "/tasks/1"},
+        {"id": 2, "title": "Write onboarding guide", "updated_ts": 200},
+    ])
+    assert asyncio.run(index.sync(fetcher)) == 2
+    assert index.watermark == 200
+    assert index.query("Migrate CI to new runners")[0].url == "https://freedcamp.com/tasks/1"
+
+    fetcher.tasks.append({"id": 3, "title": "Rotate staging database password", "updated_ts": 300})
+    assert asyncio.run(index.sync(fetcher)) == 1
+    assert fetcher.since == [0, 200]
+
+    assert other.reload() == 3
+    assert other.query("Rotate the staging database password")[0].task_id == "3"
+
+
+def test_interleaved_writers_see_each_others_tasks(tmp_path):
+    path = str(tmp_path / "dup.sqlite3")
+    worker_a, worker_b = DuplicateIndex(path), DuplicateIndex(path)
+    worker_b.upsert("b1", "Fix checkout timeout on mobile")       # version 1
+    worker_a.upsert("a1", "Prepare Q3 budget review deck")        # version 2, written after b1
+    assert worker_a.query("Fix the checkout timeout on mobile")[0].task_id == "b1"
+    worker_b.upsert("b2", "Renew SSL certificate for api.example.com")
+    assert worker_a.reload() == 1
+    assert worker_a.query("Renew SSL certificate for api.example.com")[0].task_id == "b2"
+    assert worker_b.reload() == 0  # a1 was loaded while writing b2
+    assert worker_b.query("Prepare the Q3 budget review deck")[0].task_id == "a1"
+
+
+def test_query_only_scores_its_lsh_candidates(tmp_path):
+    index = DuplicateIndex(str(tmp_path / "dup.sqlite3"))
+    for i in range(2000):
+        index._apply(str(i), signature(f"task {i} for customer {i * 7} area {i % 13}"), 0)
+    assert index._candidates(signature("Investigate flaky payments webhook")) == set()
+    near = index._candidates(signature("task 5 for customer 35 area 5"))
+    assert "5" in near and len(near) < 2000 // 5
+
+
+def test_query_sees_a_peers_new_rows_without_waiting_for_the_sync(tmp_path):
+    path = str(tmp_path / "dup.sqlite3")
+    worker_a, worker_b = DuplicateIndex(path), DuplicateIndex(path)
+    assert worker_a.query("Fix checkout timeout on mobile") == []
+    worker_b.upsert("b1", "Fix checkout timeout on mobile")
+    assert worker_a.query("Fix the checkout timeout on mobile")[0].task_id == "b1"
+
+
+def test_sync_writes_each_page_in_one_transaction_off_the_loop(tmp_path, monkeypatch):
+    index = DuplicateIndex(str(tmp_path / "dup.sqlite3"))
+    monkeypatch.setattr(index, "PAGE_SIZE", 2)
+    writes = []
+    write = index._write
+
+    def recording_write(tasks, watermark=None):
+        writes.append((len(tasks), watermark, threading.current_thread().name))
+        write(tasks, watermark)
+
+    monkeypatch.setattr(index, "_write", recording_write)
+    fetcher = FakeFetcher([{"id": i, "title": f"Task number {i}", "updated_ts": 100 + i} for i in range(5)])
+    assert asyncio.run(index.sync(fetcher)) == 5
+    assert [w[:2] for w in writes] == [(2, None), (2, None), (1, 104)]
+    assert threading.current_thread().name not in {w[2] for w in writes}
+    assert index.stats()["tasks"] == 5 and index.watermark == 104
@@ -0,0 +1,40 @@
+# tests/test_fast_path.py
+from datetime import date
+
+from pm_agents.fast_path import extract, parse_due_date
+
+WEDNESDAY = date(2026, 10, 14)
+
+
+def test_formulaic_dm_is_fully_extracted():
+    draft = extract("@ana fix login bug P1 by friday", WEDNESDAY)
+    assert draft.is_complete
+    assert (draft.title, draft.assignee, draft.priority, draft.due_date) == (
+        "Fix login bug", "@ana", "P1", "2026-10-16"
+    )
+
+
+def test_urgency_words_and_mentions():
+    draft = extract("<@U0ANA> deploy hotfix urgent tomorrow", WEDNESDAY)
+    assert draft.is_complete
+    assert draft.assignee == "<@U0ANA>"
+    assert draft.priority == "P0"
+    assert draft.title == "Deploy hotfix"
+    assert draft.due_date == "2026-10-15"
+
+
+def test_incomplete_messages_go_to_the_model_with_hints():
+    draft = extract("please @ana review PR 31.10.", WEDNESDAY)
+    assert not draft.is_complete          # no priority signal
+    assert draft.hints() == {"title": "Review PR", "assignee": "@ana", "due_date": "2026-10-31"}
+    assert not extract("@ana @petar sync up", WEDNESDAY).is_complete
+    assert not extract("Meeting notes:\n@ana fix login P1\n@petar docs P2", WEDNESDAY).is_complete
+
+
+def test_date_forms():
+    assert parse_due_date("due 2026-11-02", WEDNESDAY)[0] == "2026-11-02"
+    assert parse_due_date("by Nov 3rd", WEDNESDAY)[0] == "2026-11-03"
+    assert parse_due_date("by 5/1", WEDNESDAY)[0] == "2027-01-05"
+    assert parse_due_date("in 3 days", WEDNESDAY)[0] == "2026-10-17"
+    assert parse_due_date("next week", WEDNESDAY)[0] == "2026-10-19"
+    assert parse_due_date("ship version 1.2", WEDNESDAY)[0] is None
@@ -1,6 +1,7 @@
 # tests/test_freedcamp.py
 import os
 import json
+import asyncio
 from dotenv import load_dotenv
 
 # Load environment variables from .env file at the project root
@@ -35,13 +36,13 @@ def test_fc_smoke():
         return
 
     print("  Attempting to create Freedcamp task...")
-    result = create_freedcamp_task(
+    result = asyncio.run(create_freedcamp_task(
         title="Cursor Smoke Test Task (via Pytest)",
         description="This is a test task created by an automated smoke test.",
         assignee_id=0,  # 0 means unassigned
         priority="P1",  # Corresponds to 2 in PRIO_MAP {"P0":3,"P1":2,"P2":1}
         due_date="2025-12-31" # Example due date
-    )
+    ))
     
     print(f"  Freedcamp API call result:\n{json.dumps(result, indent=2)}")
     
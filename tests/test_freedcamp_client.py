@@ -0,0 +1,68 @@
+# tests/test_freedcamp_client.py
+import hmac
+import asyncio
+import hashlib
+
+import httpx
+
+from tools import freedcamp_client
+from tools.freedcamp_client import FreedcampClient
+
+
+def _client(handler):
+    return FreedcampClient(api_key="key", api_secret="secret", base_url="https://fc.test/api/v1",
+                           transport=httpx.MockTransport(handler))
+
+
+def _expected_hash(ts):
+    return hmac.new(b"secret", f"key{ts}".encode(), hashlib.sha1).hexdigest()
+
+
+def test_get_signs_the_request(monkeypatch):
+    monkeypatch.setattr(freedcamp_client.time, "time", lambda: 1_800_000_000.4)
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"data": {"tasks": []}})
+
+    client = _client(handler)
+    body = asyncio.run(client.get("/tasks", {"project_id": "9", "limit": 100}))
+    assert body == {"data": {"tasks": []}}
+    request = seen[0]
+    assert request.url.path == "/api/v1/tasks"
+    assert dict(request.url.params) == {
+        "api_key": "key", "timestamp": "1800000000", "hash": _expected_hash(1_800_000_000),
+        "project_id": "9", "limit": "100",
+    }
+
+
+def test_auth_is_reused_within_a_second_and_regenerated_after(monkeypatch):
+    now = [1_800_000_000.1]
+    monkeypatch.setattr(freedcamp_client.time, "time", lambda: now[0])
+    client = _client(lambda request: httpx.Response(200, json={}))
+    first = client._auth()
+    now[0] = 1_800_000_000.9
+    assert client._auth() is first
+    now[0] = 1_800_000_001.0
+    second = client._auth()
+    assert second is not first
+    assert second["timestamp"] == "1800000001" and second["hash"] == _expected_hash(1_800_000_001)
+
+
+def test_aclose_releases_the_pool_and_a_later_call_reopens_it():
+    calls = []
+    client = _client(lambda request: calls.append(request) or httpx.Response(200, json={"ok": True}))
+
+    async def scenario():
+        await client.get("/users")
+        pool = client._http
+        await client.aclose()
+        closed = pool.is_closed and client._http is None
+        await client.get("/users")
+        reopened = client._http is not None and client._http is not pool
+        await client.aclose()
+        return closed, reopened
+
+    assert asyncio.run(scenario()) == (True, True)
+    assert len(calls) == 2
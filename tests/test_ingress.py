@@ -0,0 +1,58 @@
+# tests/test_ingress.py
+import hmac
+import json
+import hashlib
+
+from services.ingress import ACCEPT, CHALLENGE, DROP, REJECT, Ingress
+
+SECRET = "s3cret"
+NOW = 1_700_000_000
+
+
+def _signed(payload, ts=NOW, secret=SECRET):
+    body = json.dumps(payload).encode()
+    sig = "v0=" + hmac.new(secret.encode(), f"v0:{ts}:".encode() + body, hashlib.sha256).hexdigest()
+    return body, str(ts), sig
+
+
+def _ingress():
+    return Ingress(SECRET, clock=lambda: NOW)
+
+
+def _dm(**event):
+    return {"type": "event_callback", "event_id": "Ev1",
+            "event": {"type": "message", "channel_type": "im", "channel": "D1", "user": "U1", "text": "hi", **event}}
+
+
+def test_accepts_a_signed_dm():
+    decision = _ingress().handle(*_signed(_dm()))
+    assert decision.action == ACCEPT and decision.event_id == "Ev1" and decision.event["text"] == "hi"
+
+
+def test_rejects_replays_and_bad_signatures():
+    ingress = _ingress()
+    assert ingress.handle(*_signed(_dm(), ts=NOW - 600)).reason == "stale_timestamp"
+    assert ingress.handle(*_signed(_dm(), secret="other")).reason == "bad_signature"
+    assert ingress.handle(b"{}", None, None).action == REJECT
+
+
+def test_challenge():
+    decision = _ingress().handle(*_signed({"type": "url_verification", "challenge": "c"}))
+    assert decision.action == CHALLENGE and decision.challenge == "c"
+
+
+def test_drop_reasons_are_counted():
+    ingress = _ingress()
+    channel_msg = _dm()
+    channel_msg["event"]["channel_type"] = "channel"
+    cases = {
+        "not_im": channel_msg,
+        "bot": _dm(bot_id="B1"),
+        "subtype": _dm(subtype="message_changed"),
+        "event_type": {"type": "event_callback", "event": {"type": "reaction_added", "channel_type": "im"}},
+    }
+    for reason, payload in cases.items():
+        decision = ingress.handle(*_signed(payload))
+        assert (decision.action, decision.reason) == (DROP, reason)
+    assert ingress.handle(*_signed(_dm(subtype="file_share"))).action == ACCEPT
+    assert ingress.stats() == {"drop:not_im": 1, "drop:bot": 1, "drop:subtype": 1, "drop:event_type": 1, "accept": 1}
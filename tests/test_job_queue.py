@@ -0,0 +1,57 @@
+# tests/test_job_queue.py
+import asyncio
+
+from services.job_queue import JobQueue
+
+
+def test_job_queue_drains_and_reports_stats():
+    """Jobs submitted to the queue are run by the worker pool and counted."""
+    async def scenario():
+        q = JobQueue(workers=2)
+        q.start()
+        seen = []
+
+        async def job(n):
+            await asyncio.sleep(0.01)
+            seen.append(n)
+
+        async def boom():
+            raise RuntimeError("nope")
+
+        for i in range(5):
+            q.submit("job", job, i)
+        q.submit("boom", boom)
+        await asyncio.wait_for(q.join(), timeout=2)
+        stats = q.stats()
+        await q.stop()
+        return seen, stats
+
+    seen, stats = asyncio.run(scenario())
+    assert sorted(seen) == [0, 1, 2, 3, 4]
+    assert stats["completed"] == 5
+    assert stats["failed"] == 1
+    assert stats["depth"] == 0
+    assert stats["wait_max_s"] >= stats["wait_last_s"] >= 0
+
+
+def test_stop_drains_in_flight_jobs_and_refuses_new_ones():
+    async def scenario():
+        q = JobQueue(workers=1)
+        q.start()
+        done = []
+
+        async def job(n):
+            await asyncio.sleep(0.02)
+            done.append(n)
+
+        for i in range(3):
+            q.submit("job", job, i)
+        await q.stop(drain_timeout=2)
+        try:
+            q.submit("late", job, 99)
+        except asyncio.QueueFull:
+            return done, True
+        return done, False
+
+    done, refused = asyncio.run(scenario())
+    assert done == [0, 1, 2] and refused
@@ -0,0 +1,49 @@
+# tests/test_logging_setup.py
+import json
+import logging
+
+from services import logging_setup, metrics
+from services.logging_setup import DebugRateLimit, configure_logging, parse_levels, shutdown_logging
+
+
+def test_json_lines_with_trace_and_exception(tmp_path):
+    path = tmp_path / "app.jsonl"
+    root = logging.getLogger()
+    level = root.level
+    try:
+        pipeline = configure_logging(level="INFO", levels="noisy.lib=ERROR", path=str(path), console=False)
+        assert configure_logging() is pipeline
+        metrics.new_trace("abc123")
+        log = logging.getLogger("tests.logging")
+        log.info("created %s task(s)", 2)
+        logging.getLogger("noisy.lib").warning("hidden")
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            log.exception("failed")
+        shutdown_logging()
+    finally:
+        logging_setup._pipeline = None
+        root.setLevel(level)
+        logging.getLogger("noisy.lib").setLevel(logging.NOTSET)
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [e["msg"] for e in lines] == ["created 2 task(s)", "failed"]
+    assert lines[0]["trace"] == "abc123" and lines[0]["logger"] == "tests.logging"
+    assert "RuntimeError: boom" in lines[1]["exc"] and "boom" not in lines[1]["msg"]
+
+
+def test_debug_rate_limit_per_logger():
+    limit = DebugRateLimit(per_second=3)
+
+    def rec(name, level):
+        return logging.LogRecord(name, level, __file__, 1, "payload", None, None)
+
+    passed = sum(limit.filter(rec("a", logging.DEBUG)) for _ in range(10))
+    assert passed == 3 and limit.suppressed == 7
+    assert limit.filter(rec("b", logging.DEBUG))
+    assert limit.filter(rec("a", logging.INFO))
+
+
+def test_parse_levels():
+    assert parse_levels("a.b=debug, httpx=WARNING,bad,=x") == {"a.b": "DEBUG", "httpx": "WARNING"}
@@ -0,0 +1,42 @@
+# tests/test_metrics.py
+import asyncio
+
+import pytest
+
+from services import metrics
+
+
+def test_span_records_latency_errors_and_keeps_trace():
+    async def scenario():
+        metrics.new_trace("t-1")
+        with metrics.span("test.ok"):
+            await asyncio.sleep(0)
+        with pytest.raises(ValueError):
+            with metrics.span("test.fail"):
+                raise ValueError("boom")
+        return metrics.trace_id()
+
+    assert asyncio.run(scenario()) == "t-1"
+    text = metrics.render()
+    assert 'xizor_stage_seconds_count{stage="test.ok"} 1' in text
+    assert 'xizor_stage_seconds_bucket{stage="test.ok",le="+Inf"} 1' in text
+    assert 'xizor_stage_errors_total{stage="test.fail"} 1.0' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    h = metrics.Histogram("h", "help", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        h.observe(value, "s")
+    lines = h.render()
+    assert 'h_bucket{stage="s",le="0.1"} 1' in lines
+    assert 'h_bucket{stage="s",le="1.0"} 2' in lines
+    assert 'h_bucket{stage="s",le="+Inf"} 3' in lines
+    assert 'h_count{stage="s"} 3' in lines
+
+
+def test_component_stats_are_flattened():
+    metrics.add_stats("queue", lambda: {"depth": 2, "state": "closed", "lat": {"max_s": 0.5}})
+    text = metrics.render()
+    assert 'xizor_component{component="queue",key="depth"} 2.0' in text
+    assert 'xizor_component{component="queue",key="lat.max_s"} 0.5' in text
+    assert 'key="state"' not in text
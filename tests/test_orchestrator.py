@@ -0,0 +1,123 @@
+# tests/test_orchestrator.py
+import asyncio
+from types import SimpleNamespace
+
+from models import FreedcampInfo, Task
+from pm_agents import orchestrator_agent
+from pm_agents.orchestrator_agent import ExistingTask, OrchestratorAgent, TaskResult
+from pm_agents.task_draft_agent import TaskDraftOutput
+from services.outbox import Outbox
+
+CONTEXT = SimpleNamespace(channel="D1", user="U1", event_id="")
+
+
+def _task(title):
+    return Task(title=title, description="d", assignee="@ana", due_date=None, priority="P2", source_channel="D1")
+
+
+def _stub_draft(monkeypatch, titles):
+    async def draft(self, user_input, context, on_progress=None):
+        return TaskDraftOutput(status="success", message="Drafted.", tasks=[_task(t) for t in titles])
+
+    monkeypatch.setattr(OrchestratorAgent, "_draft", draft)
+
+
+def test_fan_out_keeps_draft_order_under_the_concurrency_bound(monkeypatch):
+    titles = [f"Task {i}" for i in range(6)]
+    _stub_draft(monkeypatch, titles)
+    monkeypatch.setattr(orchestrator_agent, "BULK_CONCURRENCY", 2)
+    running = peak = 0
+
+    async def create(self, task, index, source_key, channel, semaphore, check_duplicates=True):
+        nonlocal running, peak
+        async with semaphore:
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.002 * (len(titles) - index))  # later items finish first
+            running -= 1
+        return TaskResult(task=task, freedcamp_info=FreedcampInfo(success=True, task_id=str(index), task_url="u"))
+
+    monkeypatch.setattr(OrchestratorAgent, "_create_task", create)
+    response = asyncio.run(OrchestratorAgent().run("meeting notes", CONTEXT))
+    assert peak == 2
+    assert [r.task.title for r in response.results] == titles
+    assert [r.freedcamp_info.task_id for r in response.results] == [str(i) for i in range(6)]
+    assert response.status == "success"
+    assert response.message.startswith("Created 6 of 6 task(s) in Freedcamp.")
+
+
+class _FakeDispatcher:
+    """deliver_now outcome picked by task title; tracks how many POSTs overlap."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    async def deliver_now(self, entry):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(0.002)
+            title = entry.payload["fc"]["title"]
+            if title == "boom":
+                raise RuntimeError("connection reset")
+            if title == "down":
+                return {"success": False, "error": "503 Service Unavailable", "queued": True}
+            if title == "rejected":
+                return {"success": False, "error": "400 Bad Request"}
+            return {"success": True, "task_id": f"id-{title}", "task_url": f"https://fc/{title}"}
+        finally:
+            self.running -= 1
+
+
+def _stub_delivery(monkeypatch, tmp_path, concurrency=2):
+    dispatcher = _FakeDispatcher()
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+    monkeypatch.setattr(orchestrator_agent, "BULK_CONCURRENCY", concurrency)
+    monkeypatch.setattr(orchestrator_agent, "get_outbox", lambda: outbox)
+    monkeypatch.setattr(orchestrator_agent, "get_outbox_dispatcher", lambda: dispatcher)
+    monkeypatch.setattr(orchestrator_agent, "get_directory", lambda: SimpleNamespace(resolve=lambda a: 7))
+
+    def find_duplicate(self, task):
+        return ExistingTask(task_id="99", title="Older", score=0.9) if task.title == "dup" else None
+
+    monkeypatch.setattr(OrchestratorAgent, "_find_duplicate", find_duplicate)
+    return dispatcher, outbox
+
+
+def test_partial_failure_reports_every_item(monkeypatch, tmp_path):
+    titles = ["ok-a", "down", "boom", "dup", "rejected", "ok-b"]
+    _stub_draft(monkeypatch, titles)
+    dispatcher, outbox = _stub_delivery(monkeypatch, tmp_path)
+
+    response = asyncio.run(OrchestratorAgent().run("meeting notes", CONTEXT))
+    by_title = {r.task.title: r for r in response.results}
+    assert [r.task.title for r in response.results] == titles
+    assert dispatcher.peak == 2
+    assert by_title["ok-a"].freedcamp_info.task_id == "id-ok-a" and by_title["ok-a"].assignee_fc_id == 7
+    assert by_title["down"].queued and not by_title["down"].freedcamp_info.success
+    assert by_title["boom"].freedcamp_info.error.endswith("connection reset")
+    assert by_title["dup"].duplicate_of.task_id == "99"
+    assert by_title["rejected"].freedcamp_info.error == "400 Bad Request" and not by_title["rejected"].queued
+
+    assert response.status == "partial"
+    assert response.message.startswith("Created 2 of 6 task(s) in Freedcamp.")
+    assert " 1 queued for automatic retry" in response.message
+    assert " 1 skipped because a similar open task exists" in response.message
+    assert response.message.endswith("Drafted.")
+    assert sum(outbox.stats().values()) == 5  # recorded before the POST; the duplicate never was
+
+
+def test_all_failed_is_an_error_and_draft_errors_are_forwarded(monkeypatch, tmp_path):
+    _stub_draft(monkeypatch, ["boom", "rejected"])
+    _stub_delivery(monkeypatch, tmp_path)
+    response = asyncio.run(OrchestratorAgent().run("two things", CONTEXT))
+    assert response.status == "error"
+    assert response.message.startswith("Created 0 of 2 task(s) in Freedcamp.")
+
+    async def failed_draft(self, user_input, context, on_progress=None):
+        return TaskDraftOutput(status="error", message="No assignee found.")
+
+    monkeypatch.setattr(OrchestratorAgent, "_draft", failed_draft)
+    response = asyncio.run(OrchestratorAgent().run("hmm", CONTEXT))
+    assert response.status == "error" and response.message == "No assignee found." and response.results == []
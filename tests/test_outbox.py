@@ -0,0 +1,155 @@
+# tests/test_outbox.py
+import asyncio
+import sqlite3
+
+from services.outbox import DONE, FAILED, IN_FLIGHT, PENDING, Outbox, OutboxDispatcher
+
+
+def test_add_is_idempotent_per_key(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+    first = outbox.add("ev1:0", "ev1", {"title": "a"}, "D1")
+    again = outbox.add("ev1:0", "ev1", {"title": "changed"})
+    assert again.id == first.id and again.payload == {"title": "a"}
+    outbox.add("ev1:1", "ev1", {"title": "b"})
+    assert [e.idempotency_key for e in outbox.for_source("ev1")] == ["ev1:0", "ev1:1"]
+
+
+def test_claim_once_and_recover_after_crash(tmp_path):
+    path = str(tmp_path / "outbox.sqlite3")
+    entry = Outbox(path).add("k", "s", {})
+    outbox = Outbox(path)
+    assert outbox.claim(entry.id)
+    assert not outbox.claim(entry.id)
+    assert outbox.stats()[IN_FLIGHT] == 1
+
+    restarted = Outbox(path)
+    assert restarted.recover() == 1
+    assert restarted.get(entry.id).status == PENDING
+
+
+def test_retryable_failure_is_retried_then_notified(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+    calls, notified = [], []
+
+    async def deliver(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            return {"success": False, "error": "503", "retryable": True}
+        return {"success": True, "task_id": "7", "task_url": "u"}
+
+    async def notify(entry, result):
+        notified.append(result["task_id"])
+
+    async def scenario():
+        dispatcher = OutboxDispatcher(outbox, deliver, notify, base_delay=0.01, poll_interval=0.01)
+        entry = outbox.add("k", "s", {"title": "t"}, "D1")
+        first = await dispatcher.deliver_now(entry)
+        assert first["queued"] and outbox.get(entry.id).status == PENDING
+        dispatcher.start()
+        for _ in range(200):
+            if notified:
+                break
+            await asyncio.sleep(0.01)
+        await dispatcher.stop()
+        return entry
+
+    entry = asyncio.run(scenario())
+    assert notified == ["7"]
+    done = outbox.get(entry.id)
+    assert done.status == DONE and done.attempts == 2 and done.result["task_id"] == "7"
+
+
+def test_permanent_failure_is_not_retried(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+
+    async def deliver(payload):
+        return {"success": False, "error": "400", "retryable": False}
+
+    entry = outbox.add("k", "s", {})
+    result = asyncio.run(OutboxDispatcher(outbox, deliver).deliver_now(entry))
+    assert not result.get("queued")
+    assert outbox.get(entry.id).status == FAILED
+
+
+def _run_until_settled(outbox, dispatcher, entry):
+    async def scenario():
+        first = await dispatcher.deliver_now(entry)
+        dispatcher.start()
+        for _ in range(200):
+            if outbox.get(entry.id).status in (DONE, FAILED):
+                break
+            await asyncio.sleep(0.01)
+        await dispatcher.stop()
+        return first
+
+    return asyncio.run(scenario())
+
+
+def test_ambiguous_failure_is_looked_up_before_resending(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+    sent, lookups = [], []
+
+    async def deliver(payload):
+        sent.append(payload)
+        return {"success": False, "error": "ReadTimeout", "retryable": True, "ambiguous": True}
+
+    async def find_existing(entry):
+        lookups.append(entry.id)
+        return {"success": True, "task_id": "9", "task_url": "u"}  # the timed-out POST did create it
+
+    dispatcher = OutboxDispatcher(outbox, deliver, base_delay=0.01, poll_interval=0.01, find_existing=find_existing)
+    entry = outbox.add("k", "s", {"title": "t"})
+    first = _run_until_settled(outbox, dispatcher, entry)
+    assert first["queued"] and len(sent) == 1 and lookups == [entry.id]
+    assert outbox.get(entry.id).status == DONE and outbox.get(entry.id).result["task_id"] == "9"
+
+
+def test_ambiguous_entry_is_resent_when_the_lookup_finds_nothing(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+    sent = []
+
+    async def deliver(payload):
+        sent.append(payload)
+        if len(sent) == 1:
+            return {"success": False, "error": "ReadTimeout", "retryable": True, "ambiguous": True}
+        return {"success": True, "task_id": "7", "task_url": "u"}
+
+    async def find_existing(entry):
+        return None
+
+    dispatcher = OutboxDispatcher(outbox, deliver, base_delay=0.01, poll_interval=0.01, find_existing=find_existing)
+    entry = outbox.add("k", "s", {"title": "t"})
+    _run_until_settled(outbox, dispatcher, entry)
+    assert len(sent) == 2 and outbox.get(entry.id).status == DONE
+
+
+def test_ambiguous_failure_without_a_lookup_is_surfaced_not_resent(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+    sent = []
+
+    async def deliver(payload):
+        sent.append(payload)
+        return {"success": False, "error": "ReadTimeout", "retryable": True, "ambiguous": True}
+
+    entry = outbox.add("k", "s", {})
+    result = asyncio.run(OutboxDispatcher(outbox, deliver).deliver_now(entry))
+    assert not result.get("queued") and "check there" in result["error"]
+    assert outbox.get(entry.id).status == FAILED and len(sent) == 1
+
+
+def test_entries_recovered_after_a_crash_are_ambiguous(tmp_path):
+    path = str(tmp_path / "outbox.sqlite3")
+    db = sqlite3.connect(path)  # a file from before the ambiguous column existed
+    db.execute("CREATE TABLE outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, idempotency_key TEXT NOT NULL UNIQUE,"
+               " source_key TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL,"
+               " attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, last_error TEXT, result TEXT,"
+               " notify_channel TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+    db.execute("INSERT INTO outbox (idempotency_key, source_key, payload, status, next_attempt_at, created_at,"
+               " updated_at) VALUES ('k', 's', '{}', ?, 0, 0, 0)", (IN_FLIGHT,))
+    db.commit()
+    db.close()
+
+    outbox = Outbox(path)
+    assert outbox.get(1).ambiguous is False
+    assert outbox.recover() == 1
+    assert outbox.get(1).status == PENDING and outbox.get(1).ambiguous is True
@@ -0,0 +1,62 @@
+# tests/test_pagination.py
+import asyncio
+
+from tools.pagination import newer_than, prefetch_pages
+
+
+def test_prefetch_pages_walks_every_page_in_order():
+    """All 450 records come back in order and the window never exceeds `prefetch`."""
+    records = list(range(450))
+    in_flight = 0
+    peak = 0
+    offsets = []
+
+    async def fetch_page(limit, offset):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        offsets.append(offset)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return records[offset:offset + limit]
+
+    async def collect():
+        return [r async for r in prefetch_pages(fetch_page, page_size=100, prefetch=3)]
+
+    assert asyncio.run(collect()) == records
+    assert peak <= 3
+    assert offsets[:5] == [0, 100, 200, 300, 400]
+
+
+def _walk(keys, since, page_size=3):
+    """newer_than over `keys`; returns (yielded keys, how many records the walk handed out)."""
+    handed_out = 0
+
+    async def records():
+        nonlocal handed_out
+        for k in keys:
+            handed_out += 1
+            yield k
+
+    async def collect():
+        return [k async for k in newer_than(records(), since, lambda k: k, page_size)]
+
+    return asyncio.run(collect()), handed_out
+
+
+def test_newer_than_stops_early_once_newest_first_is_confirmed():
+    assert _walk([90, 80, 70, 60, 50, 40, 30, 20, 10], since=55) == ([90, 80, 70, 60], 5)  # stops at 50
+
+
+def test_newer_than_filters_the_full_walk_of_an_ascending_api():
+    # Oldest first: the first record is already past the watermark, yet every newer one must come back
+    assert _walk([10, 20, 30, 40, 50, 60, 70, 80, 90], since=55) == ([60, 70, 80, 90], 9)
+
+
+def test_newer_than_falls_back_when_the_order_breaks_after_the_first_page():
+    assert _walk([90, 80, 70, 95, 60, 50, 40, 30], since=55) == ([90, 80, 70, 95, 60], 8)
+
+
+def test_newer_than_does_not_trust_an_unconfirmed_order():
+    assert _walk([50, 50, 50, 40, 60], since=45) == ([50, 50, 50, 60], 5)  # a flat first page proves nothing
+    assert _walk([60, 40], since=45) == ([60], 2)                          # one short page is the whole walk
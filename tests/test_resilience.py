@@ -0,0 +1,87 @@
+# tests/test_resilience.py
+import asyncio
+
+import pytest
+
+from services.resilience import (
+    CLOSED, HALF_OPEN, OPEN, AdaptiveLimiter, CircuitBreaker, CircuitOpenError, Upstream, parse_timeouts,
+)
+
+
+def test_breaker_opens_fails_fast_and_recovers_through_half_open():
+    breaker = CircuitBreaker("t", failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    assert breaker.allow()              # reset_timeout elapsed: one trial call
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()          # ... and only one
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.transitions == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+
+
+def test_limiter_grows_on_fast_calls_and_backs_off_on_slow_ones():
+    limiter = AdaptiveLimiter("t", initial=2, max_limit=4, latency_target=1.0)
+    for _ in range(20):
+        limiter.in_flight += 1
+        limiter.release(0.1, ok=True)
+    assert int(limiter.limit) == 4
+    limiter.in_flight += 1
+    limiter.release(5.0, ok=True)
+    assert int(limiter.limit) == 2 and limiter.decreases == 1
+
+
+def test_upstream_times_out_and_then_rejects():
+    upstream = Upstream("t", timeouts={"slow": 0.01}, breaker=CircuitBreaker("t", failure_threshold=1))
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await upstream.call("slow", lambda: asyncio.sleep(1))
+        with pytest.raises(CircuitOpenError):
+            await upstream.call("fast", lambda: asyncio.sleep(0))
+
+    asyncio.run(scenario())
+    stats = upstream.stats()
+    assert stats["state"] == OPEN and stats["timeouts"] == 1 and stats["rejected"] == 1
+
+
+def test_limiter_queues_callers_above_the_limit():
+    upstream = Upstream("t", limiter=AdaptiveLimiter("t", initial=1, max_limit=1))
+    peak = []
+
+    async def work():
+        peak.append(upstream.limiter.in_flight)
+        await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(*(upstream.call("x", work) for _ in range(5)))
+
+    asyncio.run(scenario())
+    assert max(peak) == 1 and upstream.calls == 5
+
+
+def test_parse_timeouts():
+    assert parse_timeouts("/tasks=10, *=20") == {"/tasks": 10.0, "*": 20.0}
+
+
+def test_cancelled_while_waiting_for_a_slot_frees_the_half_open_trial():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    upstream = Upstream("t", breaker=breaker, limiter=AdaptiveLimiter("t", initial=1, max_limit=1))
+
+    async def scenario():
+        upstream.limiter.in_flight = 1  # the only slot is taken
+        waiting = asyncio.ensure_future(upstream.call("x", lambda: asyncio.sleep(0)))
+        await asyncio.sleep(0.01)
+        assert breaker.state == HALF_OPEN
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        upstream.limiter.in_flight = 0
+        await upstream.call("x", lambda: asyncio.sleep(0))  # the trial is available again
+
+    asyncio.run(scenario())
+    assert breaker.state == CLOSED and upstream.calls == 1
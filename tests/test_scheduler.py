@@ -0,0 +1,93 @@
+# tests/test_scheduler.py
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from services.job_queue import JobQueue
+from services.scheduler import BULK, INTERACTIVE, FairScheduler, classify
+
+
+@dataclass
+class J:
+    user: str
+    lane: str = INTERACTIVE
+    cost: float = 1.0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+def drain(s: FairScheduler):
+    order = []
+    while True:
+        job = s.pop()
+        if job is None:
+            return order
+        order.append(job)
+        s.done(job)
+
+
+def test_round_robin_between_users():
+    s = FairScheduler()
+    for _ in range(5):
+        s.push(J("noisy"))
+    s.push(J("alice"))
+    s.push(J("bob"))
+    order = [j.user for j in drain(s)]
+    assert order[:3] == ["noisy", "alice", "bob"]
+    assert order[3:] == ["noisy"] * 4
+
+
+def test_costly_jobs_are_paid_over_several_rounds():
+    s = FairScheduler(quantum=1)
+    s.push(J("paster", cost=3))
+    s.push(J("paster", cost=3))
+    for _ in range(4):
+        s.push(J("alice"))
+    order = [j.user for j in drain(s)]
+    assert order.index("paster") >= 2  # alice gets several jobs in before the 3-credit paste
+
+
+def test_user_cap_and_bulk_lane_reserve_workers():
+    s = FairScheduler(user_max_in_flight=1, bulk_max_in_flight=1, interactive_weight=1)
+    s.push(J("u1"))
+    s.push(J("u1"))
+    first = s.pop()
+    assert first.user == "u1" and s.pop() is None  # u1 is at its cap
+    s.done(first)
+    assert s.pop().user == "u1"
+
+    s = FairScheduler(bulk_max_in_flight=1)
+    s.push(J("a", lane=BULK))
+    s.push(J("b", lane=BULK))
+    assert s.pop().lane == BULK and s.pop() is None  # second bulk job waits, interactive would not
+    s.push(J("c"))
+    assert s.pop().user == "c"
+    stats = s.stats()
+    assert stats["lanes"][BULK]["depth"] == 1 and set(stats["users"]) == {"a", "c"}
+
+
+def test_classify():
+    assert classify("fix the login bug @sam P1") == (INTERACTIVE, 1)
+    paste = "\n".join(f"- task {i} for @sam" for i in range(6))
+    assert classify(paste) == (BULK, 6)
+
+
+def test_job_queue_serves_light_user_during_burst():
+    async def scenario():
+        q = JobQueue(workers=2, scheduler=FairScheduler(user_max_in_flight=1))
+        q.start()
+        finished = []
+
+        async def job(user, n):
+            await asyncio.sleep(0.01)
+            finished.append((user, n))
+
+        for i in range(10):
+            q.submit_for("noisy", INTERACTIVE, 1, "job", job, "noisy", i)
+        q.submit_for("alice", INTERACTIVE, 1, "job", job, "alice", 0)
+        await asyncio.wait_for(q.join(), timeout=2)
+        await q.stop()
+        return finished, q.stats()
+
+    finished, stats = asyncio.run(scenario())
+    assert finished.index(("alice", 0)) <= 1
+    assert stats["completed"] == 11 and stats["users"]["noisy"]["jobs"] == 10
@@ -0,0 +1,98 @@
+# tests/test_sheet_writer.py
+import threading
+
+import pytest
+
+from models import Task
+from tools import gsheet_tools
+from tools.gsheet_tools import SheetWriter, first_row_of_range
+
+
+def _task(title):
+    return Task(title=title, description="d", assignee="@ana", due_date=None, priority="P2", source_channel="D1")
+
+
+class _ApiError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type("Response", (), {"status_code": status_code})()
+
+
+class _FakeWorksheet:
+    """append_rows stand-in: fails with the queued status codes, then appends after `next_row`."""
+
+    def __init__(self, next_row=2, sheet="Tasks", errors=()):
+        self.next_row = next_row
+        self.sheet = sheet
+        self.errors = list(errors)
+        self.calls = []
+        self.threads = []
+
+    def append_rows(self, rows, value_input_option=None):
+        self.calls.append(list(rows))
+        self.threads.append(threading.current_thread().name)
+        if self.errors:
+            raise _ApiError(self.errors.pop(0))
+        start = self.next_row
+        self.next_row += len(rows)
+        return {"updates": {"updatedRange": f"{self.sheet}!A{start}:G{self.next_row - 1}"}}
+
+
+def test_row_number_is_parsed_after_the_last_bang():
+    assert first_row_of_range("Sheet1!A42:G44") == 42
+    assert first_row_of_range("'AB12'!A5:G7") == 5
+    assert first_row_of_range("'Q3 plan!'!$A$17:$G$17") == 17
+    with pytest.raises(ValueError):
+        first_row_of_range("Sheet1")
+
+
+def test_rows_are_batched_into_one_append():
+    sheet = _FakeWorksheet(next_row=10, sheet="'AB12'")
+    writer = SheetWriter(sheet_id="s", batch_size=3, flush_seconds=60, worksheet=sheet)
+    futures = [writer.submit(_task(f"t{i}")) for i in range(3)]
+    assert [f.result(timeout=5) for f in futures] == [10, 11, 12]
+    assert len(sheet.calls) == 1 and [row[0] for row in sheet.calls[0]] == ["t0", "t1", "t2"]
+    assert sheet.threads[0] != threading.current_thread().name  # flushed off the submitting thread
+
+    partial = writer.submit(_task("t3"))
+    assert not partial.done()  # below batch_size: waits for the timer or an explicit flush
+    writer.close()
+    assert partial.result(timeout=5) == 13 and len(sheet.calls) == 2
+
+
+def test_eager_submit_writes_a_lone_row_without_waiting():
+    sheet = _FakeWorksheet()
+    writer = SheetWriter(sheet_id="s", batch_size=20, flush_seconds=60, worksheet=sheet)
+    assert writer.submit(_task("only"), eager=True).result(timeout=5) == 2
+    writer.close()
+
+
+def test_rate_limits_are_retried_with_backoff(monkeypatch):
+    delays = []
+    monkeypatch.setattr(gsheet_tools.time, "sleep", delays.append)
+    monkeypatch.setattr(gsheet_tools.random, "uniform", lambda a, b: 0.0)
+    sheet = _FakeWorksheet(errors=[429, 429])
+    writer = SheetWriter(sheet_id="s", batch_size=2, flush_seconds=60, max_retries=5, worksheet=sheet)
+    futures = [writer.submit(_task("a")), writer.submit(_task("b"))]
+    assert [f.result(timeout=5) for f in futures] == [2, 3]
+    assert len(sheet.calls) == 3 and delays == [1.0, 2.0]
+    writer.close()
+
+
+def test_client_errors_fail_every_row_of_the_batch(monkeypatch):
+    monkeypatch.setattr(gsheet_tools.time, "sleep", lambda s: pytest.fail("a 400 must not be retried"))
+    sheet = _FakeWorksheet(errors=[400])
+    writer = SheetWriter(sheet_id="s", batch_size=2, flush_seconds=60, worksheet=sheet)
+    futures = [writer.submit(_task("a")), writer.submit(_task("b"))]
+    for f in futures:
+        with pytest.raises(_ApiError):
+            f.result(timeout=5)
+    assert len(sheet.calls) == 1
+    writer.close()
+
+
+def test_unconfigured_writer_refuses_rows(monkeypatch):
+    monkeypatch.delenv("SHEET_ID", raising=False)
+    writer = SheetWriter(creds_path="creds.json")
+    with pytest.raises(RuntimeError, match="SHEET_ID"):
+        writer.submit(_task("a"))
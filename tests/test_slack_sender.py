@@ -0,0 +1,102 @@
+# tests/test_slack_sender.py
+import asyncio
+
+from slack_sdk.errors import SlackApiError
+
+from services.state import MemoryBackend
+from tools import slack_sender
+from tools.slack_sender import SlackSender
+
+
+class _Response:
+    def __init__(self, data, status_code=200, headers=None):
+        self.data = data
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+
+class _FakeClient:
+    """AsyncWebClient stand-in: records calls, answers 429 for the first `rate_limited` of them."""
+
+    def __init__(self, rate_limited=0, retry_after="7"):
+        self.calls = []
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+
+    async def _answer(self, method, kwargs):
+        self.calls.append((method, dict(kwargs)))
+        if self.rate_limited:
+            self.rate_limited -= 1
+            raise SlackApiError("ratelimited", _Response({"ok": False}, 429, {"Retry-After": self.retry_after}))
+        return _Response({"ok": True, "ts": kwargs.get("ts") or f"{len(self.calls)}.0"})
+
+    async def chat_postMessage(self, **kwargs):
+        return await self._answer("chat_postMessage", kwargs)
+
+    async def chat_update(self, **kwargs):
+        return await self._answer("chat_update", kwargs)
+
+
+def test_queued_updates_of_one_message_coalesce():
+    client = _FakeClient()
+
+    async def scenario():
+        sender = SlackSender(client=client, min_interval=0.01, state=MemoryBackend())
+        first = sender.post("D1", "working")
+        edits = [sender.update("D1", "1.0", f"step {i}") for i in range(4)]
+        other = sender.update("D1", "2.0", "other message")
+        results = await asyncio.gather(first, *edits, other)
+        stats = sender.stats()
+        await sender.aclose()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert [m for m, _ in client.calls] == ["chat_postMessage", "chat_update", "chat_update"]
+    assert client.calls[1][1] == {"channel": "D1", "ts": "1.0", "text": "step 3"}  # only the latest edit is sent
+    assert client.calls[2][1]["ts"] == "2.0"
+    assert results[0] == "1.0"
+    assert results[1] == results[4] == {"ok": True, "ts": "1.0"}  # every coalesced caller gets the one result
+    assert stats["coalesced"] == 3 and stats["sent"] == 3
+
+
+def test_rate_limit_waits_for_retry_after(monkeypatch):
+    client = _FakeClient(rate_limited=2, retry_after="7")
+    slept = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args, **kwargs):
+        slept.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(slack_sender.asyncio, "sleep", fake_sleep)
+
+    async def scenario():
+        sender = SlackSender(client=client, min_interval=0, state=MemoryBackend())
+        ts = await sender.post("D1", "hello")
+        stats = sender.stats()
+        await sender.aclose()
+        return ts, stats
+
+    ts, stats = asyncio.run(scenario())
+    assert ts == "3.0" and len(client.calls) == 3
+    assert slept.count(7.0) == 2
+    assert stats["rate_limited"] == 2 and stats["failed"] == 0
+
+
+def test_rate_limit_retries_are_bounded(monkeypatch):
+    client = _FakeClient(rate_limited=100, retry_after="0")
+
+    async def scenario():
+        sender = SlackSender(client=client, min_interval=0, state=MemoryBackend())
+        ts = await sender.post("D1", "hello")
+        stats = sender.stats()
+        await sender.aclose()
+        return ts, stats
+
+    ts, stats = asyncio.run(scenario())
+    assert ts is None  # Slack refused it; the caller gets None, never an exception
+    assert len(client.calls) == slack_sender.MAX_RATE_LIMIT_RETRIES + 1
+    assert stats["failed"] == 1
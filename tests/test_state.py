@@ -0,0 +1,122 @@
+# tests/test_state.py
+import time
+import asyncio
+
+import pytest
+
+from services.dedup import EventDeduplicator
+from services.state import MemoryBackend, RedisBackend, SQLiteBackend, StateBackend
+
+
+class _RedisStandIn:
+    """The subset of redis-py that RedisBackend relies on."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value, expires = self.data.get(key, (None, None))
+        return None if expires is not None and expires <= time.time() else value
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and self.get(key) is not None:
+            return None
+        self.data[key] = (value, time.time() + px / 1000 if px else None)
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def register_script(self, script):
+        assert "redis.call('TIME')" in script
+
+        def reserve(keys, args):  # what RedisBackend.RESERVE_SCRIPT does, in one step
+            now, interval = time.time(), float(args[0])
+            slot = max(now, float(self.get(keys[0]) or 0))
+            self.set(keys[0], "%.6f" % (slot + interval), px=int((slot + interval - now + 60) * 1000))
+            return b"%.6f" % (slot - now)
+
+        return reserve
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "state.sqlite3"))
+    return RedisBackend(client=_RedisStandIn())
+
+
+def test_set_if_absent_and_expiry(backend):
+    assert backend.set_if_absent("k", "a", ttl=60)
+    assert not backend.set_if_absent("k", "b", ttl=60)
+    assert backend.get("k") == "a"
+    backend.set("short", "x", ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get("short") is None
+    assert backend.set_if_absent("short", "y")
+    backend.delete("k")
+    assert backend.get("k") is None
+
+
+def test_reserve_spaces_out_slots(backend):
+    assert backend.reserve("chan", 0.5) == pytest.approx(0.0, abs=0.05)
+    assert backend.reserve("chan", 0.5) == pytest.approx(0.5, abs=0.05)
+    assert backend.reserve("other", 0.5) == pytest.approx(0.0, abs=0.05)
+
+
+def test_reserve_async_matches_reserve(backend):
+    async def scenario():
+        return [await backend.reserve_async("chan", 0.5) for _ in range(2)]
+
+    first, second = asyncio.run(scenario())
+    assert first == pytest.approx(0.0, abs=0.05) and 0.0 < second <= 0.5  # the second waits behind the first
+
+
+def test_async_lock_variants(backend):
+    async def scenario():
+        taken = [await backend.set_if_absent_async("lock", "a", ttl=60), await backend.set_if_absent_async("lock", "b")]
+        await backend.delete_async("lock")
+        return taken, await backend.set_if_absent_async("lock", "c")
+
+    assert asyncio.run(scenario()) == ([True, False], True)
+    assert backend.get("lock") == "c"
+
+
+def test_backend_interface_is_abstract():
+    class Partial(StateBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_sqlite_state_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    worker_a, worker_b = SQLiteBackend(path), SQLiteBackend(path)
+    assert worker_a.set_if_absent("directory:refresh", "1", ttl=60)
+    assert not worker_b.set_if_absent("directory:refresh", "2", ttl=60)
+
+
+def test_dedup_across_workers(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    worker_a = EventDeduplicator(backend=SQLiteBackend(path))
+    worker_b = EventDeduplicator(backend=SQLiteBackend(path))
+    assert not worker_a.is_duplicate("Ev1")
+    assert worker_b.is_duplicate("Ev1", retry_num="1")
+
+
+def test_async_dedup_across_workers(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    worker_a = EventDeduplicator(backend=SQLiteBackend(path))
+    worker_b = EventDeduplicator(backend=SQLiteBackend(path))
+
+    async def scenario():
+        return [await worker_a.is_duplicate_async("Ev1", "m-1"),
+                await worker_b.is_duplicate_async("Ev2", "m-1"),  # resent message, other worker
+                await worker_a.is_duplicate_async("Ev3")]
+
+    assert asyncio.run(scenario()) == [False, True, False]
+    assert worker_b.stats()["hits"] == 1 and worker_a.stats()["misses"] == 2
@@ -0,0 +1,28 @@
+# tests/test_stream_progress.py
+import asyncio
+
+from pm_agents.stream_progress import ProgressThrottle, partial_fields
+
+
+def test_partial_fields_only_reports_closed_strings():
+    buffer = '{"status":"success","message":"ok","tasks":[{"title":"Fix \\"login\\" bug","assignee":"@an'
+    assert partial_fields(buffer) == {"title": 'Fix "login" bug', "tasks_seen": 1}
+    buffer += 'a","priority":"P1","due_date":null},{"title":"Docs'
+    assert partial_fields(buffer) == {"title": 'Fix "login" bug', "assignee": "@ana", "priority": "P1", "tasks_seen": 2}
+
+
+def test_throttle_drops_unchanged_and_too_frequent_updates():
+    sent = []
+
+    async def callback(fields):
+        sent.append(fields)
+
+    async def scenario():
+        throttle = ProgressThrottle(callback, min_interval=60)
+        await throttle({"title": "A"})
+        await throttle({"title": "A"})
+        await throttle({"title": "A", "assignee": "@ana"})          # inside the interval
+        await throttle({"title": "A", "stage": "creating"}, force=True)
+
+    asyncio.run(scenario())
+    assert sent == [{"title": "A"}, {"title": "A", "stage": "creating"}]
@@ -0,0 +1,128 @@
+# tests/test_task_store.py
+import asyncio
+import time
+import threading
+from datetime import date
+
+from pm_agents.task_query import parse_query
+from services.state import MemoryBackend
+from services.task_store import TaskStore, TaskStoreService
+
+
+class FakeFetcher:
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.since = []
+
+    async def iter_updated_since(self, since_ts, page_size=100):
+        self.since.append(since_ts)
+        for t in sorted(self.tasks, key=lambda t: -t["updated_ts"]):
+            if t["updated_ts"] > since_ts:
+                yield t
+
+    async def iter_tasks(self, page_size=100):
+        self.since.append("full")
+        for t in self.tasks:
+            yield t
+
+
+TASKS = [
+    {"id": 1, "title": "Ship release", "assigned_to_id": "7", "status": 0, "priority": 3,
+     "due_ts": "1792022400", "updated_ts": 100, "url": "/t/1"},            # 2026-10-15
+    {"id": 2, "title": "Write notes", "assigned_to_id": "7", "status": 2, "due_date": "2026-10-20", "updated_ts": 110},
+    {"id": 3, "title": "Old chore", "assigned_to_id": "7", "status": 1, "due_date": "2026-10-16", "updated_ts": 120},
+    {"id": 4, "title": "Someone else's", "assigned_to_id": "8", "status": 0, "due_date": "2026-10-16", "updated_ts": 130},
+    {"id": 5, "title": "Someday", "assigned_to_id": "7", "status": 0, "due_ts": "", "updated_ts": 140},
+]
+
+
+def test_incremental_sync_and_assignee_queries(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.sqlite3"))
+    assert store.staleness() is None
+    fetcher = FakeFetcher([dict(t) for t in TASKS])
+    assert asyncio.run(store.sync(fetcher)) == 5
+    assert store.staleness() < 5
+
+    assert [t.task_id for t in store.open_tasks(7)] == ["1", "2", "5"]  # completed excluded, undated last
+    week = store.open_tasks(7, "2026-10-14", "2026-10-18")
+    assert [(t.task_id, t.due_date, t.url) for t in week] == [("1", "2026-10-15", "https://freedcamp.com/t/1")]
+
+    fetcher.tasks.append({"id": 1, "title": "Ship release", "assigned_to_id": "7", "status": 1, "updated_ts": 200})
+    assert asyncio.run(store.sync(fetcher)) == 1
+    assert fetcher.since == [0, 140]
+    assert [t.task_id for t in store.open_tasks(7)] == ["2", "5"]
+    assert store.stats()["tasks"] == 5 and store.stats()["open"] == 3
+
+
+def test_query_uses_the_assignee_index(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.sqlite3"))
+    plan = store._db.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE assignee_id = ? AND status != ? AND due_date <= ?",
+        (7, 1, "2026-10-18"),
+    ).fetchall()
+    assert any("tasks_assignee" in row[-1] for row in plan)
+
+
+def test_reconcile_prunes_deleted_and_moved_tasks(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.sqlite3"))
+    fetcher = FakeFetcher([dict(t) for t in TASKS])
+    asyncio.run(store.sync(fetcher))
+    fetcher.tasks = [t for t in fetcher.tasks if t["id"] not in (2, 5)]  # deleted / moved to another project
+    assert asyncio.run(store.sync(fetcher)) == 0
+    assert [t.task_id for t in store.open_tasks(7)] == ["1", "2", "5"]  # incremental sync cannot tell
+
+    assert asyncio.run(store.reconcile(fetcher)) == 2
+    assert [t.task_id for t in store.open_tasks(7)] == ["1"]
+    assert store.last_reconcile_at() is not None and store.watermark == 140  # never moves back
+
+
+def test_each_page_is_one_transaction_off_the_loop(tmp_path, monkeypatch):
+    store = TaskStore(str(tmp_path / "tasks.sqlite3"))
+    monkeypatch.setattr(store, "PAGE_SIZE", 2)
+    writes = []
+    write = store._write
+
+    def recording_write(tasks, meta=None, keep=None):
+        writes.append((len(tasks), sorted(meta or {}), keep is not None, threading.current_thread().name))
+        return write(tasks, meta, keep)
+
+    monkeypatch.setattr(store, "_write", recording_write)
+    fetcher = FakeFetcher([dict(t) for t in TASKS])
+    assert asyncio.run(store.sync(fetcher)) == 5
+    assert [w[:3] for w in writes] == [(2, [], False), (2, [], False),
+                                       (1, ["last_sync_at", "synced_updated_ts"], False)]
+    assert threading.current_thread().name not in {w[3] for w in writes}
+
+    writes.clear()
+    fetcher.tasks = fetcher.tasks[:3]
+    assert asyncio.run(store.reconcile(fetcher)) == 2
+    assert [w[:3] for w in writes] == [(2, [], False),
+                                       (1, ["last_reconcile_at", "last_sync_at", "synced_updated_ts"], True)]
+    assert store.stats()["tasks"] == 3
+
+
+def test_service_reconciles_on_the_first_and_every_overdue_round(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.sqlite3"))
+    fetcher = FakeFetcher([dict(t) for t in TASKS])
+    state = MemoryBackend()
+    service = TaskStoreService(store, interval=120, reconcile_interval=3600, state=state)
+    asyncio.run(service.sync_once(fetcher))
+    state.delete(TaskStoreService.SYNC_LOCK)
+    asyncio.run(service.sync_once(fetcher))
+    assert fetcher.since == ["full", 140]
+    store._write([], {"last_reconcile_at": repr(time.time() - 4000)})
+    state.delete(TaskStoreService.SYNC_LOCK)
+    asyncio.run(service.sync_once(fetcher))
+    assert fetcher.since[-1] == "full"
+    assert asyncio.run(service.sync_once(fetcher)) is None  # another round already holds the lock
+
+
+def test_parse_query_only_matches_questions_about_own_tasks():
+    today = date(2026, 10, 14)  # a Wednesday
+    week = parse_query("My tasks due this week?", today)
+    assert (week.label, week.due_from, week.due_to) == ("due this week", "2026-10-14", "2026-10-18")
+    assert parse_query("what is assigned to me", today).label == "open"
+    assert parse_query("show my overdue tasks", today).due_to == "2026-10-13"
+    assert parse_query("my tasks for next week", today).due_from == "2026-10-19"
+    assert parse_query("my tasks: fix the login bug @sam", today) is None
+    assert parse_query("fix my tasks page @sam P1", today) is None
@@ -1,46 +1,28 @@
 # tools/freedcamp_api.py
 import os
-import time
-import hmac
-import hashlib
 import json
+import asyncio
 import logging
-import requests
+import httpx
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
 
+from tools.freedcamp_client import get_freedcamp_client
+from services.resilience import CircuitOpenError
+from services.metrics import span
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-logging.getLogger("openai").setLevel(logging.DEBUG)
-logging.getLogger("httpx").setLevel(logging.DEBUG)
-logging.basicConfig(level=logging.DEBUG)
-
 API_KEY = os.getenv("FREEDCAMP_API_KEY")
 API_SECRET = os.getenv("FREEDCAMP_API_SECRET")
 PROJECT_ID = os.getenv("FREEDCAMP_PROJECT_ID")
 TASKGROUP_ID = os.getenv("FREEDCAMP_TASK_GROUP_ID")
 
-BASE_URL = "https://freedcamp.com/api/v1"
-
-def _auth() -> Dict[str, str]:
-    """Generates authentication parameters for Freedcamp API."""
-    if not API_KEY or not API_SECRET:
-        logger.error("API_KEY or API_SECRET not configured.")
-        raise ValueError("API_KEY or API_SECRET not configured for _auth.")
-        
-    ts = str(int(time.time()))
-    signature = hmac.new(
-        API_SECRET.encode('utf-8'), # Ensure encoding for hmac
-        f"{API_KEY}{ts}".encode('utf-8'), # Ensure encoding for hmac
-        hashlib.sha1,
-    ).hexdigest()
-    return {"api_key": API_KEY, "timestamp": ts, "hash": signature}
-
 PRIO_MAP = {"P0": 3, "P1": 2, "P2": 1}
 
 # Not decorated with @function_tool as per Prompt2.md
-def create_freedcamp_task(
+async def create_freedcamp_task(
     title: str,
     description: str,
     assignee_id: int = 1788822,
@@ -48,40 +30,38 @@ def create_freedcamp_task(
     due_date: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
-    Create a task in Freedcamp.
+    Create a task in Freedcamp through the shared pooled client.
     Uses multipart/form-data with a 'data' field containing the JSON payload.
     Returns a dictionary with {success, task_id, task_url, response|error}.
+    Failures carry `retryable`: True for timeouts, connection errors, 429 and 5xx.
+    They also carry `ambiguous`: True when the request may already have reached
+    Freedcamp (a read/write timeout, a dropped connection after sending, or an
+    unexpected error), so the task may exist even though no answer came back.
     """
     if not all([API_KEY, API_SECRET, PROJECT_ID, TASKGROUP_ID]):
         logger.error("Missing Freedcamp API credentials or project/task group IDs in .env.")
-        return {"success": False, "error": "Missing API credentials or project/task group IDs"}
+        return {"success": False, "error": "Missing API credentials or project/task group IDs", "retryable": False}
 
     payload_dict = {
         "project_id": PROJECT_ID,
         "task_group_id": TASKGROUP_ID,
         "title": title,
         "description": description,
-        "assigned_to_id": 1788822,
+        "assigned_to_id": assignee_id,
         "priority": 3, # Default to 2 (P1 equivalent in map) if priority string is invalid
     }
     if due_date:  # Expected format YYYY-MM-DD
         payload_dict["due_date"] = due_date
 
-    logger.debug(f"[FC-REQ] Payload for Freedcamp: {json.dumps(payload_dict, indent=2)}")
+    if logger.isEnabledFor(logging.DEBUG):  # LOG_LEVELS=tools.freedcamp_api=DEBUG
+        logger.debug(f"[FC-REQ] Payload for Freedcamp: {json.dumps(payload_dict)}")
 
     try:
-        auth_params = _auth() # Can raise ValueError if keys are missing
-        
         # Freedcamp API expects the JSON payload as a string in a 'data' form field.
-        # Using 'files' parameter with None for filename sends multipart/form-data.
-        form_data_payload = {'data': (None, json.dumps(payload_dict))}
-        
-        res = requests.post(
-            f"{BASE_URL}/tasks",
-            params=auth_params,
-            files=form_data_payload,
-            verify=False  # <<< PRIVREMENO ZA TESTIRANJE SSL PROBLEMA
-        )
+        # The shared client sends it as multipart/form-data over a pooled connection;
+        # auth params are added by the client (can raise ValueError if keys are missing).
+        with span("freedcamp.create"):
+            res = await get_freedcamp_client().post_form("/tasks", json.dumps(payload_dict))
         res.raise_for_status()  # Raises HTTPError for 4xx/5xx responses
         
         response_json = res.json()
@@ -107,11 +87,11 @@ def create_freedcamp_task(
             # Or if 'id' is missing, it's an issue.
             internal_error_msg = response_json.get("error", {}).get("message", "No task ID in response and no specific error message.")
             logger.error(f"Freedcamp task creation API call successful (HTTP {res.status_code}) but no 'id' found in response 'data' field or error reported. Response: {res.text}. Internal error: {internal_error_msg}")
-            return {"success": False, "error": f"Task creation reported success by API (HTTP {res.status_code}) but task details/ID are missing. Freedcamp msg: {internal_error_msg}", "response": response_json}
+            return {"success": False, "error": f"Task creation reported success by API (HTTP {res.status_code}) but task details/ID are missing. Freedcamp msg: {internal_error_msg}", "response": response_json, "retryable": False}
 
-    except requests.exceptions.HTTPError as http_err:
-        error_text = http_err.response.text if http_err.response else "No response body"
-        status_code = http_err.response.status_code if http_err.response else "N/A"
+    except httpx.HTTPStatusError as http_err:
+        error_text = http_err.response.text if http_err.response is not None else "No response body"
+        status_code = http_err.response.status_code if http_err.response is not None else "N/A"
         logger.error(f"Freedcamp API HTTP error: {http_err}. Status: {status_code}. Response: {error_text}")
         # Attempt to parse JSON from error response, as Freedcamp often returns JSON errors
         try:
@@ -119,10 +99,22 @@ def create_freedcamp_task(
             error_detail = error_response_json.get("error", {}).get("message", error_text)
         except json.JSONDecodeError:
             error_detail = error_text
-        return {"success": False, "error": str(http_err), "response_detail": error_detail, "status_code": status_code}
+        return {"success": False, "error": str(http_err), "response_detail": error_detail, "status_code": status_code,
+                "retryable": status_code == 429 or (isinstance(status_code, int) and status_code >= 500)}
+    except CircuitOpenError as coe:  # Freedcamp has been failing; fail fast, the outbox retries later
+        logger.warning(f"Freedcamp task creation skipped: {coe}")
+        return {"success": False, "error": str(coe), "retryable": True}
+    except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as ce:  # nothing was sent
+        logger.warning(f"Freedcamp task creation could not connect: {ce!r}")
+        return {"success": False, "error": f"Could not reach Freedcamp: {ce!r}", "retryable": True}
+    except (httpx.TimeoutException, httpx.TransportError, asyncio.TimeoutError) as te:
+        # The POST may have been received and the task created; only the answer is missing
+        logger.warning(f"Freedcamp task creation outcome unknown: {te!r}")
+        return {"success": False, "error": f"No answer from Freedcamp: {te!r}", "retryable": True, "ambiguous": True}
     except ValueError as ve: # Catch ValueError from _auth
         logger.error(f"ValueError during Freedcamp task creation (likely API key issue): {ve}")
-        return {"success": False, "error": str(ve)}
+        return {"success": False, "error": str(ve), "retryable": False}
     except Exception as e:
         logger.exception("An unexpected error occurred while creating Freedcamp task.") # Logs full stack trace
-        return {"success": False, "error": f"An unexpected error occurred: {str(e)}"} 
\ No newline at end of file
+        return {"success": False, "error": f"An unexpected error occurred: {str(e)}", "retryable": True,
+                "ambiguous": True} 
\ No newline at end of file
@@ -0,0 +1,151 @@
+# tools/freedcamp_client.py
+"""
+Shared async Freedcamp client.
+
+One keep-alive connection pool per process, reused by task creation and the
+user / task-list fetchers. Pool limits and timeouts come from the env:
+
+  FREEDCAMP_BASE_URL            (default https://freedcamp.com/api/v1)
+  FREEDCAMP_MAX_CONNECTIONS     (default 20)
+  FREEDCAMP_MAX_KEEPALIVE       (default 10)
+  FREEDCAMP_TIMEOUT             (seconds, default 15)
+  FREEDCAMP_CONNECT_TIMEOUT     (seconds, default 5)
+  FREEDCAMP_VERIFY_SSL          (default true)
+
+Every request also goes through the "freedcamp" resilience guard
+(services/resilience.py): per-path deadline, adaptive concurrency limit and
+circuit breaker. Connection errors, timeouts and 5xx count as failures.
+"""
+import os
+import time
+import hmac
+import hashlib
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+from services.resilience import Upstream, get_upstream
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://freedcamp.com/api/v1"
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() not in ("0", "false", "no", "off")
+
+
+def _is_upstream_failure(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
+
+
+class FreedcampClient:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive: Optional[int] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        verify: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_key = api_key or os.getenv("FREEDCAMP_API_KEY")
+        self.api_secret = api_secret or os.getenv("FREEDCAMP_API_SECRET")
+        self.base_url = (base_url or os.getenv("FREEDCAMP_BASE_URL", DEFAULT_BASE_URL)).rstrip("/")
+        self.limits = httpx.Limits(
+            max_connections=max_connections or int(os.getenv("FREEDCAMP_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=max_keepalive or int(os.getenv("FREEDCAMP_MAX_KEEPALIVE", "10")),
+        )
+        self.timeout = httpx.Timeout(
+            timeout or float(os.getenv("FREEDCAMP_TIMEOUT", "15")),
+            connect=connect_timeout or float(os.getenv("FREEDCAMP_CONNECT_TIMEOUT", "5")),
+        )
+        self.verify = _env_flag("FREEDCAMP_VERIFY_SSL", "true") if verify is None else verify
+        self.transport = transport  # tests pass an httpx.MockTransport
+        self.upstream: Upstream = get_upstream(
+            "freedcamp",
+            timeouts={"/tasks": 10.0},
+            default_timeout=float(os.getenv("FREEDCAMP_TIMEOUT", "15")) + 5,
+            max_concurrency=self.limits.max_connections or 20,
+            is_failure=_is_upstream_failure,
+        )
+        self._http: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._auth_cache: Tuple[int, Dict[str, str]] = (-1, {})
+
+    # ------------------------------------------------------------------ helpers
+    def _auth(self) -> Dict[str, str]:
+        """api_key/timestamp/hash params; the HMAC is only recomputed when the second changes."""
+        if not self.api_key or not self.api_secret:
+            raise ValueError("FREEDCAMP_API_KEY / FREEDCAMP_API_SECRET not configured.")
+        ts = int(time.time())
+        cached_ts, params = self._auth_cache
+        if cached_ts == ts:
+            return params
+        signature = hmac.new(
+            self.api_secret.encode("utf-8"),
+            f"{self.api_key}{ts}".encode("utf-8"),
+            hashlib.sha1,
+        ).hexdigest()
+        params = {"api_key": self.api_key, "timestamp": str(ts), "hash": signature}
+        self._auth_cache = (ts, params)
+        return params
+
+    def _client(self) -> httpx.AsyncClient:
+        # Pooled connections belong to the loop that opened them; scripts that call
+        # asyncio.run() more than once get a fresh pool per loop.
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http.is_closed or self._loop is not loop:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=self.limits,
+                timeout=self.timeout,
+                verify=self.verify,
+                transport=self.transport,
+            )
+            self._loop = loop
+        return self._http
+
+    # ------------------------------------------------------------------ public
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET `path` with auth params; returns the decoded JSON body."""
+        async def request():
+            r = await self._client().get(path, params={**self._auth(), **(params or {})})
+            r.raise_for_status()
+            return r.json()
+
+        return await self.upstream.call(path, request)
+
+    async def post_form(self, path: str, data: str) -> httpx.Response:
+        """POST a JSON string in the multipart 'data' field, as Freedcamp expects."""
+        return await self.upstream.call(
+            path,
+            lambda: self._client().post(path, params=self._auth(), files={"data": (None, data)}),
+            failed=lambda r: r.status_code >= 500,
+        )
+
+    async def aclose(self) -> None:
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+        self._loop = None
+
+
+_client: Optional[FreedcampClient] = None
+
+
+def get_freedcamp_client() -> FreedcampClient:
+    """Process-wide client shared by every Freedcamp call site."""
+    global _client
+    if _client is None:
+        _client = FreedcampClient()
+    return _client
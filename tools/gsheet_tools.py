@@ -1,30 +1,171 @@
 import os
-import gspread
+import re
+import time
+import random
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 from models import Task
+from services.resilience import get_upstream
+
+logger = logging.getLogger(__name__)
+
+_CELL_RE = re.compile(r"^\$?[A-Z]+\$?(\d+)")
+
+
+def _status(exc: BaseException) -> Optional[int]:
+    return getattr(getattr(exc, "response", None), "status_code", None)
+
+
+def _is_upstream_failure(exc: BaseException) -> bool:
+    status = _status(exc)
+    return status is None or status >= 500
+
+
+def first_row_of_range(updated_range: str) -> int:
+    """'Sheet1!A42:G44' -> 42; the sheet name may be quoted or look like a cell ('AB12'!A5:G7)."""
+    cells = (updated_range or "").rpartition("!")[2]
+    match = _CELL_RE.match(cells)
+    if not match:
+        raise ValueError(f"Cannot parse row from range '{updated_range}'")
+    return int(match.group(1))
+
+
+class SheetWriter:
+    """
+    Long-lived, buffered writer for the task sheet.
+
+    The gspread client and worksheet are opened once and reused. Rows are
+    buffered and written with a single append_rows call when `batch_size`
+    rows are waiting or `flush_seconds` have passed, and each caller gets its
+    row number from the append response's updatedRange, so the sheet is never
+    re-read. 429 and 5xx responses are retried with bounded backoff. Flushes
+    run on the writer's own thread, never in the thread that submits.
+    """
+
+    def __init__(
+        self,
+        creds_path: Optional[str] = None,
+        sheet_id: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+        max_retries: int = 5,
+        worksheet=None,
+    ):
+        self.creds_path = creds_path or os.getenv("GOOGLE_SERVICE_JSON")
+        self.sheet_id = sheet_id or os.getenv("SHEET_ID")  # no default: never write into someone else's sheet
+        self.batch_size = batch_size or int(os.getenv("SHEET_BATCH_SIZE", "20"))
+        self.flush_seconds = flush_seconds if flush_seconds is not None else float(os.getenv("SHEET_FLUSH_SECONDS", "2"))
+        self.max_retries = max_retries
+        self._worksheet = worksheet
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: List[Tuple[List[Any], Future]] = []
+        self._timer: Optional[threading.Timer] = None
+        self._flusher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sheet-flush")
+        self.upstream = get_upstream("sheets", default_timeout=30.0, is_failure=_is_upstream_failure)
+
+    # ------------------------------------------------------------------ public
+    def submit(self, task: Task, eager: bool = False) -> "Future[int]":
+        """
+        Buffer a task row; the future resolves to its sheet row number after the flush.
+
+        With `eager`, a row that arrives at an empty buffer is flushed right
+        away instead of waiting `flush_seconds` for company. Rows submitted
+        while that append is in flight still go out together in the next one.
+        """
+        if self._worksheet is None and (not self.creds_path or not self.sheet_id):
+            raise RuntimeError("Sheet writer is not configured: set GOOGLE_SERVICE_JSON and SHEET_ID.")
+        future: Future = Future()
+        row = [
+            task.title,
+            task.description,
+            task.assignee,
+            task.due_date or '',
+            task.priority,
+            task.source_channel,
+            ''  # sheet_row is known only after the append
+        ]
+        with self._lock:
+            self._pending.append((row, future))
+            flush_now = len(self._pending) >= self.batch_size or (eager and len(self._pending) == 1)
+            if not flush_now and self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            self._flusher.submit(self.flush)  # retries back off with time.sleep; keep them off the caller
+        return future
+
+    def flush(self) -> None:
+        """Write every buffered row with one append_rows call."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not batch:
+                return
+            try:
+                response = self._append_with_retry([row for row, _ in batch])
+                start = first_row_of_range(response.get("updates", {}).get("updatedRange", ""))
+            except Exception as e:
+                logger.error(f"Sheet append of {len(batch)} rows failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+            for i, (_, future) in enumerate(batch):
+                future.set_result(start + i)
+
+    def close(self) -> None:
+        self._flusher.shutdown(wait=True)
+        self.flush()
+
+    # ------------------------------------------------------------------ internals
+    def _sheet(self):
+        if self._worksheet is None:
+            import gspread  # only loaded when something is actually written
+            if not self.creds_path or not self.sheet_id:
+                raise RuntimeError("Missing Google Sheets credentials or sheet ID.")
+            gc = gspread.service_account(filename=self.creds_path)
+            gc.set_timeout(self.upstream.timeout_for("append_rows"))
+            self._worksheet = gc.open_by_key(self.sheet_id).sheet1  # or use a specific worksheet name
+        return self._worksheet
+
+    def _append_with_retry(self, rows: List[List[Any]]) -> Dict[str, Any]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.upstream.call_sync(
+                    "append_rows", lambda: self._sheet().append_rows(rows, value_input_option="USER_ENTERED")
+                )
+            except Exception as e:
+                status = _status(e)
+                retryable = status == 429 or (status is not None and status >= 500)
+                if not retryable or attempt == self.max_retries:
+                    raise
+                delay = min(30.0, 2 ** attempt) + random.uniform(0, 0.5)
+                logger.warning(f"Sheets API returned {status}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+
+_writer: Optional[SheetWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_sheet_writer() -> SheetWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = SheetWriter()
+        return _writer
+
 
 # This function will be registered as a tool for the SheetWriterAgent
 
 def append_to_sheet(task: Task) -> int:
     """Append a Task to the Google Sheet and return the created row number."""
-    # Load credentials and sheet ID from environment
-    creds_path = os.getenv("GOOGLE_SERVICE_JSON")
-    sheet_id = os.getenv("1FM74Bl-44_TSa6YrcpMFYyMbCFvlpTfHPD49PgVor7w")
-    if not creds_path or not sheet_id:
-        raise RuntimeError("Missing Google Sheets credentials or sheet ID.")
-    # Authenticate and open the sheet
-    gc = gspread.service_account(filename=creds_path)
-    sh = gc.open_by_key(sheet_id)
-    worksheet = sh.sheet1  # or use a specific worksheet name
-    # Prepare row data in schema order
-    row = [
-        task.title,
-        task.description,
-        task.assignee,
-        task.due_date or '',
-        task.priority,
-        task.source_channel,
-        ''  # sheet_row will be filled after append
-    ]
-    inserted = worksheet.append_row(row, value_input_option="USER_ENTERED")
-    # Get the new row number (gspread returns None, so fetch row count)
-    return len(worksheet.get_all_values()) 
\ No newline at end of file
+    writer = get_sheet_writer()
+    # The caller blocks on the row number, so a lone row is written at once rather than after flush_seconds
+    return writer.submit(task, eager=True).result(timeout=writer.flush_seconds + 120)
@@ -0,0 +1,92 @@
+# tools/pagination.py
+"""
+Offset pagination with a bounded window of concurrently prefetched pages.
+"""
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, List, TypeVar
+
+T = TypeVar("T")
+
+
+async def prefetch_pages(
+    fetch_page: Callable[[int, int], Awaitable[List[T]]],
+    page_size: int = 200,
+    prefetch: int = 3,
+) -> AsyncIterator[T]:
+    """
+    Walk every page of an offset-paginated endpoint and yield its records.
+
+    `fetch_page(limit=..., offset=...)` returns one page. Up to `prefetch` pages are in
+    flight at once; records are yielded in page order as soon as their page
+    lands, and only the pages in the window are held in memory. A short page
+    marks the end and cancels any speculative requests past it.
+    """
+    prefetch = max(1, prefetch)
+    pending: Deque[asyncio.Task] = deque()
+    next_offset = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < prefetch:
+                pending.append(asyncio.ensure_future(fetch_page(limit=page_size, offset=next_offset)))
+                next_offset += page_size
+            if not pending:
+                return
+            items = await pending.popleft()
+            for item in items:
+                yield item
+            if len(items) < page_size:
+                exhausted = True
+                while pending:
+                    pending.popleft().cancel()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def newer_than(
+    records: AsyncIterator[T],
+    since: int,
+    key: Callable[[T], int],
+    page_size: int,
+) -> AsyncIterator[T]:
+    """
+    Yield the records with key(record) > since from a walk requested newest first.
+
+    The walk stops at the first older record only once the order is confirmed:
+    the first full page must be non-increasing with at least one strict
+    decrease, and no later record may be newer than the one before it. Until
+    then, and for good after a violation, every record is filtered instead, so
+    an API that ignores the requested order (or answers oldest first) costs a
+    full walk but never loses an update.
+    """
+    first_page: List[T] = []
+    ordered = False
+    previous = None
+    async for record in records:
+        if len(first_page) < page_size:
+            first_page.append(record)
+            if len(first_page) < page_size:
+                continue
+            keys = [key(r) for r in first_page]
+            ordered = keys[0] > keys[-1] and all(a >= b for a, b in zip(keys, keys[1:]))
+            previous = keys[-1]
+            for r, k in zip(first_page, keys):
+                if k > since:
+                    yield r
+                elif ordered:
+                    return
+            continue
+        k = key(record)
+        if k > previous:
+            ordered = False
+        previous = k
+        if k > since:
+            yield record
+        elif ordered:
+            return
+    if len(first_page) < page_size:  # the whole walk fit in one short page
+        for r in first_page:
+            if key(r) > since:
+                yield r
@@ -0,0 +1,127 @@
+# tools/slack_blocks.py
+"""
+Block Kit payloads for the single, in-place updated reply per request.
+"""
+from typing import Dict, List
+
+MAX_TASK_SECTIONS = 40  # Slack caps a message at 50 blocks
+
+STATUS_EMOJI = {"success": ":white_check_mark:", "partial": ":warning:"}
+
+
+def _section(text: str) -> Dict:
+    return {"type": "section", "text": {"type": "mrkdwn", "text": text[:3000]}}
+
+
+def _context(text: str) -> Dict:
+    return {"type": "context", "elements": [{"type": "mrkdwn", "text": text[:3000]}]}
+
+
+def _existing(match) -> str:
+    link = f"<{match.url}|{match.title}>" if match.url else f"*{match.title}*"
+    return f"{link} (ID: {match.task_id}, {int(match.score * 100)}% similar)"
+
+
+def progress_blocks(text: str) -> List[Dict]:
+    return [_section(f":hourglass_flowing_sand: {text}")]
+
+
+def progress_text(fields: Dict) -> str:
+    """'Drafting…' line for partially decoded draft fields (see pm_agents.stream_progress)."""
+    stage = "Creating in Freedcamp" if fields.get("stage") == "creating" else "Drafting"
+    parts = [f"*Title:* {fields['title']}"] if fields.get("title") else []
+    if fields.get("assignee"):
+        parts.append(f"*Assignee:* {fields['assignee']}")
+    if fields.get("priority"):
+        parts.append(f"*Priority:* {fields['priority']}")
+    if fields.get("due_date"):
+        parts.append(f"*Due:* {fields['due_date']}")
+    count = fields.get("tasks_seen", 0)
+    suffix = f" ({count} tasks)" if count > 1 else ""
+    return f"{stage}{suffix}... " + "  |  ".join(parts)
+
+
+def error_blocks(text: str) -> List[Dict]:
+    return [_section(text)]
+
+
+def result_text(result) -> str:
+    """Plain-text fallback (notifications, clients without Block Kit) for an OrchestratorResponse."""
+    header_emoji = STATUS_EMOJI.get(result.status, ":x:")
+    lines = [f"{header_emoji} {result.message}"]
+    for item in result.results:
+        task = item.task
+        info = item.freedcamp_info
+        lines.append("")
+        if info.success:
+            lines.append(f":clipboard: *{task.title}* - <{info.task_url}|Open in Freedcamp> (ID: {info.task_id})")
+        elif getattr(item, "duplicate_of", None) is not None:
+            lines.append(f":link: *{task.title}* - not created, looks like {_existing(item.duplicate_of)}")
+        elif getattr(item, "queued", False):
+            lines.append(f":hourglass: *{task.title}* - queued, will be created when Freedcamp responds")
+        else:
+            lines.append(f":warning: *{task.title}* - not created: {info.error or 'Unknown error'}")
+        lines.append(
+            f"*Assignee:* {task.assignee} | *Priority:* {task.priority} | "
+            f"*Due Date:* {task.due_date or 'Not specified'}"
+        )
+    return "\n".join(lines)
+
+
+def result_blocks(result) -> List[Dict]:
+    """Block Kit body for an OrchestratorResponse: one section per task."""
+    blocks = [_section(f"{STATUS_EMOJI.get(result.status, ':x:')} {result.message}")]
+    for item in result.results[:MAX_TASK_SECTIONS]:
+        task = item.task
+        info = item.freedcamp_info
+        if info.success:
+            headline = f":clipboard: *{task.title}*  <{info.task_url}|Open in Freedcamp>"
+        elif getattr(item, "duplicate_of", None) is not None:
+            headline = f":link: *{task.title}* - not created, looks like {_existing(item.duplicate_of)}"
+        elif getattr(item, "queued", False):
+            headline = f":hourglass: *{task.title}* - queued, will be created when Freedcamp responds"
+        else:
+            headline = f":warning: *{task.title}* - not created: {info.error or 'Unknown error'}"
+        blocks.append({"type": "divider"})
+        blocks.append(_section(headline))
+        blocks.append(_context(
+            f"*Assignee:* {task.assignee}  |  *Priority:* {task.priority}  |  "
+            f"*Due:* {task.due_date or 'Not specified'}"
+        ))
+    hidden = len(result.results) - MAX_TASK_SECTIONS
+    if hidden > 0:
+        blocks.append(_context(f"…and {hidden} more task(s)."))
+    return blocks
+
+
+PRIORITY_LABELS = {3: "P0", 2: "P1", 1: "P2"}  # Freedcamp priority -> the P-levels DMs use
+
+
+def staleness_text(seconds) -> str:
+    if seconds is None:
+        return "Task list not synced from Freedcamp yet; results may be incomplete."
+    if seconds < 90:
+        return f"Synced from Freedcamp {int(seconds)}s ago."
+    if seconds < 2 * 3600:
+        return f"Synced from Freedcamp {int(seconds // 60)} min ago."
+    return f"Synced from Freedcamp {seconds / 3600:.1f} h ago; recent changes may be missing."
+
+
+def task_list_text(tasks, label: str, staleness) -> str:
+    """Plain-text answer to a "my tasks" DM from the local task store."""
+    if not tasks:
+        lines = [f":tada: No {label} tasks assigned to you."]
+    else:
+        lines = [f":clipboard: Your {label} tasks ({len(tasks)}):"]
+        for t in tasks:
+            title = f"<{t.url}|{t.title}>" if t.url else f"*{t.title}*"
+            due = f" - due {t.due_date}" if t.due_date else ""
+            prio = PRIORITY_LABELS.get(t.priority, "")
+            lines.append(f"- {title}{due}" + (f" ({prio})" if prio else ""))
+    lines.append(f"_{staleness_text(staleness)}_")
+    return "\n".join(lines)
+
+
+def task_list_blocks(tasks, label: str, staleness) -> List[Dict]:
+    body = task_list_text(tasks, label, staleness).rsplit("\n", 1)[0]
+    return [_section(body), _context(staleness_text(staleness))]
@@ -0,0 +1,202 @@
+# tools/slack_sender.py
+"""
+Shared, non-blocking Slack sender.
+
+One AsyncWebClient per process. Outbound calls go through a small queue per
+channel, so a channel never gets more than one message per
+SLACK_CHANNEL_MIN_INTERVAL seconds. A 429 pauses that channel for the
+Retry-After interval Slack asks for. An update to a message that is still
+queued replaces the queued payload, so a burst of progress edits ends up as
+one chat.update call.
+
+The per-channel send slots are claimed from the shared state backend
+(services/state.py), so the spacing holds across worker processes too.
+
+Each API call also goes through the "slack" resilience guard
+(services/resilience.py). While Slack is failing, calls fail fast instead of
+piling up behind the client's own 30s timeout.
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+import aiohttp
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web.async_client import AsyncWebClient
+
+from services.metrics import span
+from services.resilience import get_upstream
+
+logger = logging.getLogger(__name__)
+
+MAX_RATE_LIMIT_RETRIES = 5
+CHANNEL_IDLE_SECONDS = 60.0
+
+
+def _is_upstream_failure(exc: BaseException) -> bool:
+    if isinstance(exc, SlackApiError):
+        return exc.response.status_code >= 500  # 429 and API errors are answers, not an outage
+    return isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+@dataclass
+class _Op:
+    method: str
+    kwargs: Dict[str, Any]
+    future: asyncio.Future
+    key: Optional[str] = None
+
+
+@dataclass
+class _ChannelQueue:
+    ops: Deque[_Op] = field(default_factory=deque)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    queued_updates: Dict[str, _Op] = field(default_factory=dict)
+    worker: Optional[asyncio.Task] = None
+    next_send_at: float = 0.0
+
+
+class SlackSender:
+    def __init__(self, client: Optional[AsyncWebClient] = None, min_interval: Optional[float] = None, state=None):
+        self._owns_session = client is None
+        self._client = client or AsyncWebClient(
+            token=os.getenv("SLACK_BOT_TOKEN"),
+            base_url=os.getenv("SLACK_API_URL", AsyncWebClient.BASE_URL),
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.min_interval = min_interval if min_interval is not None else float(os.getenv("SLACK_CHANNEL_MIN_INTERVAL", "1.0"))
+        self._channels: Dict[str, _ChannelQueue] = {}
+        if state is None:
+            from services.state import get_state_backend
+            state = get_state_backend()
+        self._state = state
+        self.upstream = get_upstream(
+            "slack", timeouts={"users_list": 30.0}, default_timeout=10.0, is_failure=_is_upstream_failure
+        )
+        self.sent = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.failed = 0
+
+    @property
+    def client(self) -> AsyncWebClient:
+        """The shared AsyncWebClient, backed by one keep-alive aiohttp session."""
+        if self._owns_session and (self._session is None or self._session.closed):
+            self._session = aiohttp.ClientSession()
+            self._client.session = self._session
+        return self._client
+
+    # ------------------------------------------------------------------ public
+    async def post(self, channel: str, text: str, blocks: Optional[List[Dict]] = None, **kwargs) -> Optional[str]:
+        """chat.postMessage; returns the message ts (None if Slack refused it)."""
+        payload = {"channel": channel, "text": text, **kwargs}
+        if blocks is not None:
+            payload["blocks"] = blocks
+        response = await self._enqueue(channel, "chat_postMessage", payload)
+        return response.get("ts") if response else None
+
+    async def update(self, channel: str, ts: str, text: str, blocks: Optional[List[Dict]] = None) -> Optional[Dict]:
+        """chat.update, coalesced with any not-yet-sent update of the same message."""
+        payload = {"channel": channel, "ts": ts, "text": text}
+        if blocks is not None:
+            payload["blocks"] = blocks
+        return await self._enqueue(channel, "chat_update", payload, key=ts)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "channels_active": len(self._channels),
+            "queued": sum(len(c.ops) for c in self._channels.values()),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "rate_limited": self.rate_limited,
+            "failed": self.failed,
+        }
+
+    async def aclose(self) -> None:
+        workers = [c.worker for c in self._channels.values() if c.worker]
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._channels.clear()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    # ------------------------------------------------------------------ internals
+    def _enqueue(self, channel: str, method: str, payload: Dict[str, Any], key: Optional[str] = None) -> asyncio.Future:
+        cq = self._channels.get(channel)
+        if cq is None:
+            cq = self._channels[channel] = _ChannelQueue()
+        if key is not None and key in cq.queued_updates:
+            op = cq.queued_updates[key]
+            op.kwargs = payload
+            self.coalesced += 1
+            return op.future
+        op = _Op(method, payload, asyncio.get_running_loop().create_future(), key)
+        cq.ops.append(op)
+        if key is not None:
+            cq.queued_updates[key] = op
+        cq.wakeup.set()
+        if cq.worker is None or cq.worker.done():
+            cq.worker = asyncio.get_running_loop().create_task(self._drain(channel, cq), name=f"slack-out-{channel}")
+        return op.future
+
+    async def _drain(self, channel: str, cq: _ChannelQueue) -> None:
+        while True:
+            if not cq.ops:
+                cq.wakeup.clear()
+                try:
+                    await asyncio.wait_for(cq.wakeup.wait(), timeout=CHANNEL_IDLE_SECONDS)
+                except asyncio.TimeoutError:
+                    if not cq.ops:
+                        self._channels.pop(channel, None)
+                        return
+                continue
+            op = cq.ops.popleft()
+            if op.key is not None:
+                cq.queued_updates.pop(op.key, None)
+            delay = cq.next_send_at - time.monotonic()
+            if self.min_interval > 0:
+                delay = max(delay, await self._state.reserve_async(f"slack:channel:{channel}", self.min_interval))
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                result = await self._call(op)
+                if not op.future.done():
+                    op.future.set_result(result)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Slack {op.method} to {channel} failed: {e}")
+                if not op.future.done():
+                    op.future.set_result(None)
+            cq.next_send_at = time.monotonic() + self.min_interval  # local floor; the shared slot covers other workers
+
+    async def _call(self, op: _Op) -> Dict[str, Any]:
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            try:
+                with span(f"slack.{op.method}"):
+                    response = await self.upstream.call(op.method, lambda: getattr(self.client, op.method)(**op.kwargs))
+                self.sent += 1
+                return response.data
+            except SlackApiError as e:
+                if e.response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+                headers = e.response.headers or {}
+                retry_after = float(headers.get("Retry-After") or headers.get("retry-after") or 1)
+                self.rate_limited += 1
+                logger.warning(f"Slack rate limited {op.method}; waiting {retry_after}s")
+                await asyncio.sleep(retry_after)
+
+
+_sender: Optional[SlackSender] = None
+
+
+def get_slack_sender() -> SlackSender:
+    global _sender
+    if _sender is None:
+        _sender = SlackSender()
+    return _sender
@@ -1,28 +1,24 @@
-import os
-from slack_sdk import WebClient
 from agents import function_tool
+from tools.slack_sender import get_slack_sender
 
 @function_tool
-def slack_dm(user: str, msg: str) -> dict:
+async def slack_dm(user: str, msg: str) -> dict:
     """Send a Slack DM to the given user and return the API response as a dict."""
-    token = os.getenv("SLACK_BOT_TOKEN")
-    if not token:
-        raise RuntimeError("Missing SLACK_BOT_TOKEN.")
-    
-    client = WebClient(token=token)
-    
+    sender = get_slack_sender()
     try:
-        # Send the message
-        response = client.chat_postMessage(
-            channel=user,  # user ID or channel
-            text=msg,
+        # Goes through the shared client and the per-channel rate-limited queue
+        ts = await sender.post(
+            user,  # user ID or channel
+            msg,
             parse="mrkdwn"  # Enable markdown formatting
         )
-        return response.data
+        if ts is None:
+            raise RuntimeError("Slack did not accept the message")
+        return {"ok": True, "channel": user, "ts": ts}
     except Exception as e:
         return {
             "ok": False,
             "error": str(e),
             "channel": user,
             "message": msg
-        } 
\ No newline at end of file
+        }